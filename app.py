@@ -10,12 +10,13 @@ import dash
 import dash_bootstrap_components as dbc
 import dash_html_components as html
 import dash_core_components as dcc
-from dash.dependencies import Input, Output
+from dash.dependencies import Input, Output, State
 from plotly import graph_objects as go
 import plotly.express as px
 
 import pandas as pd 
 from datetime import datetime
+from functools import lru_cache
 import sys
 sys.path.append("src")
 
@@ -34,35 +35,65 @@ from mongodb import MongoDB
 mongodb_attr = MongoDB("profiles")
 
 from main_ops import MainOperations
+from exceptions import UsernameNotFound
 mainops_attr = MainOperations()
 #------------------------------- PYTHON FUNCTIONS -----------------------------
-def get_avalaible_dates(collection="profiles"):
+@lru_cache(maxsize=256)
+def get_cached_dates(collection, username, social_media, version):
     """
-    Recovers the dates in which the collection received new data in order to plot
-    them in the dropdown menus to choose the start date and the end date to perform
-    an analysis.
+    Recovers the dates in which the collection received new data of a user as
+    strings with the format dd-mm-YYYY. The least recently used dates are removed
+    from the cache once it's full, and the cache is shared by the concurrent
+    callbacks. The snapshot version of the collection is part of the key, so the
+    dates are got again once the collection receives new data.
 
     Parameters
     ----------
+    collection : str
+        It's the Mongo collection from which the dates will be recovered.
+    username : str
+        It's the user whose dates will be recovered.
+    social_media : str
+        It's the social media source of the user data.
+    version : int
+        It's the snapshot version of the collection.
+
+    Returns
+    -------
+    A tuple of strings whose each item is a date in which there are downloaded data.
+    """
+    avalaible_dates = mongodb_attr.get_dates(username, social_media, collection)
+    # Format them from datetime to string
+    return tuple([datetime.strftime(date, "%d-%m-%Y") for date in avalaible_dates])
+
+def get_avalaible_dates(username, social_media, collection="profiles"):
+    """
+    Recovers the dates in which the collection received new data of a user in order
+    to plot them in the dropdown menus to choose the start date and the end date to
+    perform an analysis. The dates are cached until the collection receives new
+    data, so only the snapshot version of the collection is read from the database
+    while the downloading task doesn't insert a new snapshot.
+
+    Parameters
+    ----------
+    username : str
+        It's the user whose dates will be recovered.
+    social_media : str
+        It's the social media source of the user data.
     collection : str, optional
         It's the Mongo collection from which the dates will be recovered. 
         The default is "profiles".
 
     Returns
     -------
-    A list of strings whose each item is a date in which there are downloaded data.
+    A list of dicts whose each item is a date in which there are downloaded data.
     """
-    # Set the collection to recover the dates
-    mongodb_attr.set_collection(collection)
-    # Get the avalaible dates to perform an analysis. Default analysis is Profiles Evolution
-    avalaible_dates = mongodb_attr.get_records("get_dates")
-    # Format them from datetime to string
-    avalaible_string_dates = []
-    for date in avalaible_dates:
-        avalaible_string_dates.append({"label":datetime.strftime(date["date"], "%d-%m-%Y"), 
-                                "value":datetime.strftime(date["date"], "%d-%m-%Y")})
-    
-    return avalaible_string_dates
+    # Get the avalaible dates to perform an analysis from the provided collection
+    # without changing the connected one, since the callbacks run concurrently.
+    # Default analysis is Profiles Evolution
+    version = mongodb_attr.get_snapshot(collection)
+    avalaible_dates = get_cached_dates(collection, username, social_media, version)
+    return [{"label":date, "value":date} for date in avalaible_dates]
 
 def plot_filled_area_chart(analysis_result):
     """
@@ -339,9 +370,6 @@ sidebar = html.Div([
     style=SIDEBAR_STYLE,
 )
 
-# Prepare the dates to choose for the first and default analysis
-dates_to_print = get_avalaible_dates()
-
 # Layout
 app.layout = html.Div([
         dcc.Location(id="url"), 
@@ -398,6 +426,8 @@ app.layout = html.Div([
                     ),
                     html.Button('Recopilar datos', id='enable-new-user', 
                     style={'background':'#8c59d9', 'margin-top':'20px', 'color':'white'}),
+                    html.Button('Dejar de recopilar', id='disable-user', 
+                    style={'background':'#8c59d9', 'margin-top':'20px', 'margin-left':'10px', 'color':'white'}),
                     html.P(children="", id="user-result"),
                 ]),
         ]),
@@ -437,15 +467,13 @@ app.layout = html.Div([
                             html.P(children="Red social", style={"display":"inline-block", "width":"20%", "margin-right":"5%"}),
                         ]),
                         dcc.Dropdown(
-                            options=dates_to_print,
+                            options=[],
                             id="analysis-start-date-dropdown",
-                            value=dates_to_print[0]["value"],
                             style={"display":"inline-block", "width":"20%", "margin-right":"5%"}
                         ),
                         dcc.Dropdown(
-                            options=dates_to_print,
+                            options=[],
                             id="analysis-end-date-dropdown",
-                            value=dates_to_print[0]["value"],
                             style={"display":"inline-block", "width":"20%", "margin-right":"5%"}
                         ),
                         dcc.Dropdown(
@@ -507,18 +535,21 @@ app.layout = html.Div([
     [Output("user-result", "children"),
     Output("user-result", "style")],
     [Input("enable-new-user", "n_clicks"),
-     Input("new-user-input", "value")]
+     Input("disable-user", "n_clicks")],
+    [State("new-user-input", "value")]
 )
-def set_user_to_study(clicks, user):
+def set_user_to_study(clicks, remove_clicks, user):
     """
-    Saves the username of the account to study later by setting the related 
-    attributes of the MainOperations class which will be read by the task server
-    when the data are going to be download.
+    Adds the username of the account to study to the watchlist, whose data will
+    be downloaded every day by the task server, or removes it from the watchlist.
+    The username is only read when one of the buttons is clicked.
 
     Parameters
     ----------
     clicks : integer
-        It's the number of clicks over the button.
+        It's the number of clicks over the button to add the user.
+    remove_clicks : integer
+        It's the number of clicks over the button to remove the user.
     user : str
         It's the username of the account to analyze.
 
@@ -527,18 +558,50 @@ def set_user_to_study(clicks, user):
     A string with the related to message to show the status of the process as well
     as its style.
     """
-    if (clicks != None):
-        if (clicks > 0):
-            set_user = mainops_attr.set_user_to_study(user)
-            color = "green"
-            message = "El usuario a analizar ha sido actualizado correctamente." 
-            if (set_user != user):
-                color = "red"
-                message = "Ha ocurrido un error durante el proceso y no se ha podido establecer el usuario."
-            return message, {"display":"inline-block", "color":color, "margin-top":"10px"}
+    triggered = [item["prop_id"] for item in dash.callback_context.triggered]
+    if ("enable-new-user.n_clicks" not in triggered and "disable-user.n_clicks" not in triggered):
         return "", {"display":"none"}
-    return "", {"display":"none"}
+    try:
+        if ("disable-user.n_clicks" in triggered):
+            mainops_attr.remove_user_to_study(user)
+            message = "El usuario ya no será analizado."
+        else:
+            mainops_attr.set_user_to_study(user)
+            message = "El usuario a analizar ha sido actualizado correctamente."
+        color = "green"
+    except UsernameNotFound:
+        color = "red"
+        message = "El nombre de usuario no es válido."
+    return message, {"display":"inline-block", "color":color, "margin-top":"10px"}
     
+@app.callback(
+    [Output("analysis-start-date-dropdown", "options"),
+     Output("analysis-start-date-dropdown", "value"),
+     Output("analysis-end-date-dropdown", "options"),
+     Output("analysis-end-date-dropdown", "value")],
+    [Input("analysis-users-dropdown", "value"),
+     Input("analysis-social-media-dropdown", "value")]
+)
+def update_avalaible_dates(user, social_media):
+    """
+    Plots the dates in which there are downloaded data of the chosen user and social
+    media in the dropdown menus to choose the start date and the end date.
+
+    Parameters
+    ----------
+    user : str
+        It's the username of the account to study.
+    social_media : str
+        It's the social media source of the downloaded user data.
+
+    Returns
+    -------
+    The dates of both dropdown menus and the first date as the selected one.
+    """
+    dates_to_print = get_avalaible_dates(user, social_media)
+    first_date = dates_to_print[0]["value"] if len(dates_to_print) > 0 else None
+    return dates_to_print, first_date, dates_to_print, first_date
+
 @app.callback(
     Output("analysis-results", "figure"),
     [Input("analysis-start-date-dropdown", "value"),
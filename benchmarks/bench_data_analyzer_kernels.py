@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark suite of the aggregation kernels of the class DataAnalyzer, which are
+measured with pytest-benchmark from 10^3 to 10^7 rows:
+    - post_evolution: averages of likes and comments per date.
+    - post_popularity: averages of likes and comments per media.
+    - get_values_per_many_weeks: averages of each field per week.
+The previous implementations, which scanned the whole input for each date or
+media and sliced the values of each week, are kept here as the reference. They
+are only measured up to 10^4 rows, since they are quadratic, and the results
+of both implementations are checked to be identical for those sizes.
+
+Usage: python3 -m pytest benchmarks/bench_data_analyzer_kernels.py --benchmark-group-by=func
+
+The largest size could be skipped with: -k "not 10000000"
+
+@author: Lidia Sánchez Mérida
+"""
+import datetime
+import random
+import sys
+import pytest
+sys.path.append("src")
+sys.path.append("src/data")
+
+from data_analyzer import DataAnalyzer
+
+SIZES = [10**3, 10**4, 10**5, 10**6, 10**7]
+PREVIOUS_MAX_SIZE = 10**4
+# Number of different dates and medias of the synthetic dataset
+N_DATES = 90
+
+analyzer = DataAnalyzer()
+
+def previous_post_evolution(post_interactions):
+    """
+    Previous implementation of DataAnalyzer.post_evolution.
+    """
+    mean_post_interactions = []
+    dates = list(set([item[0] for item in post_interactions]))
+    dates.sort()
+    for date in dates:
+        likes = [int(item[1]) for item in post_interactions if item[0] == date]
+        comments = [int(item[2]) for item in post_interactions if item[0] == date]
+        mean_post_interactions.append((date, round(sum(likes)/len(likes)), round(sum(comments)/len(comments))))
+    if (len(mean_post_interactions) <= 7):
+        return analyzer.get_values_per_one_week(mean_post_interactions, ['date', 'like_count', 'comment_count'])
+    return previous_get_values_per_many_weeks(mean_post_interactions, ['date', 'like_count', 'comment_count'])
+
+def previous_post_popularity(post_popularities):
+    """
+    Previous implementation of DataAnalyzer.post_popularity.
+    """
+    media_codes = [item[0] for item in post_popularities]
+    unique_media_codes = list(dict.fromkeys(media_codes))
+    analysis_results = []
+    for code in unique_media_codes:
+        likes = [int(item[1]) for item in post_popularities if item[0] == code]
+        comments = [int(item[2]) for item in post_popularities if item[0] == code]
+        analysis_results.append((code, round(sum(likes)/len(likes)), round(sum(comments)/len(comments))))
+    return analysis_results
+
+def previous_get_values_per_many_weeks(values, keys):
+    """
+    Previous implementation of DataAnalyzer.get_values_per_many_weeks.
+    """
+    value_list = analyzer.get_values_per_one_week(values, keys)
+    result = {key:[] for key in keys}
+    for i in range(1, len(keys)):
+        key_values = [int(value) for value in value_list[keys[i]]]
+        while (len(key_values) > 0):
+            result[keys[i]].append(round(sum(key_values[:7])/len(key_values[:7])))
+            key_values = key_values[7:]
+    result['date'].extend(["Semana "+str(i+1) for i in range(0, len(result[keys[1]]))])
+    return result
+
+@pytest.fixture(scope="module")
+def datasets():
+    """
+    Synthetic rows as they're returned by the Postgres database. The values are
+    shared between the rows in order to fit 10^7 rows in memory.
+    """
+    rand = random.Random(0)
+    dates = [datetime.date(2021, 1, 1)+datetime.timedelta(days=i) for i in range(0, N_DATES)]
+    counts = [str(i) for i in range(0, 1000)]
+    cache = {}
+    def get_rows(size, kind):
+        if ((size, kind) not in cache):
+            cache.clear()
+            if (kind == "dates"):
+                rows = [(dates[rand.randrange(N_DATES)], counts[rand.randrange(1000)], counts[rand.randrange(100)])
+                        for i in range(0, size)]
+            elif (kind == "medias"):
+                # Each media appears about ten times
+                codes = ["media"+str(i) for i in range(0, max(size//10, 1))]
+                rows = [(codes[rand.randrange(len(codes))], counts[rand.randrange(1000)], counts[rand.randrange(100)])
+                        for i in range(0, size)]
+            else:
+                rows = [(dates[i % N_DATES], counts[rand.randrange(1000)], counts[rand.randrange(100)])
+                        for i in range(0, size)]
+            cache[(size, kind)] = rows
+        return cache[(size, kind)]
+    return get_rows
+
+def run(benchmark, function, rows, size):
+    """
+    Measures a kernel with fewer rounds for the largest inputs.
+    """
+    rounds = 5 if size <= 10**5 else 1
+    return benchmark.pedantic(function, args=(rows,), rounds=rounds, iterations=1)
+
+@pytest.mark.parametrize("size", SIZES)
+def test_post_evolution(benchmark, datasets, size):
+    rows = datasets(size, "dates")
+    result = run(benchmark, lambda rows: analyzer.post_evolution("user", rows), rows, size)
+    if (size <= PREVIOUS_MAX_SIZE):
+        assert result == previous_post_evolution(rows)
+
+@pytest.mark.parametrize("size", [size for size in SIZES if size <= PREVIOUS_MAX_SIZE])
+def test_previous_post_evolution(benchmark, datasets, size):
+    run(benchmark, previous_post_evolution, datasets(size, "dates"), size)
+
+@pytest.mark.parametrize("size", SIZES)
+def test_post_popularity(benchmark, datasets, size):
+    rows = datasets(size, "medias")
+    result = run(benchmark, lambda rows: analyzer.post_popularity("user", rows), rows, size)
+    if (size <= PREVIOUS_MAX_SIZE):
+        assert result == previous_post_popularity(rows)
+
+@pytest.mark.parametrize("size", [size for size in SIZES if size <= PREVIOUS_MAX_SIZE])
+def test_previous_post_popularity(benchmark, datasets, size):
+    run(benchmark, previous_post_popularity, datasets(size, "medias"), size)
+
+@pytest.mark.parametrize("size", SIZES)
+def test_get_values_per_many_weeks(benchmark, datasets, size):
+    rows = datasets(size, "weeks")
+    keys = ['date', 'like_count', 'comment_count']
+    result = run(benchmark, lambda rows: analyzer.get_values_per_many_weeks(rows, keys), rows, size)
+    if (size <= PREVIOUS_MAX_SIZE):
+        assert result == previous_get_values_per_many_weeks(rows, keys)
+
+@pytest.mark.parametrize("size", [size for size in SIZES if size <= PREVIOUS_MAX_SIZE])
+def test_previous_get_values_per_many_weeks(benchmark, datasets, size):
+    run(benchmark, lambda rows: previous_get_values_per_many_weeks(rows, ['date', 'like_count', 'comment_count']),
+        datasets(size, "weeks"), size)
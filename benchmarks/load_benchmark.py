@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+End-to-end benchmark which loads synthetic user data at a configurable scale
+(users x days x medias x comments) and measures every analysis of the platform:
+    - load: the synthetic data of each day are preprocessed by CommonData and
+    stored in the test collections of the Mongo database with the rollups of the
+    Postgres database by MainOperations.preprocess_and_store_many_common_data.
+    - analyses: each test analysis of DataAnalyzer.avalaible_analysis is performed
+    for every user and the whole period of days by MainOperations.perform_analysis.
+    The first run computes and stores the analysis, whereas the next runs measure
+    the stored or cached results.
+The test collections and tables are emptied before and after each execution,
+so the first runs always start from the same state. The timings, the scale and
+the commit are written in a JSON report, which can be compared with the report
+of another commit.
+
+Usage: python3 benchmarks/load_benchmark.py --users 2 --days 14 --posts 10 --comments 20
+       --output report.json --compare previous_report.json
+
+It requires the env variables MONGODB_URI, POSTGRES_USER and POSTGRES_PSWD as
+the class MainOperations, since it connects to the Mongo and Postgres databases,
+such as the local containers of the platform.
+
+@author: Lidia Sánchez Mérida
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime
+sys.path.append("src")
+sys.path.append("src/data")
+
+from main_ops import MainOperations
+from synthetic_data import SyntheticData
+
+SOCIAL_MEDIA = "Instagram"
+MODE = "test"
+# Tables of the Postgres tests which don't store user data
+OTHER_TABLES = ["testparent", "testchild", "testfk"]
+
+def get_commit():
+    """
+    Gets the current commit of the repository and if it has uncommitted changes.
+    """
+    folder = os.path.dirname(os.path.abspath(__file__))
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=folder,
+                                capture_output=True, text=True, check=True).stdout.strip()
+        changes = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=folder,
+                                 capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return {"commit":None, "dirty":None}
+    return {"commit":commit, "dirty":changes != ""}
+
+def empty_test_data(main_ops, usernames):
+    """
+    Deletes the synthetic users from the test collections of the Mongo database
+    and empties the test tables of the Postgres database.
+    """
+    mongodb = main_ops.mongodb_object
+    for collection in main_ops.mongo_collections[MODE].values():
+        mongodb.set_collection(collection)
+        if (mongodb.connection.delete_many({"username":{"$in":usernames}}).deleted_count > 0):
+            mongodb.update_snapshot(mongodb.connection)
+    for table in main_ops.postgresdb_object.tables:
+        if (table.startswith("test") and table not in OTHER_TABLES):
+            main_ops.postgresdb_object.empty_table(table)
+
+def load_data(main_ops, synthetic_data):
+    """
+    Preprocesses and stores the synthetic data of every user with a request per
+    day, as the task server.
+
+    Returns
+    -------
+    A dict with the number of stored days, documents, medias and comments, the
+    total seconds and the seconds of each day.
+    """
+    seconds = []
+    n_medias = n_comments = 0
+    for day_data in synthetic_data.generate():
+        user_data_list = [item["user_data"] for item in day_data]
+        n_medias += sum(len(user_data["medias"]) for user_data in user_data_list)
+        n_comments += sum(len(comment["texts"]) for user_data in user_data_list for comment in user_data["comments"])
+        start = time.perf_counter()
+        main_ops.preprocess_and_store_many_common_data(user_data_list, SOCIAL_MEDIA, MODE, day_data[0]["date"])
+        seconds.append(time.perf_counter()-start)
+    return {"days":len(seconds), "documents":3*len(seconds)*synthetic_data.n_users,
+            "medias":n_medias, "comments":n_comments, "seconds":sum(seconds),
+            "seconds_per_day":statistics.median(seconds)}
+
+def time_analysis(main_ops, analysis, usernames, date_ini, date_fin, repeat):
+    """
+    Performs an analysis for every user several times.
+
+    Returns
+    -------
+    A dict with the seconds of the first run of all the users, the median seconds
+    of the next runs, the seconds of each run and the errors of each user.
+    """
+    runs = []
+    errors = {}
+    for run in range(0, repeat):
+        start = time.perf_counter()
+        for username in usernames:
+            try:
+                main_ops.perform_analysis(username, analysis, SOCIAL_MEDIA, date_ini, date_fin)
+            except Exception as error:
+                errors[username] = getattr(error, "mensaje", str(error))
+        runs.append(time.perf_counter()-start)
+    return {"first":runs[0], "repeated":statistics.median(runs[1:]) if len(runs) > 1 else None,
+            "runs":runs, "errors":errors}
+
+def compare_reports(report, previous_report):
+    """
+    Prints the seconds of the current and the previous reports and their ratio.
+    """
+    print("\nComparison with the commit "+str(previous_report["commit"])+":")
+    if (report["scale"] != previous_report["scale"]):
+        print("WARNING. The scales are different: "+str(previous_report["scale"]))
+    print("{:<40} {:>12} {:>12} {:>8}".format("step", "previous s", "current s", "ratio"))
+    rows = [("load", previous_report["load"]["seconds"], report["load"]["seconds"])]
+    for analysis, result in report["analyses"].items():
+        previous_result = previous_report["analyses"].get(analysis)
+        if (previous_result == None):
+            continue
+        for key in ["first", "repeated"]:
+            if (result[key] != None and previous_result[key] != None):
+                rows.append((analysis+" ("+key+")", previous_result[key], result[key]))
+    for step, previous_seconds, seconds in rows:
+        print("{:<40} {:>12.3f} {:>12.3f} {:>7.2f}x".format(step, previous_seconds, seconds,
+              seconds/previous_seconds if previous_seconds > 0 else float("nan")))
+
+def main():
+    parser = argparse.ArgumentParser(description="End-to-end benchmark of the load and the analyses of synthetic data.")
+    parser.add_argument("--users", type=int, default=2, help="Number of users.")
+    parser.add_argument("--days", type=int, default=14, help="Number of days.")
+    parser.add_argument("--posts", type=int, default=10, help="Number of recent medias per day.")
+    parser.add_argument("--comments", type=int, default=20, help="Number of comments per media.")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the random generator.")
+    parser.add_argument("--repeat", type=int, default=3, help="Number of runs of each analysis.")
+    parser.add_argument("--analyses", nargs="+", default=None,
+                        help="Analyses to measure. The default is every test analysis.")
+    parser.add_argument("--output", default=None,
+                        help="Path to the JSON report. The default is load_benchmark_<commit>.json.")
+    parser.add_argument("--compare", default=None, help="Path to the JSON report of another commit.")
+    parser.add_argument("--keep-data", action="store_true",
+                        help="Don't empty the test collections and tables after the benchmark.")
+    args = parser.parse_args()
+    if (args.repeat <= 0):
+        sys.exit("ERROR. The number of runs should be greater than 0.")
+
+    synthetic_data = SyntheticData(args.users, args.days, args.posts, args.comments, args.seed)
+    usernames = synthetic_data.get_usernames()
+    days = synthetic_data.get_days()
+    date_ini, date_fin = days[0].strftime("%d-%m-%Y"), days[-1].strftime("%d-%m-%Y")
+    main_ops = MainOperations()
+    analyses = args.analyses
+    if (analyses == None):
+        analyses = [analysis for analysis in main_ops.data_analyzer_object.avalaible_analysis
+                    if analysis.startswith(MODE+"_")]
+    if (not all(analysis in main_ops.data_analyzer_object.avalaible_analysis for analysis in analyses)):
+        sys.exit("ERROR. Avalaible analyses: "+str(main_ops.data_analyzer_object.avalaible_analysis))
+
+    report = {**get_commit(), "created_at":datetime.now().isoformat(timespec="seconds"),
+              "python":platform.python_version(), "scale":synthetic_data.get_scale(),
+              "period":[date_ini, date_fin], "analyses":{}}
+    empty_test_data(main_ops, usernames)
+    try:
+        report["load"] = load_data(main_ops, synthetic_data)
+        print("Load of {} documents: {:.3f} s".format(report["load"]["documents"], report["load"]["seconds"]))
+        for analysis in analyses:
+            report["analyses"][analysis] = time_analysis(main_ops, analysis, usernames, date_ini, date_fin, args.repeat)
+            result = report["analyses"][analysis]
+            print("{:<40} first {:>10.3f} s  repeated {:>10} s  errors {}".format(analysis, result["first"],
+                  "-" if result["repeated"] == None else "{:.3f}".format(result["repeated"]), len(result["errors"])))
+    finally:
+        if (not args.keep_data):
+            empty_test_data(main_ops, usernames)
+
+    output = args.output if args.output != None else "load_benchmark_"+str(report["commit"])+".json"
+    with open(output, "w") as report_file:
+        json.dump(report, report_file, indent=2)
+    print("Report: "+output)
+    if (args.compare != None):
+        with open(args.compare, "r") as previous_file:
+            compare_reports(report, json.load(previous_file))
+
+if __name__ == "__main__":
+    main()
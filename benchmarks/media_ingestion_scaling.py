@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark which measures how the ingestion of the medias of a user, their titles
+and their comments scales with the number of medias:
+    - previous: the previous approach, which gets the id of the profile and inserts
+    each media, title and comment one by one, getting again all the comments of
+    the range of dates from the Mongo database for each media.
+    - bulk: MainOperations.insert_media_data, which gets the profiles, medias and
+    comments of the range of dates only once, indexes them by media and date and
+    inserts them in bulk.
+A synthetic user is stored in the test collections of the Mongo database and the
+test tables of the Postgres database, which are emptied before each execution.
+
+Usage: python3 benchmarks/media_ingestion_scaling.py --medias 10 100 1000
+
+It requires the env variables MONGODB_URI, POSTGRES_USER and POSTGRES_PSWD as
+the class MainOperations.
+
+@author: Lidia Sánchez Mérida
+"""
+import argparse
+import sys
+import time
+from datetime import datetime, timedelta
+sys.path.append("src")
+sys.path.append("src/data")
+
+from main_ops import MainOperations
+
+USERNAME = "benchmarkuser"
+SOCIAL_MEDIA = "instagram"
+ANALYSIS = "test_comment_sentiment"
+TEST_TABLES = ["testmediacomments", "testmediatitles", "testmedias", "testprofiles"]
+
+def load_data(main_ops, n_medias, n_days, n_comments):
+    """
+    Stores a synthetic user with a profile per day, n_medias medias per day and
+    n_comments comments per media.
+    """
+    mongodb = main_ops.mongodb_object
+    for collection in ["test_medias", "test_comments"]:
+        mongodb.set_collection(collection)
+        mongodb.connection.delete_many({"username":USERNAME})
+    for table in TEST_TABLES:
+        main_ops.postgresdb_object.empty_table(table)
+
+    first_day = datetime(2021, 1, 1)
+    for day in range(0, n_days):
+        date = first_day+timedelta(days=day)
+        main_ops.postgresdb_object.insert_data("insert_test_profile", [{"biography":"bio",
+            "birthday":"None", "date":date, "date_joined":"None", "gender":"None", "location":"None",
+            "n_followers":100, "n_followings":100, "n_medias":n_medias, "name":"name",
+            "profile_pic":"None", "social_media":SOCIAL_MEDIA, "userid":"0", "username":USERNAME}])
+        medias = [{"id_media":"media"+str(i), "like_count":i % 300, "comment_count":n_comments,
+                   "taken_at":"01-01-2021", "title":"great new car number "+str(i)} for i in range(0, n_medias)]
+        comments = [{"id_media":"media"+str(i), "texts":[{"user":"author"+str(j),
+                     "text":"amazing car "+str(i)+" "+str(j)} for j in range(0, n_comments)]}
+                    for i in range(0, n_medias)]
+        mongodb.set_collection("test_medias")
+        mongodb.connection.insert_one({"username":USERNAME, "social_media":SOCIAL_MEDIA,
+                                       "date":date, "medias":medias})
+        mongodb.set_collection("test_comments")
+        mongodb.connection.insert_one({"username":USERNAME, "social_media":SOCIAL_MEDIA,
+                                       "date":date, "comments":comments})
+    return first_day.strftime("%d-%m-%Y"), (first_day+timedelta(days=n_days-1)).strftime("%d-%m-%Y")
+
+def empty_media_tables(main_ops):
+    """
+    Deletes the medias, titles and comments inserted by the previous execution.
+    """
+    for table in TEST_TABLES[:-1]:
+        main_ops.postgresdb_object.empty_table(table)
+
+def previous_approach(main_ops, date_ini, date_fin):
+    """
+    Previous approach: one query per media, title and comment as well as one
+    Mongo query per media to get the comments of the whole range of dates.
+    """
+    postgresdb = main_ops.postgresdb_object
+    mongo_data = main_ops.get_data_from_mongodb(USERNAME, SOCIAL_MEDIA, "test_medias", [(date_ini, date_fin)])
+    for item in mongo_data:
+        for media in item["medias"]:
+            id_profile = main_ops.get_data_from_postgresdb("check_test_profile", [{"username":USERNAME,
+                "social_media":SOCIAL_MEDIA, "date":item["date"].strftime("%Y-%m-%d")}])["ids"][0]
+            media_to_insert = {"comment_count":media["comment_count"], "date":item["date"],
+                               "id_media":media["id_media"], "id_profile":id_profile,
+                               "like_count":media["like_count"], "uploaded_date":media["taken_at"]}
+            media_id = postgresdb.insert_data("insert_test_medias", [media_to_insert],
+                                              [{"id_media":media["id_media"], "date":item["date"]}])
+            title = main_ops.common_data_object.clean_texts([media["title"]])[0]
+            postgresdb.insert_data("insert_test_media_titles", [{"author":item["username"],
+                "date":item["date"], "id_media_aut":media_id[0], "original_text":media["title"],
+                "preprocessed_text":title}], [{"id_media_aut":media_id[0], "original_text":media["title"],
+                "author":item["username"]}])
+            comments_data = main_ops.get_data_from_mongodb(USERNAME, SOCIAL_MEDIA, "test_comments", [(date_ini, date_fin)])
+            for record in comments_data:
+                for comment_item in record["comments"]:
+                    comments = comment_item["texts"][:20]
+                    prep_texts = main_ops.common_data_object.clean_texts([comment["text"] for comment in comments])
+                    for comment, prep_text in zip(comments, prep_texts):
+                        postgresdb.insert_data("insert_test_media_comments", [{"author":comment["user"],
+                            "date":item["date"], "id_media_aut":media_id[0], "original_text":comment["text"],
+                            "preprocessed_text":prep_text}], [{"original_text":comment["text"],
+                            "author":comment["user"], "id_media_aut":media_id[0]}])
+
+def bulk_approach(main_ops, date_ini, date_fin):
+    """
+    New approach: MainOperations.insert_media_data.
+    """
+    main_ops.insert_media_data(USERNAME, ANALYSIS, SOCIAL_MEDIA, date_ini, date_fin)
+
+def main():
+    parser = argparse.ArgumentParser(description="Scaling of the media ingestion with the number of medias.")
+    parser.add_argument("--medias", type=int, nargs="+", default=[10, 50, 100],
+                        help="Number of medias per day.")
+    parser.add_argument("--days", type=int, default=3, help="Number of days of the range of dates.")
+    parser.add_argument("--comments", type=int, default=5, help="Number of comments per media.")
+    parser.add_argument("--skip-previous", action="store_true",
+                        help="Only measure the new approach, since the previous one is quadratic.")
+    args = parser.parse_args()
+
+    main_ops = MainOperations()
+    print("\n{:>10} {:>14} {:>12} {:>12} {:>10}".format("medias", "mongo docs", "previous s", "bulk s", "speedup"))
+    try:
+        for n_medias in args.medias:
+            date_ini, date_fin = load_data(main_ops, n_medias, args.days, args.comments)
+            previous_time = float("nan")
+            if (not args.skip_previous):
+                start = time.perf_counter()
+                previous_approach(main_ops, date_ini, date_fin)
+                previous_time = time.perf_counter()-start
+                previous_size = main_ops.postgresdb_object.get_table_size("testmediacomments")
+                empty_media_tables(main_ops)
+            start = time.perf_counter()
+            bulk_approach(main_ops, date_ini, date_fin)
+            bulk_time = time.perf_counter()-start
+            bulk_size = main_ops.postgresdb_object.get_table_size("testmediacomments")
+            # The previous approach attached every comment of the range to every media
+            if (bulk_size != n_medias*args.days*min(args.comments, 20)):
+                sys.exit("ERROR. Each media should only have its own comments.")
+            if (not args.skip_previous and previous_size < bulk_size):
+                sys.exit("ERROR. The previous approach should insert at least the same comments.")
+            print("{:>10} {:>14} {:>12.3f} {:>12.3f} {:>9.1f}x".format(n_medias*args.days, 2*args.days,
+                  previous_time, bulk_time, previous_time/bulk_time))
+    finally:
+        for collection in ["test_medias", "test_comments"]:
+            main_ops.mongodb_object.set_collection(collection)
+            main_ops.mongodb_object.connection.delete_many({"username":USERNAME})
+        for table in TEST_TABLES:
+            main_ops.postgresdb_object.empty_table(table)
+
+if __name__ == "__main__":
+    main()
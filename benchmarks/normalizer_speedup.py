@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Micro-benchmark which compares the previous cleaning of the translated texts,
+based on a list of stopwords and two regular expressions per text, with the
+TextNormalizer over a synthetic corpus of comments. The translation is not
+measured, only the normalization of the texts.
+
+Usage: python3 benchmarks/normalizer_speedup.py --comments 1000000
+
+@author: Lidia Sánchez Mérida
+"""
+import argparse
+import random
+import re
+import sys
+import time
+sys.path.append("src")
+sys.path.append("src/data")
+
+from text_normalizer import TextNormalizer
+
+STOPWORDS = ['a', 'an', 'the', 'and', 'or', 'i', 'you', 'he', 'she',
+             'it', 'we', 'they', 'my', 'your', 'his', 'her', 'its',
+             'ours', 'yours', 'them', 'me', 'us']
+# Tokens to build the synthetic comments
+WORDS = ["love", "this", "car", "amazing", "colour", "The", "I", "you", "and", "it",
+         "#motor", "@motorfan670", "2020", "$50.000", "top-class", "100%", "🔥", "🙌🏼",
+         "super_car", "A+", "\"wow\"", "me", "*****", "R&D", "new", "great", "road"]
+
+def legacy_clean(texts, stopwords):
+    """
+    Previous cleaning of the translated texts in CommonData.clean_texts.
+    """
+    cleaned_texts = []
+    for text in texts:
+        english_words = text.split()
+        non_stopwords = [word for word in english_words if word.lower() not in stopwords]
+        non_stopwords = ' '.join(non_stopwords)
+        non_numbers = re.sub(r"\d+", "", non_stopwords)
+        non_special_characters = re.sub(r'[#@\"\-"*$%&\+\_]', ' ', non_numbers)
+        cleaned_texts.append(non_special_characters)
+    return cleaned_texts
+
+def generate_comments(n_comments, seed=0):
+    """
+    Generates synthetic comments between 1 and 25 tokens.
+    """
+    rand = random.Random(seed)
+    return [" ".join(rand.choice(WORDS) for _ in range(0, rand.randint(1, 25)))
+            for i in range(0, n_comments)]
+
+def measure(function):
+    """
+    Runs a function and returns its result as well as the seconds it took.
+    """
+    start = time.perf_counter()
+    result = function()
+    return result, time.perf_counter()-start
+
+def main():
+    parser = argparse.ArgumentParser(description="Text normalization over synthetic comments.")
+    parser.add_argument("--comments", type=int, default=1000000, help="Number of comments to normalize.")
+    args = parser.parse_args()
+
+    comments = generate_comments(args.comments)
+    normalizer = TextNormalizer(STOPWORDS)
+    legacy_result, legacy_time = measure(lambda: legacy_clean(comments, STOPWORDS))
+    new_result, new_time = measure(lambda: list(normalizer.normalize_many(comments)))
+    if (legacy_result != new_result):
+        sys.exit("ERROR. The normalized texts differ from the previous cleaning.")
+
+    print("\n{:>16} {:>12} {:>16}".format("method", "seconds", "comments/sec"))
+    print("{:>16} {:>12.2f} {:>16.0f}".format("legacy", legacy_time, len(comments)/legacy_time))
+    print("{:>16} {:>12.2f} {:>16.0f}".format("TextNormalizer", new_time, len(comments)/new_time))
+    print("\nSpeedup: {:.2f}x".format(legacy_time/new_time))
+
+if __name__ == "__main__":
+    main()
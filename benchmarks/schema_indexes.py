@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark which measures the latency of the predefined check and get queries
+of the class PostgreDB before and after the migration which adds the unique
+constraints and covering indexes. The tables of schema.sql are created in a
+temporary schema of the database, filled with a synthetic dataset generated
+by the server and dropped at the end, so the real tables are not modified.
+
+Usage: python3 benchmarks/schema_indexes.py --profiles 200000 --medias 1000000 --comments 4000000
+
+It requires the env variables POSTGRES_USER and POSTGRES_PSWD as the class PostgreDB.
+
+@author: Lidia Sánchez Mérida
+"""
+import argparse
+import os
+import random
+import statistics
+import time
+import psycopg2
+
+BENCHMARK_SCHEMA = "benchmark_indexes"
+MIGRATION = "migrations/001_unique_constraints_and_indexes.sql"
+
+# Queries to measure as they're defined in PostgreDB and the function which
+# builds the values of each execution
+QUERIES = {
+    "check_profile":("SELECT id_profile FROM profiles WHERE username=%s AND social_media=%s AND date=%s",
+        lambda rand, args: ("user"+str(rand.randrange(args.users)), "instagram", day(rand, args))),
+    "get_profiles":("SELECT date, n_medias, n_followers, n_followings FROM profiles WHERE "+
+        "username=%s AND social_media=%s AND date>=%s AND date<=%s",
+        lambda rand, args: ("user"+str(rand.randrange(args.users)), "instagram", "2021-01-01", "2021-03-31")),
+    "check_media":("SELECT id_media_aut FROM medias WHERE id_media=%s AND date=%s",
+        lambda rand, args: ("media"+str(rand.randrange(args.medias)), day(rand, args))),
+    "get_medias":("SELECT date, like_count, comment_count FROM medias "+
+        "WHERE type='common' AND date>=%s AND date<=%s AND id_profile IN "+
+        "(SELECT id_profile FROM profiles WHERE username=%s AND social_media=%s)",
+        lambda rand, args: ("2021-01-01", "2021-03-31", "user"+str(rand.randrange(args.users)), "instagram")),
+    "check_media_comment":("SELECT id_text FROM mediacomments WHERE type='comment' AND original_text=%s "+
+        "AND author=%s AND id_media_aut=%s",
+        lambda rand, args: comment(rand.randrange(args.comments), args)),
+    "get_comment_sentiment":("SELECT sentiment FROM commentsentiments WHERE original_text=%s",
+        lambda rand, args: (comment(rand.randrange(args.comments), args)[0],)),
+    "profile_evolution":("SELECT time, mean_followers, mean_followings, mean_medias FROM "+
+        "profilesevolution WHERE date_ini=%s AND date_fin=%s AND id_user=%s",
+        lambda rand, args: ("2021-01-01", "2021-03-31", "user"+str(rand.randrange(args.users))+"_instagram")),
+}
+
+def day(rand, args):
+    """
+    Gets a random day of the synthetic dataset.
+    """
+    return "2021-01-01" if args.days == 1 else "2021-01-%02d" % (1+rand.randrange(min(args.days, 31)))
+
+def comment(i, args):
+    """
+    Gets the values of the i-th synthetic comment as they're generated by the server.
+    """
+    return ("synthetic comment number "+str(i)+" about a great car", "author"+str(i % 5000), 1+i % args.medias)
+
+def load_schema(cursor):
+    """
+    Creates the tables of schema.sql in the temporary schema.
+    """
+    cursor.execute("DROP SCHEMA IF EXISTS "+BENCHMARK_SCHEMA+" CASCADE")
+    cursor.execute("CREATE SCHEMA "+BENCHMARK_SCHEMA)
+    cursor.execute("SET search_path TO "+BENCHMARK_SCHEMA)
+    with open("schema.sql") as schema_file:
+        schema = schema_file.read().split("-- Unique constraints and covering indexes")[0]
+    for statement in schema.replace("public.", "").split(";"):
+        lines = [line for line in statement.split("\n") if not line.startswith("--")]
+        statement = "\n".join(lines).strip()
+        # Skip the owners and the duplicated tables of the schema
+        if (statement == "" or "OWNER TO" in statement):
+            continue
+        cursor.execute("SAVEPOINT statement")
+        try:
+            cursor.execute(statement)
+        except psycopg2.errors.DuplicateTable:
+            cursor.execute("ROLLBACK TO SAVEPOINT statement")
+
+def load_data(cursor, args):
+    """
+    Fills the tables with a synthetic dataset generated by the server.
+    """
+    cursor.execute("INSERT INTO profiles (social_media, date, userid, username, name, biography, gender, "+
+        "profile_pic, location, birthday, date_joined, n_followers, n_followings, n_medias) "+
+        "SELECT 'instagram', DATE '2021-01-01' + (i / %s), i %% %s, 'user' || (i %% %s), 'name', 'bio', 'None', "+
+        "'None', 'None', 'None', 'None', i %% 1000, i %% 500, i %% 100 FROM generate_series(0, %s-1) AS i",
+        (args.users, args.users, args.users, args.profiles))
+    cursor.execute("INSERT INTO medias (id_profile, uploaded_date, id_media, like_count, comment_count, date, type) "+
+        "SELECT 1 + i %% %s, '01-01-2021', 'media' || (i %% %s), i %% 300, i %% 40, "+
+        "DATE '2021-01-01' + (i / %s), 'common' FROM generate_series(0, %s-1) AS i",
+        (args.profiles, args.medias, args.medias, args.medias*args.days))
+    cursor.execute("INSERT INTO mediacomments (id_media_aut, date, original_text, preprocessed_text, author, type) "+
+        "SELECT 1 + i %% %s, DATE '2021-01-01', 'synthetic comment number ' || i || ' about a great car', "+
+        "'synthetic comment number about great car', 'author' || (i %% 5000), 'comment' "+
+        "FROM generate_series(0, %s-1) AS i", (args.medias, args.comments))
+    cursor.execute("INSERT INTO commentsentiments (original_text, sentiment, degree) "+
+        "SELECT 'synthetic comment number ' || i || ' about a great car', 'pos', 0.9 "+
+        "FROM generate_series(0, %s-1) AS i", (args.comments,))
+    cursor.execute("INSERT INTO profilesevolution (id_user, date_ini, date_fin, time, mean_followers, "+
+        "mean_followings, mean_medias) SELECT 'user' || (i %% %s) || '_instagram', DATE '2021-01-01', "+
+        "DATE '2021-03-31', 'week' || (i / %s), 1, 1, 1 FROM generate_series(0, %s-1) AS i",
+        (args.users, args.users, args.users*13))
+    cursor.execute("ANALYZE")
+
+def measure(cursor, args):
+    """
+    Runs each query several times with random values.
+
+    Returns
+    -------
+    A dict whose keys are the queries and whose values are the median and p95
+    latencies in milliseconds.
+    """
+    rand = random.Random(0)
+    latencies = {}
+    for name, (query, get_values) in QUERIES.items():
+        times = []
+        for i in range(0, args.repeat):
+            values = get_values(rand, args)
+            start = time.perf_counter()
+            cursor.execute(query, values)
+            cursor.fetchall()
+            times.append((time.perf_counter()-start)*1000)
+        times.sort()
+        latencies[name] = (statistics.median(times), times[int(len(times)*0.95)-1])
+    return latencies
+
+def main():
+    parser = argparse.ArgumentParser(description="Latency of the PostgreDB queries before and after the indexes.")
+    parser.add_argument("--users", type=int, default=2000, help="Number of different users.")
+    parser.add_argument("--profiles", type=int, default=200000, help="Number of profiles.")
+    parser.add_argument("--medias", type=int, default=200000, help="Number of different medias.")
+    parser.add_argument("--days", type=int, default=5, help="Number of days in which the medias were downloaded.")
+    parser.add_argument("--comments", type=int, default=4000000, help="Number of comments and sentiments.")
+    parser.add_argument("--repeat", type=int, default=50, help="Executions of each query.")
+    args = parser.parse_args()
+
+    connection = psycopg2.connect(host="localhost", user=os.environ.get("POSTGRES_USER"),
+                                  password=os.environ.get("POSTGRES_PSWD"), database="socialnetworksdb")
+    cursor = connection.cursor()
+    try:
+        load_schema(cursor)
+        start = time.perf_counter()
+        load_data(cursor, args)
+        print("Synthetic dataset loaded in {:.1f} seconds.".format(time.perf_counter()-start))
+        before = measure(cursor, args)
+
+        # The real tables of the migration do not exist in the temporary schema
+        with open(MIGRATION) as migration_file:
+            migration = migration_file.read().split("TEST ANALYSIS")[0].replace("BEGIN;", "")
+        start = time.perf_counter()
+        cursor.execute(migration)
+        cursor.execute("ANALYZE")
+        print("Migration applied in {:.1f} seconds.".format(time.perf_counter()-start))
+        after = measure(cursor, args)
+
+        print("\n{:>24} {:>14} {:>14} {:>14} {:>14}".format("query", "before p50 ms", "before p95 ms",
+                                                           "after p50 ms", "after p95 ms"))
+        for name in QUERIES:
+            print("{:>24} {:>14.3f} {:>14.3f} {:>14.3f} {:>14.3f}".format(name, *before[name], *after[name]))
+    finally:
+        connection.rollback()
+        cursor.execute("DROP SCHEMA IF EXISTS "+BENCHMARK_SCHEMA+" CASCADE")
+        connection.commit()
+        connection.close()
+
+if __name__ == "__main__":
+    main()
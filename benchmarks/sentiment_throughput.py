@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark which measures the throughput of the sentiment analysis on CPU, in
+texts per second, depending on the size of the mini-batches. The batch size 1
+is the same as classifying the texts one by one.
+
+Usage: python3 benchmarks/sentiment_throughput.py --texts 2000 --batch-sizes 1 8 32 64
+
+@author: Lidia Sánchez Mérida
+"""
+import argparse
+import random
+import sys
+import time
+sys.path.append("src")
+sys.path.append("src/data")
+
+import flair
+import torch
+from data_analyzer import DataAnalyzer
+
+# Words to build the synthetic comments
+WORDS = ["love", "this", "car", "amazing", "colour", "hate", "price", "blue", "white",
+         "black", "road", "machine", "awesome", "bad", "model", "old", "new", "great",
+         "perfection", "thanks", "instagram", "really", "never", "always", "buy"]
+
+def generate_texts(n_texts, seed=0):
+    """
+    Generates synthetic comments of different lengths as the tuples which the
+    sentiment analysis requires: (id, preprocessed text, original text).
+    """
+    rand = random.Random(seed)
+    texts = []
+    for i in range(0, n_texts):
+        text = " ".join(rand.choice(WORDS) for _ in range(0, rand.randint(1, 40)))
+        texts.append((str(i), text, text))
+    return texts
+
+def main():
+    parser = argparse.ArgumentParser(description="Sentiment analysis throughput on CPU.")
+    parser.add_argument("--texts", type=int, default=2000, help="Number of texts to classify.")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 8, 16, 32, 64, 128],
+                        help="Mini-batch sizes to measure.")
+    args = parser.parse_args()
+
+    # Force the CPU to make the results comparable between machines
+    flair.device = torch.device("cpu")
+    analyzer = DataAnalyzer()
+    print("Loading models:", analyzer.sentiment_models.warm_up())
+    texts = generate_texts(args.texts)
+    # Warm-up run to not measure the first allocations
+    analyzer.sentiment_analysis_text("benchmark", texts[:64])
+
+    print("\n{:>10} {:>12} {:>12}".format("batch_size", "seconds", "texts/sec"))
+    for batch_size in args.batch_sizes:
+        start = time.perf_counter()
+        analyzer.sentiment_analysis_text("benchmark", texts, batch_size=batch_size)
+        elapsed = time.perf_counter()-start
+        print("{:>10} {:>12.2f} {:>12.1f}".format(batch_size, elapsed, len(texts)/elapsed))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Generator of synthetic user data with the same format as the data downloaded
+by the class Api, so they can be preprocessed and stored by the real methods of
+CommonData and MainOperations:
+    - Each user has a profile per day whose number of followers, followings and
+    medias evolve over time.
+    - Each user uploads new medias some days. The data of each day have the most
+    recent medias, whose likes and comments grow during the days after they've
+    been uploaded.
+    - The comments are short English texts with positive, negative or neutral
+    words, written by a community of authors per user, so some authors comment
+    several medias and days as the likers and haters of the user behaviours.
+The generated data only depend on the seed and the scale, so two executions
+with the same arguments analyze the same data.
+
+Usage: python3 benchmarks/synthetic_data.py --users 2 --days 7 --posts 10 --comments 20
+
+@author: Lidia Sánchez Mérida
+"""
+import argparse
+import json
+import random
+from datetime import datetime, timedelta
+
+FIRST_DAY = datetime(2021, 1, 1)
+USERNAME_PREFIX = "synthetic_user_"
+POSITIVE_WORDS = ["amazing", "great", "beautiful", "awesome", "perfect", "wonderful", "nice", "lovely"]
+NEGATIVE_WORDS = ["awful", "boring", "terrible", "ugly", "horrible", "sad", "bad", "disappointing"]
+NEUTRAL_WORDS = ["new", "usual", "big", "small", "same", "other", "second", "last"]
+TOPICS = ["photo", "car", "trip", "dinner", "city", "beach", "weekend", "concert"]
+TEMPLATES = ["what a {word} {topic}", "this {topic} is {word}", "{word} {topic} as always",
+             "the {topic} looks {word} today", "another {word} {topic}"]
+
+class SyntheticData:
+
+    def __init__(self, n_users=2, n_days=7, n_posts=10, n_comments=20, seed=0, first_day=FIRST_DAY):
+        """
+        Creates a SyntheticData object whose attributes are:
+            - The number of users, days, medias per day and comments per media.
+            - The seed of the random generator.
+            - The first day of the generated data.
+
+        Parameters
+        ----------
+        n_users : int, optional
+            It's the number of users. The default is 2.
+        n_days : int, optional
+            It's the number of days of data of each user. The default is 7.
+        n_posts : int, optional
+            It's the number of the most recent medias of each day. The default is 10.
+        n_comments : int, optional
+            It's the number of comments that each media reaches. The default is 20.
+        seed : int, optional
+            It's the seed of the random generator. The default is 0.
+        first_day : datetime, optional
+            It's the first day of the data. The default is the 1st of January of 2021.
+
+        Raises
+        ------
+        ValueError
+            If the scale is not made of positive integers.
+
+        Returns
+        -------
+        A SyntheticData object.
+        """
+        for value in [n_users, n_days, n_posts, n_comments]:
+            if (type(value) != int or value <= 0):
+                raise ValueError("ERROR. The scale should be made of integers greater than 0.")
+        self.n_users = n_users
+        self.n_days = n_days
+        self.n_posts = n_posts
+        self.n_comments = n_comments
+        self.seed = seed
+        self.first_day = first_day
+
+    def get_scale(self):
+        """
+        Gets the scale of the data as a dict.
+        """
+        return {"users":self.n_users, "days":self.n_days, "posts":self.n_posts,
+                "comments":self.n_comments, "seed":self.seed}
+
+    def get_usernames(self):
+        """
+        Gets the usernames of the synthetic users.
+        """
+        return [USERNAME_PREFIX+str(user).zfill(4) for user in range(0, self.n_users)]
+
+    def get_days(self):
+        """
+        Gets the days of the data.
+        """
+        return [self.first_day+timedelta(days=day) for day in range(0, self.n_days)]
+
+    def get_text(self, generator, sentiment):
+        """
+        Generates a comment or a title with the provided sentiment.
+        """
+        words = {"positive":POSITIVE_WORDS, "negative":NEGATIVE_WORDS, "neutral":NEUTRAL_WORDS}[sentiment]
+        return generator.choice(TEMPLATES).format(word=generator.choice(words),
+                                                  topic=generator.choice(TOPICS))
+
+    def generate_user(self, user):
+        """
+        Generates the data of a user for every day.
+
+        Parameters
+        ----------
+        user : int
+            It's the number of the user, from 0 to the number of users.
+
+        Returns
+        -------
+        A generator of dicts, one per day, whose keys are the date and the user data with
+        the format of the class Api: the profile, the most recent medias and the
+        comments of each media.
+        """
+        # Each user has their own generator, so they don't depend on the number of users
+        generator = random.Random(self.seed*1000003+user)
+        userid = 1000000+user
+        username = self.get_usernames()[user]
+        # The community of authors, a few of which are likers and haters
+        authors = ["fan_"+str(user)+"_"+str(author) for author in range(0, max(5, self.n_comments))]
+        moods = {author:generator.choice(["positive", "positive", "negative", "neutral"]) for author in authors}
+        n_followers = generator.randint(100, 100000)
+        n_followings = generator.randint(50, 1000)
+        biography = self.get_text(generator, "neutral")
+        # The user has already uploaded the most recent medias of the first day
+        medias = []
+        for day_number in range(-self.n_posts, self.n_days):
+            day = self.first_day+timedelta(days=day_number)
+            # New medias are uploaded some days and always the first day of the period
+            n_new = generator.choice([0, 1, 1, 2]) if day_number != -self.n_posts else self.n_posts
+            for _ in range(0, n_new):
+                sentiment = generator.choice(["positive", "neutral", "negative"])
+                medias.insert(0, {"pk":str(len(medias)+1), "taken_at":day.strftime("%d-%m-%Y"),
+                                  "title":self.get_text(generator, sentiment), "like_count":0,
+                                  "comments":[], "popularity":generator.uniform(0.5, 1.5)})
+            # The likes and comments grow during the days after the medias are uploaded
+            for media in medias[:self.n_posts]:
+                media["like_count"] += int(n_followers*0.01*media["popularity"]*generator.uniform(0.5, 1.5))
+                for _ in range(0, min(generator.randint(0, self.n_comments//2+1),
+                                      self.n_comments-len(media["comments"]))):
+                    author = generator.choice(authors)
+                    media["comments"].append({"user":author, "text":self.get_text(generator, moods[author])})
+            n_followers = max(0, n_followers+int(n_followers*generator.uniform(-0.01, 0.02)))
+            n_followings = max(0, n_followings+generator.randint(-2, 3))
+            if (day_number < 0):
+                continue
+            recent_medias = medias[:self.n_posts]
+            profile = {"userid":userid, "username":username, "name":"Synthetic user "+str(user),
+                       "biography":biography, "gender":None,
+                       "profile_pic":None, "location":None, "birthday":None, "date_joined":None,
+                       "n_followers":n_followers, "n_followings":n_followings, "n_medias":len(medias)}
+            media_list = [{"id_media":media["pk"]+"_"+str(userid), "taken_at":media["taken_at"],
+                           "title":media["title"], "like_count":media["like_count"],
+                           "comment_count":len(media["comments"])} for media in recent_medias]
+            comments = [{"id_media":media["pk"]+"_"+str(userid), "texts":list(media["comments"])}
+                        for media in recent_medias]
+            yield {"date":day, "user_data":{"profile":profile, "medias":media_list, "comments":comments}}
+
+    def generate(self):
+        """
+        Generates the data of every user and day.
+
+        Returns
+        -------
+        A generator of lists with the data of every user for each day, sorted by
+        day, as the data downloaded every day by the task server.
+        """
+        users = [self.generate_user(user) for user in range(0, self.n_users)]
+        for _ in range(0, self.n_days):
+            yield [next(user) for user in users]
+
+def main():
+    parser = argparse.ArgumentParser(description="Generator of synthetic user data.")
+    parser.add_argument("--users", type=int, default=2, help="Number of users.")
+    parser.add_argument("--days", type=int, default=7, help="Number of days.")
+    parser.add_argument("--posts", type=int, default=10, help="Number of recent medias per day.")
+    parser.add_argument("--comments", type=int, default=20, help="Number of comments per media.")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the random generator.")
+    args = parser.parse_args()
+
+    generator = SyntheticData(args.users, args.days, args.posts, args.comments, args.seed)
+    # Print the data of each user and day as JSON Lines
+    for day_data in generator.generate():
+        for item in day_data:
+            print(json.dumps({"date":item["date"].strftime("%d-%m-%Y"), "user_data":item["user_data"]}))
+
+if __name__ == "__main__":
+    main()
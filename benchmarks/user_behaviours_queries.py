@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark which measures the end-to-end latency of the UserBehaviours analysis
+depending on how the sentiments of the comments are recovered:
+    - loop: the previous approach, which gets the comments and then makes one
+    query per comment to get its sentiment.
+    - join: a single query which joins the comments with their sentiments and
+    is streamed from a server-side cursor.
+Both approaches get the comments of a user from a temporary schema with the
+indexes of the migrations and count the likers and haters with DataAnalyzer.
+
+Usage: python3 benchmarks/user_behaviours_queries.py --comments 1000 10000 100000
+
+It requires the env variables POSTGRES_USER and POSTGRES_PSWD as the class PostgreDB.
+
+@author: Lidia Sánchez Mérida
+"""
+import argparse
+import os
+import sys
+import time
+import uuid
+sys.path.append("src")
+sys.path.append("src/data")
+
+import psycopg2
+from data_analyzer import DataAnalyzer
+from schema_indexes import BENCHMARK_SCHEMA, MIGRATION, load_schema
+
+GET_COMMENTS = ("SELECT date, author, original_text FROM mediacomments WHERE type='comment' "+
+    "AND date>=%s AND date<=%s AND id_media_aut IN "+
+    "(SELECT id_media_aut FROM medias WHERE type='common' AND date>=%s AND date<=%s AND id_profile IN "+
+    "(SELECT id_profile FROM profiles WHERE username=%s AND social_media=%s))")
+GET_SENTIMENT = "SELECT sentiment FROM commentsentiments WHERE original_text=%s"
+GET_COMMENTS_AND_SENTIMENTS = ("SELECT c.date, c.author, s.sentiment FROM mediacomments c JOIN LATERAL "+
+    "(SELECT sentiment FROM commentsentiments WHERE original_text=c.original_text LIMIT 1) s ON TRUE "+
+    "WHERE c.type='comment' AND c.date>=%s AND c.date<=%s AND c.id_media_aut IN "+
+    "(SELECT id_media_aut FROM medias WHERE type='common' AND date>=%s AND date<=%s AND id_profile IN "+
+    "(SELECT id_profile FROM profiles WHERE username=%s AND social_media=%s))")
+VALUES = ("2021-01-01", "2021-03-31", "2021-01-01", "2021-03-31", "user0", "instagram")
+
+def load_data(cursor, n_comments):
+    """
+    Fills the tables with the comments of a single user written in 90 days on
+    100 medias. Each comment has its sentiment.
+    """
+    cursor.execute("TRUNCATE profiles, medias, mediacomments, commentsentiments RESTART IDENTITY CASCADE")
+    cursor.execute("INSERT INTO profiles (social_media, date, userid, username, name, biography, gender, "+
+        "profile_pic, location, birthday, date_joined, n_followers, n_followings, n_medias) "+
+        "VALUES ('instagram', '2021-01-01', '0', 'user0', 'name', 'bio', 'None', 'None', 'None', "+
+        "'None', 'None', '100', '100', '100')")
+    cursor.execute("INSERT INTO medias (id_profile, uploaded_date, id_media, like_count, comment_count, date, type) "+
+        "SELECT 1, '01-01-2021', 'media' || i, '10', '10', DATE '2021-01-01', 'common' FROM generate_series(0, 99) AS i")
+    cursor.execute("INSERT INTO mediacomments (id_media_aut, date, original_text, preprocessed_text, author, type) "+
+        "SELECT 1 + i %% 100, DATE '2021-01-01' + (i %% 90), 'comment ' || i, 'comment', 'author' || (i %% 500), "+
+        "'comment' FROM generate_series(0, %s-1) AS i", (n_comments,))
+    cursor.execute("INSERT INTO commentsentiments (original_text, sentiment, degree) "+
+        "SELECT 'comment ' || i, (ARRAY['pos', 'neu', 'neg'])[1 + i %% 3], 0.9 FROM generate_series(0, %s-1) AS i",
+        (n_comments,))
+    cursor.execute("ANALYZE")
+
+def loop_approach(connection, analyzer):
+    """
+    Previous approach: one query to get the comments and one more per comment.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(GET_COMMENTS, VALUES)
+        comments = cursor.fetchall()
+        data_to_analyze = []
+        for comment in comments:
+            cursor.execute(GET_SENTIMENT, (comment[2],))
+            sentiment = cursor.fetchall()
+            if (len(sentiment) > 0):
+                data_to_analyze.append({"date":comment[0].strftime("%d-%m-%Y"), "author":comment[1],
+                                        "sentiment":sentiment[0][0]})
+    return analyzer.user_behaviours("user0", data_to_analyze)
+
+def join_approach(connection, analyzer):
+    """
+    New approach: a single query streamed from a server-side cursor.
+    """
+    with connection.cursor(name="stream_"+uuid.uuid4().hex) as cursor:
+        cursor.itersize = 2000
+        cursor.execute(GET_COMMENTS_AND_SENTIMENTS, VALUES)
+        comments = ({"date":comment[0].strftime("%d-%m-%Y"), "author":comment[1],
+                     "sentiment":comment[2]} for comment in cursor)
+        return analyzer.user_behaviours("user0", comments)
+
+def main():
+    parser = argparse.ArgumentParser(description="End-to-end latency of the UserBehaviours analysis.")
+    parser.add_argument("--comments", type=int, nargs="+", default=[1000, 10000, 100000],
+                        help="Number of comments of the studied user.")
+    args = parser.parse_args()
+
+    connection = psycopg2.connect(host="localhost", user=os.environ.get("POSTGRES_USER"),
+                                  password=os.environ.get("POSTGRES_PSWD"), database="socialnetworksdb")
+    analyzer = DataAnalyzer()
+    cursor = connection.cursor()
+    try:
+        load_schema(cursor)
+        with open(MIGRATION) as migration_file:
+            cursor.execute(migration_file.read().split("TEST ANALYSIS")[0].replace("BEGIN;", ""))
+
+        print("\n{:>10} {:>12} {:>12} {:>10}".format("comments", "loop sec", "join sec", "speedup"))
+        for n_comments in args.comments:
+            load_data(cursor, n_comments)
+            start = time.perf_counter()
+            loop_results = loop_approach(connection, analyzer)
+            loop_time = time.perf_counter()-start
+            start = time.perf_counter()
+            join_results = join_approach(connection, analyzer)
+            join_time = time.perf_counter()-start
+            if (loop_results != join_results):
+                sys.exit("ERROR. Both approaches should get the same analysis results.")
+            print("{:>10} {:>12.3f} {:>12.3f} {:>9.1f}x".format(n_comments, loop_time, join_time, loop_time/join_time))
+    finally:
+        connection.rollback()
+        cursor.execute("DROP SCHEMA IF EXISTS "+BENCHMARK_SCHEMA+" CASCADE")
+        connection.commit()
+        connection.close()
+
+if __name__ == "__main__":
+    main()
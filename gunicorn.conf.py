@@ -0,0 +1,20 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Gunicorn settings to deploy the platform. Each worker will load the sentiment
+analysis models when it boots in order to not load them during the first request.
+
+@author: Lidia Sánchez Mérida
+"""
+import sys
+sys.path.append("src/data")
+sys.path.append("data")
+
+def post_worker_init(worker):
+    """
+    Loads the sentiment analysis models of the shared registry once the worker
+    has been initialized and logs how long it took and the memory they require.
+    """
+    from sentiment_models import warm_up
+    stats = warm_up()
+    worker.log.info("Sentiment models loaded: %s", stats)
@@ -0,0 +1,170 @@
+--
+-- Migration 001. Unique constraints and covering indexes for the lookups of the
+-- predefined queries of the class PostgreDB. Before this migration every check
+-- and get query was a sequential scan and the duplicated records were only
+-- avoided by the check queries. The unique indexes allow to skip the existing
+-- records with INSERT ... ON CONFLICT DO NOTHING, so the duplicated rows which
+-- could already be in the tables are removed first, keeping the oldest one.
+-- The statements are idempotent, so the migration could be run more than once.
+--
+-- Usage: psql --dbname=socialnetworksdb --file=migrations/001_unique_constraints_and_indexes.sql
+--
+BEGIN;
+
+------------------------------- REAL ANALYSIS -------------------------------
+--
+-- Profiles: check_profile, get_profiles and get_nmedias_profiles.
+--
+DELETE FROM profiles a USING profiles b WHERE a.id_profile > b.id_profile AND a.username = b.username AND a.social_media = b.social_media AND a.date = b.date;
+CREATE UNIQUE INDEX IF NOT EXISTS profiles_unique_idx ON profiles (username, social_media, date) INCLUDE (id_profile, n_medias, n_followers, n_followings);
+
+--
+-- ProfilesEvolution: check_profile_evolution and profile_evolution.
+--
+DELETE FROM profilesevolution a USING profilesevolution b WHERE a.id_profile_evolution > b.id_profile_evolution AND a.id_user = b.id_user AND a.date_ini = b.date_ini AND a.date_fin = b.date_fin AND a.time = b.time;
+CREATE UNIQUE INDEX IF NOT EXISTS profilesevolution_unique_idx ON profilesevolution (id_user, date_ini, date_fin, time) INCLUDE (mean_followers, mean_followings, mean_medias);
+
+--
+-- ProfilesActivity: check_profile_activity and profile_activity.
+--
+DELETE FROM profilesactivity a USING profilesactivity b WHERE a.id_profile_activity > b.id_profile_activity AND a.id_user = b.id_user AND a.date_ini = b.date_ini AND a.date_fin = b.date_fin AND a.time = b.time;
+CREATE UNIQUE INDEX IF NOT EXISTS profilesactivity_unique_idx ON profilesactivity (id_user, date_ini, date_fin, time) INCLUDE (mean_medias);
+
+--
+-- Medias: check_media.
+--
+DELETE FROM medias a USING medias b WHERE a.id_media_aut > b.id_media_aut AND a.id_media = b.id_media AND a.date = b.date;
+CREATE UNIQUE INDEX IF NOT EXISTS medias_unique_idx ON medias (id_media, date) INCLUDE (id_media_aut);
+CREATE INDEX IF NOT EXISTS medias_profile_date_idx ON medias (id_profile, date) INCLUDE (id_media, like_count, comment_count) WHERE type = 'common';
+
+--
+-- MediasEvolution: check_media_evolution and media_evolution.
+--
+DELETE FROM mediasevolution a USING mediasevolution b WHERE a.id_media_evolution > b.id_media_evolution AND a.id_user = b.id_user AND a.date_ini = b.date_ini AND a.date_fin = b.date_fin AND a.time = b.time;
+CREATE UNIQUE INDEX IF NOT EXISTS mediasevolution_unique_idx ON mediasevolution (id_user, date_ini, date_fin, time) INCLUDE (mean_likes, mean_comments);
+
+--
+-- MediasPopularity: check_media_popularity and media_popularity.
+--
+DELETE FROM mediaspopularity a USING mediaspopularity b WHERE a.id_media_popularity > b.id_media_popularity AND a.id_user = b.id_user AND a.date_ini = b.date_ini AND a.date_fin = b.date_fin AND a.id_media = b.id_media;
+CREATE UNIQUE INDEX IF NOT EXISTS mediaspopularity_unique_idx ON mediaspopularity (id_user, date_ini, date_fin, id_media) INCLUDE (mean_likes, mean_comments);
+
+--
+-- TextSentiments: check_sentiment_analysis and the sentiment analysis results.
+--
+DELETE FROM textsentiments a USING textsentiments b WHERE a.id_text_sentiment > b.id_text_sentiment AND a.id_user = b.id_user AND a.date_ini = b.date_ini AND a.date_fin = b.date_fin AND a.type = b.type;
+CREATE UNIQUE INDEX IF NOT EXISTS textsentiments_unique_idx ON textsentiments (id_user, date_ini, date_fin, type) INCLUDE (n_pos, n_neu, n_neg, pos_degree, neu_degree, neg_degree);
+
+--
+-- UserBehaviours: check_user_behaviour and user_behaviours.
+--
+DELETE FROM userbehaviours a USING userbehaviours b WHERE a.id_user_behaviour > b.id_user_behaviour AND a.id_user = b.id_user AND a.date_ini = b.date_ini AND a.date_fin = b.date_fin AND a.time = b.time;
+CREATE UNIQUE INDEX IF NOT EXISTS userbehaviours_unique_idx ON userbehaviours (id_user, date_ini, date_fin, time) INCLUDE (n_likers, n_haters);
+
+--
+-- MediaComments: check_media_comment and get_media_comments. The texts could be
+-- too long for a B-tree index, so the md5 hash of the original text is indexed.
+--
+DELETE FROM ONLY mediacomments a USING ONLY mediacomments b WHERE a.id_text > b.id_text AND a.id_media_aut = b.id_media_aut
+    AND a.author = b.author AND md5(a.original_text) = md5(b.original_text);
+CREATE UNIQUE INDEX IF NOT EXISTS mediacomments_unique_idx ON mediacomments (id_media_aut, author, md5(original_text));
+CREATE INDEX IF NOT EXISTS mediacomments_media_date_idx ON mediacomments (id_media_aut, date) INCLUDE (id_text, author);
+
+--
+-- MediaTitles: check_media_title and get_media_titles. The texts could be
+-- too long for a B-tree index, so the md5 hash of the original text is indexed.
+--
+DELETE FROM ONLY mediatitles a USING ONLY mediatitles b WHERE a.id_text > b.id_text AND a.id_media_aut = b.id_media_aut
+    AND a.author = b.author AND md5(a.original_text) = md5(b.original_text);
+CREATE UNIQUE INDEX IF NOT EXISTS mediatitles_unique_idx ON mediatitles (id_media_aut, author, md5(original_text));
+CREATE INDEX IF NOT EXISTS mediatitles_media_date_idx ON mediatitles (id_media_aut, date) INCLUDE (id_text, author);
+
+--
+-- CommentSentiments: check_comment_sentiment and get_comment_sentiment. The unique
+-- index on the md5 hash avoids duplicated texts, whereas the hash index answers
+-- the equality lookups on the original text.
+--
+DELETE FROM commentsentiments a USING commentsentiments b WHERE a.id_comment_sentiment > b.id_comment_sentiment
+    AND md5(a.original_text) = md5(b.original_text);
+CREATE UNIQUE INDEX IF NOT EXISTS commentsentiments_unique_idx ON commentsentiments (md5(original_text));
+CREATE INDEX IF NOT EXISTS commentsentiments_text_hash_idx ON commentsentiments USING HASH (original_text);
+
+------------------------------- TEST ANALYSIS -------------------------------
+--
+-- TestProfiles: check_profile, get_profiles and get_nmedias_profiles.
+--
+DELETE FROM testprofiles a USING testprofiles b WHERE a.id_profile > b.id_profile AND a.username = b.username AND a.social_media = b.social_media AND a.date = b.date;
+CREATE UNIQUE INDEX IF NOT EXISTS testprofiles_unique_idx ON testprofiles (username, social_media, date) INCLUDE (id_profile, n_medias, n_followers, n_followings);
+
+--
+-- TestProfilesEvolution: check_profile_evolution and profile_evolution.
+--
+DELETE FROM testprofilesevolution a USING testprofilesevolution b WHERE a.id_profile_evolution > b.id_profile_evolution AND a.id_user = b.id_user AND a.date_ini = b.date_ini AND a.date_fin = b.date_fin AND a.time = b.time;
+CREATE UNIQUE INDEX IF NOT EXISTS testprofilesevolution_unique_idx ON testprofilesevolution (id_user, date_ini, date_fin, time) INCLUDE (mean_followers, mean_followings, mean_medias);
+
+--
+-- TestProfilesActivity: check_profile_activity and profile_activity.
+--
+DELETE FROM testprofilesactivity a USING testprofilesactivity b WHERE a.id_profile_activity > b.id_profile_activity AND a.id_user = b.id_user AND a.date_ini = b.date_ini AND a.date_fin = b.date_fin AND a.time = b.time;
+CREATE UNIQUE INDEX IF NOT EXISTS testprofilesactivity_unique_idx ON testprofilesactivity (id_user, date_ini, date_fin, time) INCLUDE (mean_medias);
+
+--
+-- TestMedias: check_media.
+--
+DELETE FROM testmedias a USING testmedias b WHERE a.id_media_aut > b.id_media_aut AND a.id_media = b.id_media AND a.date = b.date;
+CREATE UNIQUE INDEX IF NOT EXISTS testmedias_unique_idx ON testmedias (id_media, date) INCLUDE (id_media_aut);
+CREATE INDEX IF NOT EXISTS testmedias_profile_date_idx ON testmedias (id_profile, date) INCLUDE (id_media, like_count, comment_count) WHERE type = 'common';
+
+--
+-- TestMediasEvolution: check_media_evolution and media_evolution.
+--
+DELETE FROM testmediasevolution a USING testmediasevolution b WHERE a.id_media_evolution > b.id_media_evolution AND a.id_user = b.id_user AND a.date_ini = b.date_ini AND a.date_fin = b.date_fin AND a.time = b.time;
+CREATE UNIQUE INDEX IF NOT EXISTS testmediasevolution_unique_idx ON testmediasevolution (id_user, date_ini, date_fin, time) INCLUDE (mean_likes, mean_comments);
+
+--
+-- TestMediasPopularity: check_media_popularity and media_popularity.
+--
+DELETE FROM testmediaspopularity a USING testmediaspopularity b WHERE a.id_media_popularity > b.id_media_popularity AND a.id_user = b.id_user AND a.date_ini = b.date_ini AND a.date_fin = b.date_fin AND a.id_media = b.id_media;
+CREATE UNIQUE INDEX IF NOT EXISTS testmediaspopularity_unique_idx ON testmediaspopularity (id_user, date_ini, date_fin, id_media) INCLUDE (mean_likes, mean_comments);
+
+--
+-- TestTextSentiments: check_sentiment_analysis and the sentiment analysis results.
+--
+DELETE FROM testtextsentiments a USING testtextsentiments b WHERE a.id_text_sentiment > b.id_text_sentiment AND a.id_user = b.id_user AND a.date_ini = b.date_ini AND a.date_fin = b.date_fin AND a.type = b.type;
+CREATE UNIQUE INDEX IF NOT EXISTS testtextsentiments_unique_idx ON testtextsentiments (id_user, date_ini, date_fin, type) INCLUDE (n_pos, n_neu, n_neg, pos_degree, neu_degree, neg_degree);
+
+--
+-- TestUserBehaviours: check_user_behaviour and user_behaviours.
+--
+DELETE FROM testuserbehaviours a USING testuserbehaviours b WHERE a.id_user_behaviour > b.id_user_behaviour AND a.id_user = b.id_user AND a.date_ini = b.date_ini AND a.date_fin = b.date_fin AND a.time = b.time;
+CREATE UNIQUE INDEX IF NOT EXISTS testuserbehaviours_unique_idx ON testuserbehaviours (id_user, date_ini, date_fin, time) INCLUDE (n_likers, n_haters);
+
+--
+-- TestMediaComments: check_media_comment and get_media_comments. The texts could be
+-- too long for a B-tree index, so the md5 hash of the original text is indexed.
+--
+DELETE FROM ONLY testmediacomments a USING ONLY testmediacomments b WHERE a.id_text > b.id_text AND a.id_media_aut = b.id_media_aut
+    AND a.author = b.author AND md5(a.original_text) = md5(b.original_text);
+CREATE UNIQUE INDEX IF NOT EXISTS testmediacomments_unique_idx ON testmediacomments (id_media_aut, author, md5(original_text));
+CREATE INDEX IF NOT EXISTS testmediacomments_media_date_idx ON testmediacomments (id_media_aut, date) INCLUDE (id_text, author);
+
+--
+-- TestMediaTitles: check_media_title and get_media_titles. The texts could be
+-- too long for a B-tree index, so the md5 hash of the original text is indexed.
+--
+DELETE FROM ONLY testmediatitles a USING ONLY testmediatitles b WHERE a.id_text > b.id_text AND a.id_media_aut = b.id_media_aut
+    AND a.author = b.author AND md5(a.original_text) = md5(b.original_text);
+CREATE UNIQUE INDEX IF NOT EXISTS testmediatitles_unique_idx ON testmediatitles (id_media_aut, author, md5(original_text));
+CREATE INDEX IF NOT EXISTS testmediatitles_media_date_idx ON testmediatitles (id_media_aut, date) INCLUDE (id_text, author);
+
+--
+-- TestCommentSentiments: check_comment_sentiment and get_comment_sentiment. The unique
+-- index on the md5 hash avoids duplicated texts, whereas the hash index answers
+-- the equality lookups on the original text.
+--
+DELETE FROM testcommentsentiments a USING testcommentsentiments b WHERE a.id_comment_sentiment > b.id_comment_sentiment
+    AND md5(a.original_text) = md5(b.original_text);
+CREATE UNIQUE INDEX IF NOT EXISTS testcommentsentiments_unique_idx ON testcommentsentiments (md5(original_text));
+CREATE INDEX IF NOT EXISTS testcommentsentiments_text_hash_idx ON testcommentsentiments USING HASH (original_text);
+
+COMMIT;
@@ -0,0 +1,72 @@
+--
+-- Migration 002. Tables of the daily and weekly rollups of the profile and media
+-- metrics of each user. They're filled incrementally by the ingestion of the new
+-- profiles and medias as well as by the analyses of the periods of time whose
+-- days are not in the rollups yet, so the existing data are added on demand.
+-- The statements are idempotent, so the migration could be run more than once.
+--
+-- Usage: psql --dbname=socialnetworksdb --file=migrations/002_metric_rollups.sql
+--
+BEGIN;
+
+------------------------------- REAL ANALYSIS -------------------------------
+--
+-- ProfileRollups: daily and weekly buckets of the profile metrics.
+--
+CREATE TABLE IF NOT EXISTS profilerollups(
+    id_profile_rollup SERIAL PRIMARY KEY,
+    id_user VARCHAR(50) NOT NULL,
+    period VARCHAR(5) NOT NULL,
+    bucket DATE NOT NULL,
+    n_samples INTEGER NOT NULL,
+    sum_medias BIGINT NOT NULL,
+    sum_followers BIGINT NOT NULL,
+    sum_followings BIGINT NOT NULL,
+    UNIQUE (id_user, period, bucket)
+);
+
+--
+-- MediaRollups: daily and weekly buckets of the likes and comments.
+--
+CREATE TABLE IF NOT EXISTS mediarollups(
+    id_media_rollup SERIAL PRIMARY KEY,
+    id_user VARCHAR(50) NOT NULL,
+    period VARCHAR(5) NOT NULL,
+    bucket DATE NOT NULL,
+    n_samples INTEGER NOT NULL,
+    sum_likes BIGINT NOT NULL,
+    sum_comments BIGINT NOT NULL,
+    UNIQUE (id_user, period, bucket)
+);
+
+------------------------------- TEST ANALYSIS -------------------------------
+--
+-- TestProfileRollups: daily and weekly buckets of the profile metrics.
+--
+CREATE TABLE IF NOT EXISTS testprofilerollups(
+    id_profile_rollup SERIAL PRIMARY KEY,
+    id_user VARCHAR(50) NOT NULL,
+    period VARCHAR(5) NOT NULL,
+    bucket DATE NOT NULL,
+    n_samples INTEGER NOT NULL,
+    sum_medias BIGINT NOT NULL,
+    sum_followers BIGINT NOT NULL,
+    sum_followings BIGINT NOT NULL,
+    UNIQUE (id_user, period, bucket)
+);
+
+--
+-- TestMediaRollups: daily and weekly buckets of the likes and comments.
+--
+CREATE TABLE IF NOT EXISTS testmediarollups(
+    id_media_rollup SERIAL PRIMARY KEY,
+    id_user VARCHAR(50) NOT NULL,
+    period VARCHAR(5) NOT NULL,
+    bucket DATE NOT NULL,
+    n_samples INTEGER NOT NULL,
+    sum_likes BIGINT NOT NULL,
+    sum_comments BIGINT NOT NULL,
+    UNIQUE (id_user, period, bucket)
+);
+
+COMMIT;
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Migration 003. Unique compound index on the username, the social media and the
+date of the Mongo collections. Before this migration the index was not unique,
+so the concurrent inserts of the same day could duplicate the documents. The
+duplicated documents are removed first, keeping the oldest one, and then the
+non-unique index is replaced by the unique one. The collections which already
+have the unique index are skipped, so the migration could be run more than once.
+
+Usage: python3 migrations/003_mongo_unique_indexes.py [collection ...]
+
+If no collections are provided, every collection of the database is migrated
+except the one with the snapshot versions. It requires the env variable
+MONGODB_URI as the class MongoDB.
+
+@author: Lidia Sánchez Mérida
+"""
+import argparse
+import os
+import pymongo
+
+DATABASE = "socialnetworksdb"
+SNAPSHOTS_COLLECTION = "snapshots"
+KEYS = [("username", pymongo.ASCENDING), ("social_media", pymongo.ASCENDING), ("date", pymongo.ASCENDING)]
+
+def delete_duplicates(connection, fields):
+    """
+    Deletes the documents of a collection which have the same values of the
+    provided fields as another one. The oldest document is kept, as the
+    inserts which don't replace the existing documents.
+
+    Parameters
+    ----------
+    connection : Collection
+        It's the collection to remove the duplicated documents from.
+    fields : list of str
+        They're the fields which identify each document.
+
+    Returns
+    -------
+    The number of deleted documents.
+    """
+    pipeline = [
+        {"$group":{"_id":{field:"$"+field for field in fields}, "ids":{"$push":"$_id"},
+                   "count":{"$sum":1}}},
+        {"$match":{"count":{"$gt":1}}}
+    ]
+    duplicated_ids = []
+    for group in connection.aggregate(pipeline, allowDiskUse=True):
+        # The object ids are sorted by their creation time
+        duplicated_ids.extend(sorted(group["ids"])[1:])
+    if (len(duplicated_ids) > 0):
+        connection.delete_many({"_id":{"$in":duplicated_ids}})
+        # The cached results of the collection are not valid anymore
+        connection.database[SNAPSHOTS_COLLECTION].update_one(
+            {"_id":connection.name}, {"$inc":{"version":1}}, upsert=True)
+    return len(duplicated_ids)
+
+def migrate(connection):
+    """
+    Replaces the index of a collection on the username, the social media and
+    the date by a unique one, once its duplicated documents are deleted.
+
+    Parameters
+    ----------
+    connection : Collection
+        It's the collection to migrate.
+
+    Returns
+    -------
+    The number of deleted documents or None if the collection was already migrated.
+    """
+    existing_indexes = connection.index_information()
+    name = next((name for name, info in existing_indexes.items()
+                 if [(key, int(direction)) for key, direction in info["key"]] == KEYS), None)
+    if (name != None and existing_indexes[name].get("unique", False)):
+        return None
+    n_deleted = delete_duplicates(connection, [key for key, direction in KEYS])
+    if (name != None):
+        connection.drop_index(name)
+    connection.create_index(KEYS, unique=True)
+    return n_deleted
+
+def main():
+    parser = argparse.ArgumentParser(description="Unique index of the Mongo collections.")
+    parser.add_argument("collections", nargs="*", help="Collections to migrate. Default: all of them.")
+    args = parser.parse_args()
+
+    database = pymongo.MongoClient(os.environ["MONGODB_URI"])[DATABASE]
+    collections = args.collections if len(args.collections) > 0 else \
+        [name for name in database.list_collection_names()
+         if name != SNAPSHOTS_COLLECTION and not name.startswith("system.")]
+    for collection in collections:
+        n_deleted = migrate(database[collection])
+        if (n_deleted == None):
+            print(collection+": already migrated.")
+        else:
+            print(collection+": "+str(n_deleted)+" duplicated documents deleted and unique index created.")
+
+if __name__ == "__main__":
+    main()
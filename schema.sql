@@ -228,4 +228,135 @@ CREATE TABLE public.textsentiments(
 -- 
 -- Assign an owner to the table in order to operate with it.
 --
-ALTER TABLE public.textsentiments OWNER TO lidia;
\ No newline at end of file
+ALTER TABLE public.textsentiments OWNER TO lidia;
+
+--
+-- Table SentimentCache. It will store the sentiment identified for each preprocessed
+-- text by a specific version of the sentiment analysis models. The key is the md5
+-- hash of the model version along with the preprocessed text, so the same text is
+-- only analyzed once per model version.
+--
+CREATE TABLE public.sentimentcache(
+    text_hash CHAR(32) PRIMARY KEY,
+    model_version VARCHAR(50) NOT NULL,
+    sentiment VARCHAR(20) NOT NULL,
+    degree REAL NOT NULL
+);
+-- 
+-- Assign an owner to the table in order to operate with it.
+--
+ALTER TABLE public.sentimentcache OWNER TO lidia;
+
+--
+-- Table ProfileRollups. It will store the daily and weekly buckets of the
+-- profile metrics of each user, which are updated incrementally when a new profile
+-- is downloaded. The daily buckets contain the values of the profile of each day,
+-- whereas the weekly buckets, which start on Monday, contain the sum of the values
+-- of their days. So the ProfilesEvolution of any period of time is computed by
+-- merging the buckets instead of the profiles.
+--
+CREATE TABLE public.profilerollups(
+    id_profile_rollup SERIAL PRIMARY KEY,
+    id_user VARCHAR(50) NOT NULL,
+    period VARCHAR(5) NOT NULL,
+    bucket DATE NOT NULL,
+    n_samples INTEGER NOT NULL,
+    sum_medias BIGINT NOT NULL,
+    sum_followers BIGINT NOT NULL,
+    sum_followings BIGINT NOT NULL,
+    UNIQUE (id_user, period, bucket)
+);
+-- 
+-- Assign an owner to the table in order to operate with it.
+--
+ALTER TABLE public.profilerollups OWNER TO lidia;
+
+--
+-- Table MediaRollups. It will store the daily and weekly buckets of the
+-- likes and comments of the medias of each user. The daily buckets contain the
+-- number of medias downloaded that day and the sum of their likes and comments,
+-- whereas the weekly buckets contain the number of days and the sum of the daily
+-- averages, as the MediasEvolution analysis computes them.
+--
+CREATE TABLE public.mediarollups(
+    id_media_rollup SERIAL PRIMARY KEY,
+    id_user VARCHAR(50) NOT NULL,
+    period VARCHAR(5) NOT NULL,
+    bucket DATE NOT NULL,
+    n_samples INTEGER NOT NULL,
+    sum_likes BIGINT NOT NULL,
+    sum_comments BIGINT NOT NULL,
+    UNIQUE (id_user, period, bucket)
+);
+-- 
+-- Assign an owner to the table in order to operate with it.
+--
+ALTER TABLE public.mediarollups OWNER TO lidia;
+
+--
+-- Unique constraints and covering indexes for the lookups of the predefined
+-- queries of the class PostgreDB. They're also added to existing databases by
+-- migrations/001_unique_constraints_and_indexes.sql.
+--
+--
+-- Profiles: check_profile, get_profiles and get_nmedias_profiles.
+--
+CREATE UNIQUE INDEX IF NOT EXISTS profiles_unique_idx ON public.profiles (username, social_media, date) INCLUDE (id_profile, n_medias, n_followers, n_followings);
+
+--
+-- ProfilesEvolution: check_profile_evolution and profile_evolution.
+--
+CREATE UNIQUE INDEX IF NOT EXISTS profilesevolution_unique_idx ON public.profilesevolution (id_user, date_ini, date_fin, time) INCLUDE (mean_followers, mean_followings, mean_medias);
+
+--
+-- ProfilesActivity: check_profile_activity and profile_activity.
+--
+CREATE UNIQUE INDEX IF NOT EXISTS profilesactivity_unique_idx ON public.profilesactivity (id_user, date_ini, date_fin, time) INCLUDE (mean_medias);
+
+--
+-- Medias: check_media.
+--
+CREATE UNIQUE INDEX IF NOT EXISTS medias_unique_idx ON public.medias (id_media, date) INCLUDE (id_media_aut);
+CREATE INDEX IF NOT EXISTS medias_profile_date_idx ON public.medias (id_profile, date) INCLUDE (id_media, like_count, comment_count) WHERE type = 'common';
+
+--
+-- MediasEvolution: check_media_evolution and media_evolution.
+--
+CREATE UNIQUE INDEX IF NOT EXISTS mediasevolution_unique_idx ON public.mediasevolution (id_user, date_ini, date_fin, time) INCLUDE (mean_likes, mean_comments);
+
+--
+-- MediasPopularity: check_media_popularity and media_popularity.
+--
+CREATE UNIQUE INDEX IF NOT EXISTS mediaspopularity_unique_idx ON public.mediaspopularity (id_user, date_ini, date_fin, id_media) INCLUDE (mean_likes, mean_comments);
+
+--
+-- TextSentiments: check_sentiment_analysis and the sentiment analysis results.
+--
+CREATE UNIQUE INDEX IF NOT EXISTS textsentiments_unique_idx ON public.textsentiments (id_user, date_ini, date_fin, type) INCLUDE (n_pos, n_neu, n_neg, pos_degree, neu_degree, neg_degree);
+
+--
+-- UserBehaviours: check_user_behaviour and user_behaviours.
+--
+CREATE UNIQUE INDEX IF NOT EXISTS userbehaviours_unique_idx ON public.userbehaviours (id_user, date_ini, date_fin, time) INCLUDE (n_likers, n_haters);
+
+--
+-- MediaComments: check_media_comment and get_media_comments. The texts could be
+-- too long for a B-tree index, so the md5 hash of the original text is indexed.
+--
+CREATE UNIQUE INDEX IF NOT EXISTS mediacomments_unique_idx ON public.mediacomments (id_media_aut, author, md5(original_text));
+CREATE INDEX IF NOT EXISTS mediacomments_media_date_idx ON public.mediacomments (id_media_aut, date) INCLUDE (id_text, author);
+
+--
+-- MediaTitles: check_media_title and get_media_titles. The texts could be
+-- too long for a B-tree index, so the md5 hash of the original text is indexed.
+--
+CREATE UNIQUE INDEX IF NOT EXISTS mediatitles_unique_idx ON public.mediatitles (id_media_aut, author, md5(original_text));
+CREATE INDEX IF NOT EXISTS mediatitles_media_date_idx ON public.mediatitles (id_media_aut, date) INCLUDE (id_text, author);
+
+--
+-- CommentSentiments: check_comment_sentiment and get_comment_sentiment. The unique
+-- index on the md5 hash avoids duplicated texts, whereas the hash index answers
+-- the equality lookups on the original text.
+--
+CREATE UNIQUE INDEX IF NOT EXISTS commentsentiments_unique_idx ON public.commentsentiments (md5(original_text));
+CREATE INDEX IF NOT EXISTS commentsentiments_text_hash_idx ON public.commentsentiments USING HASH (original_text);
\ No newline at end of file
@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Class which contains the cache of the daily results of the ProfilesEvolution,
+ProfilesActivity, MediasEvolution and UserBehaviours analyses. The results of
+each analysis and user are stored per day within the periods of time which have
+been already analyzed, so a new period of time is answered from any cached period
+which contains it or from the union of several overlapping ones, and only the
+days which are not cached yet are computed:
+    - The cached periods of each analysis and user are disjoint, since the
+    overlapping and contiguous periods are merged when new days are added.
+    - The days without data inside a cached period are not stored, but they're
+    known to be empty so they're not computed again. The results whose data
+    could be stored later are added per day, so only the days with data are
+    cached and the rest of days are computed again.
+    - The least recently used periods are removed when the maximum number of
+    periods or the maximum number of cached days are exceeded.
+
+@author: Lidia Sánchez Mérida
+"""
+from bisect import bisect_right, insort
+from collections import OrderedDict
+from datetime import date, timedelta
+import threading
+from exceptions import InvalidDates
+
+class AnalysisCache:
+
+    def __init__(self, max_periods=1024, max_days=36500):
+        """
+        Creates an AnalysisCache object whose attributes are:
+            - The cached periods sorted from the least to the most recently used.
+            - The first day of the cached periods of each analysis and user
+            sorted by date.
+            - The maximum number of periods and days as well as the current number
+            of cached days.
+            - The number of requests which have been completely answered from the
+            cache, partially answered or not answered at all.
+
+        Parameters
+        ----------
+        max_periods : int, optional
+            It's the maximum number of cached periods. The default is 1024.
+        max_days : int, optional
+            It's the maximum number of days of all the cached periods. The default
+            is 36500.
+
+        Returns
+        -------
+        An AnalysisCache object.
+        """
+        self.periods = OrderedDict()
+        self.first_days = {}
+        self.max_periods = max_periods
+        self.max_days = max_days
+        self.n_days = 0
+        self.lock = threading.Lock()
+        self.stats = {"hits":0, "partial_hits":0, "misses":0}
+
+    def check_period(self, first_day, last_day):
+        """
+        Checks that the provided days are a valid period of time.
+
+        Raises
+        ------
+        InvalidDates
+            If the provided days are not dates or the first day is greater than
+            the last one.
+        """
+        if (not isinstance(first_day, date) or not isinstance(last_day, date)):
+            raise InvalidDates("ERROR. The period of time should be two dates.")
+        if (first_day > last_day):
+            raise InvalidDates("ERROR. Invalid range of dates. The initial is greater than the final.")
+
+    def remove_period(self, key, first_day):
+        """
+        Removes a cached period. The lock should be acquired before calling it.
+        """
+        last_day, _ = self.periods.pop((key, first_day))
+        self.n_days -= (last_day-first_day).days+1
+        self.first_days[key].remove(first_day)
+        if (len(self.first_days[key]) == 0):
+            del self.first_days[key]
+
+    def get(self, key, first_day, last_day):
+        """
+        Gets the cached results of an analysis during a period of time as well as
+        the periods which are not cached.
+
+        Parameters
+        ----------
+        key : tuple
+            It's the analysis and the user whose results are cached.
+        first_day : date
+            It's the first day of the period of time.
+        last_day : date
+            It's the last day of the period of time.
+
+        Raises
+        ------
+        InvalidDates
+            If the provided period of time is not valid.
+
+        Returns
+        -------
+        A tuple with two items:
+            - A dict whose keys are the cached days with data and whose values
+            are the results of each day.
+            - The list of the missing periods as (first_day, last_day) tuples,
+            sorted by date.
+        """
+        self.check_period(first_day, last_day)
+        results = {}
+        missing_periods = []
+        with self.lock:
+            first_days = self.first_days.get(key, [])
+            current_day = first_day
+            # The previous period could contain the first day
+            for period_first_day in first_days[max(bisect_right(first_days, first_day)-1, 0):]:
+                if (period_first_day > last_day):
+                    break
+                period_last_day, period_results = self.periods[(key, period_first_day)]
+                if (period_last_day < current_day):
+                    continue
+                if (period_first_day > current_day):
+                    missing_periods.append((current_day, period_first_day-timedelta(days=1)))
+                results.update({day:values for day, values in period_results.items()
+                                if current_day <= day <= last_day})
+                self.periods.move_to_end((key, period_first_day))
+                current_day = period_last_day+timedelta(days=1)
+                if (current_day > last_day):
+                    break
+            if (current_day <= last_day):
+                missing_periods.append((current_day, last_day))
+
+            if (len(missing_periods) == 0):
+                self.stats["hits"] += 1
+            elif (missing_periods == [(first_day, last_day)]):
+                self.stats["misses"] += 1
+            else:
+                self.stats["partial_hits"] += 1
+        return results, missing_periods
+
+    def put(self, key, first_day, last_day, results):
+        """
+        Adds the results of an analysis during a period of time which has been
+        completely computed. The cached periods which overlap with it or are
+        contiguous are merged into one period. Then, the least recently used
+        periods are removed while the maximum number of periods or days is exceeded.
+
+        Parameters
+        ----------
+        key : tuple
+            It's the analysis and the user whose results are cached.
+        first_day : date
+            It's the first day of the period of time.
+        last_day : date
+            It's the last day of the period of time.
+        results : dict
+            It's the dict whose keys are the days with data and whose values are
+            the results of each day. The days out of the period are not cached.
+
+        Raises
+        ------
+        InvalidDates
+            If the provided period of time is not valid.
+        """
+        self.check_period(first_day, last_day)
+        with self.lock:
+            merged_results = {}
+            new_first_day, new_last_day = first_day, last_day
+            first_days = self.first_days.get(key, [])
+            # Only the periods which start before the day after the last one could be merged
+            for period_first_day in list(first_days[:bisect_right(first_days, last_day+timedelta(days=1))]):
+                period_last_day, period_results = self.periods[(key, period_first_day)]
+                if (period_last_day >= first_day-timedelta(days=1)):
+                    new_first_day = min(new_first_day, period_first_day)
+                    new_last_day = max(new_last_day, period_last_day)
+                    merged_results.update(period_results)
+                    self.remove_period(key, period_first_day)
+            merged_results.update({day:values for day, values in results.items()
+                                   if first_day <= day <= last_day})
+
+            self.periods[(key, new_first_day)] = (new_last_day, merged_results)
+            insort(self.first_days.setdefault(key, []), new_first_day)
+            self.n_days += (new_last_day-new_first_day).days+1
+            while (len(self.periods) > self.max_periods or self.n_days > self.max_days):
+                (old_key, old_first_day) = next(iter(self.periods))
+                self.remove_period(old_key, old_first_day)
+
+    def put_days(self, key, results):
+        """
+        Adds the results of the days with data of an analysis. Each group of
+        consecutive days is cached as a period of time, so the days without data
+        are not cached and they will be computed again.
+
+        Parameters
+        ----------
+        key : tuple
+            It's the analysis and the user whose results are cached.
+        results : dict
+            It's the dict whose keys are the days with data and whose values are
+            the results of each day.
+
+        Raises
+        ------
+        InvalidDates
+            If the days of the results are not dates.
+        """
+        first_day = last_day = None
+        for day in sorted(results):
+            if (last_day != None and day != last_day+timedelta(days=1)):
+                self.put(key, first_day, last_day, results)
+                first_day = None
+            if (first_day == None):
+                first_day = day
+            last_day = day
+        if (first_day != None):
+            self.put(key, first_day, last_day, results)
@@ -7,28 +7,188 @@ will be stored in the database.
 
 @author: Lidia Sánchez Mérida
 """
+import hashlib
 import os
 from os import path
 import sys
 sys.path.append("../")
 from exceptions import InvalidCredentials, UsernameNotFound, MaxRequestsExceed \
-    , InvalidUserId, InvalidLimit, PostListNotFound, PostDictNotFound
+    , InvalidUserId, InvalidLimit, PostListNotFound, PostDictNotFound, RequestRejected
 from InstagramAPI import InstagramAPI
+from rate_limiter import RateLimiter
+from response_store import ResponseStore, RecordingConnection
 import time 
 import pickle
 
+# Rate limiter shared by the API objects of the process, which allows a request
+# every 20 seconds per Instagram account
+shared_rate_limiter = RateLimiter(rate=0.05)
+# Messages of the responses which reject the requests because of their limit
+throttling_messages = ["please wait a few minutes", "spam", "feedback_required", "rate limit"]
+
 class Api:
     
-    def __init__(self):
+    def __init__(self, rate_limiter=None, backend=None, recorder=None):
         """
         Creates an API object whose attributes are:
             - The connection to one of the avalaible APIs.
+            - The rate limiter which all the requests go through, which could be
+            shared by several API objects.
+            - The number of requests which have been sent and the maximum number
+            of them, if the connected account has a budget of requests.
+            - The connection which replaces the LevPasha Instagram API, if there
+            is one, such as a replay of recorded responses.
+            - The store of the raw responses of the API, if they're recorded.
+
+        Parameters
+        ----------
+        rate_limiter : RateLimiter, optional
+            It's the rate limiter of the requests. The default is None, so the
+            rate limiter shared by the process will be used.
+        backend : object, optional
+            It's the connection which answers the requests instead of the LevPasha
+            Instagram API. Its requests are not limited. The default is None.
+        recorder : ResponseStore, optional
+            It's the store of the raw responses of the API. The default is None,
+            so the responses will be recorded in the folder of the env variable
+            INSTAGRAM_RECORD_FOLDER, if it's set.
 
         Returns
         -------
         An API object.
         """
         self.connection = None
+        self.rate_limiter = shared_rate_limiter if rate_limiter == None else rate_limiter
+        self.n_requests = 0
+        self.max_requests = None
+        self.backend = backend
+        if (recorder == None and os.environ.get("INSTAGRAM_RECORD_FOLDER")):
+            recorder = ResponseStore(os.environ["INSTAGRAM_RECORD_FOLDER"])
+        self.recorder = recorder
+
+    def set_connection(self, connection):
+        """
+        Sets the connection to the API, which records the responses if there
+        is a store of them.
+
+        Returns
+        -------
+        The set connection.
+        """
+        if (self.recorder != None):
+            connection = RecordingConnection(connection, self.recorder)
+        self.connection = connection
+        return self.connection
+
+    def is_accepted(self):
+        """
+        Checks if the last request to the API has been accepted.
+        """
+        return str(self.connection.LastJson.get('status', '')).lower() == 'ok'
+
+    def is_throttled(self):
+        """
+        Checks if the last request to the API has been rejected because of the
+        limit of requests, such as the HTTP 429 responses or the ones which ask
+        to wait a few minutes or point out a spam behaviour.
+        """
+        last_response = getattr(self.connection, 'LastResponse', None)
+        if (getattr(last_response, 'status_code', None) == 429):
+            return True
+        last_json = self.connection.LastJson
+        if (last_json.get('spam', False) == True):
+            return True
+        message = (str(last_json.get('message', ''))+" "+str(last_json.get('feedback_title', ''))).lower()
+        return any(throttling_message in message for throttling_message in throttling_messages)
+
+    def send_request(self, request, *args, error=RequestRejected):
+        """
+        Sends a request to the API through the rate limiter of the connected
+        account. If the request is rejected because of the limit of requests,
+        only this request is sent again after waiting some time. The requests
+        rejected for other reasons are not sent again.
+
+        Parameters
+        ----------
+        request : function
+            It's the method of the connection which sends the request.
+        args : 
+            They're the values of the request.
+        error : Exception, optional
+            It's the exception raised when the request is rejected for a reason
+            other than the limit of requests. The default is RequestRejected.
+
+        Raises
+        ------
+        MaxRequestsExceed
+            If the maximum number of requests has been excedeed, or the budget
+            of requests of the connected account has been spent.
+        RequestRejected
+            If the request has been rejected for another reason, or the provided
+            exception.
+
+        Returns
+        -------
+        The response of the request, which is also stored in the LastJson
+        attribute of the connection.
+        """
+        def send():
+            if (self.max_requests != None and self.n_requests >= self.max_requests):
+                raise MaxRequestsExceed("Max requests exceed in the budget of the account. Wait to send more.")
+            self.n_requests += 1
+            return request(*args)
+
+        # The requests to a backend are answered at once
+        if (self.backend != None):
+            send()
+        else:
+            account = getattr(self.connection, 'username', None)
+            self.rate_limiter.send(account, send, self.is_accepted, self.is_throttled)
+        if (not self.is_accepted()):
+            if (self.is_throttled()):
+                raise MaxRequestsExceed("Max requests exceed. Wait to send more.")
+            raise error("ERROR. The request has been rejected: "+
+                        str(self.connection.LastJson.get('message', 'unknown reason')))
+        return self.connection.LastJson
+
+    def connect_levpasha_instagram_account(self, username, pswd, session_file):
+        """
+        Connects to the LevPasha Instagram API with a specific Instagram account.
+        The connection is loaded from its session file if it has been already
+        stored, or it's stored in the session file after the login. If there is
+        a backend, it's used instead.
+
+        Parameters
+        ----------
+        username : str
+            It's the username of the Instagram account.
+        pswd : str
+            It's the password of the Instagram account.
+        session_file : str
+            It's the file which stores the connection of the account.
+
+        Raises
+        ------
+        InvalidCredentials
+            If the credentials are not non-empty strings or they're wrong.
+
+        Returns
+        -------
+        The connection made to the LevPasha Instagram API.
+        """
+        if (self.backend != None):
+            return self.set_connection(self.backend)
+        if (type(username) != str or type(pswd) != str or username == "" or pswd == ""):
+            raise InvalidCredentials("Username and/or password are not right.")
+        if (path.exists(session_file)):
+            return self.set_connection(pickle.load(open(session_file, "rb")))
+        
+        connection = InstagramAPI(username, pswd)
+        connection.login()
+        if (connection.LastJson['status'] != 'ok'):
+            raise InvalidCredentials("Invalid Instagram credentials.")
+        pickle.dump(connection, open(session_file, "wb"))
+        return self.set_connection(connection)
         
     def connect_levpasha_instagram_api(self, use_session_file=True, session_file="./levpasha_session.txt"):
         """
@@ -56,8 +216,11 @@ class Api:
 
         Returns
         -------
-        The connection made to the LevPasha Instagram API.
+        The connection made to the LevPasha Instagram API, or the backend if
+        there is one.
         """
+        if (self.backend != None):
+            return self.set_connection(self.backend)
         if (path.exists(session_file) and use_session_file):
             self.connection = pickle.load(open(session_file, "rb"))
         else:
@@ -89,7 +252,7 @@ class Api:
                 
             pickle.dump(self.connection, open(session_file, "wb"))
         
-        return self.connection
+        return self.set_connection(self.connection)
     
     def get_levpasha_instagram_profile(self, search_user):
         """
@@ -103,7 +266,8 @@ class Api:
         Raises
         ------
         UsernameNotFound
-            If the provided username is not a non-empty string.
+            If the provided username is not a non-empty string or the user has
+            not been found.
         MaxRequestsExceed
             If the maximum number of requests has been excedeed.
 
@@ -119,10 +283,7 @@ class Api:
             self.connection = self.connect_levpasha_instagram_api()
             
         # Gets the profile of the user
-        self.connection.searchUsername(search_user)
-        # Exception when the max number of requests has been exceeded
-        if (self.connection.LastJson['status'].lower() != 'ok'):    # pragma: no cover
-            raise MaxRequestsExceed("Max requests exceed. Wait to send more.")
+        self.send_request(self.connection.searchUsername, search_user, error=UsernameNotFound)
             
         # Profile with the interesting fields
         profile = {}
@@ -141,12 +302,14 @@ class Api:
         
         return profile
     
-    def get_levpasha_instagram_posts(self, user_id, limit=100):
+    def get_levpasha_instagram_posts(self, user_id, limit=100, known_ids=None):
         """
         Gets post data of a specific user. Establishing a maximum number of post
         data is advisable in order to not exceed the maximum number of requests
         of the LevPasha Instagram API. By default, the maximum number of post
-        data is 100 posts.
+        data is 100 posts. If the ids of the posts which have been already
+        downloaded are provided, the pages stop once one of them is reached,
+        since the posts are sorted from the newest to the oldest one.
 
         Parameters
         ----------
@@ -154,6 +317,9 @@ class Api:
             It's the user id which represents the user to get their post data.
         limit : integer
             It's the maximum number of post data to get. The default is 100.
+        known_ids : set of str, optional
+            They're the ids of the posts which have been already downloaded. The
+            default is None, so the posts are got until the limit.
 
         Raises
         ------
@@ -161,6 +327,8 @@ class Api:
             If the provided user id is not a positive integer.
         InvalidLimit
             If the provided maximum of post data is not a positive integer.
+        RequestRejected
+            If the posts of the user could not be got, such as a private account.
 
         Returns
         -------
@@ -186,7 +354,8 @@ class Api:
         n_downloaded_posts = 0
         # Get posts while there are still more posts
         while more_posts:
-            self.connection.getUserFeed(user_id, max_id)
+            # Only the failed page is requested again
+            self.send_request(self.connection.getUserFeed, user_id, max_id)
             if (self.connection.LastJson['more_available'] == False):
                 more_posts = False
 
@@ -204,9 +373,8 @@ class Api:
             
             n_downloaded_posts += len(items_list)
             if (n_downloaded_posts >= limit): break
-            # IMPORTANT!
-            ## Wait some time to avoid flooding the servers.
-            time.sleep(20)
+            # The next pages only have posts which have been already downloaded
+            if (known_ids != None and any(i['id'] in known_ids for i in items_list)): break
             
         return posts
      
@@ -239,6 +407,56 @@ class Api:
         comments : list of dicts.
             A list of dicts in which each dict which contains the comments of each post.
         """
+        return self.get_levpasha_instagram_new_comments(username, posts)[0]
+
+    def get_comment_id(self, comment):
+        """
+        Gets the id of a comment of a post. The comments without an id are
+        identified by the hash of their user and text, so they're also known
+        once they've been downloaded.
+        """
+        if ('pk' in comment):
+            return str(comment['pk'])
+        return hashlib.md5((comment['user']['username']+"\x00"+comment['text']).encode("utf-8")).hexdigest()
+
+    def get_levpasha_instagram_new_comments(self, username, posts, known_comments=None):
+        """
+        Gets the comments of the users who commented in the posts of a specific
+        user which have not been already downloaded.
+
+        Parameters
+        ----------
+        username : str
+            The username of the user to get comments of their posts.
+        posts : list of dicts.
+            It's the list of posts of the user. It'll be used to get the post ids
+            in order to get their comments.
+        known_comments : dict, optional
+            It's the dict whose keys are the post ids and whose values are the
+            ids of their comments which have been already downloaded. The comments
+            without an id are identified by the hash of their user and text. The
+            default is None, so all the comments will be returned.
+
+        Raises
+        ------
+        UsernameNotFound
+            If the provided username is not a non-empty string.
+        PostListNotFound
+            If the provided list of posts is not a non-empty list of dicts.
+        PostDictNotFound
+            If the provided list of posts is not a non-empty list of dicts.
+        MaxRequestsExceed
+            If the maximum number of requests has been excedeed.
+        RequestRejected
+            If the comments of a post could not be got.
+
+        Returns
+        -------
+        A tuple with two items:
+            - A list of dicts in which each dict contains the new comments of each post.
+            - A dict whose keys are the post ids and whose values are the ids of
+            all the comments which have been got from each post.
+        """
         if (type(username) != str or username == ""):
             raise UsernameNotFound("ERROR. The username should be a non empty string.")
         if (type(posts) != list or len(posts) == 0):
@@ -246,8 +464,10 @@ class Api:
         # Check the connection to the API Instagram
         if (self.connection == None):
             self.connection = self.connect_levpasha_instagram_api()
+        known_comments = {} if known_comments == None else known_comments
             
         comments = []
+        comment_ids = {}
         for post in posts:
             # Check each post
             if (type(post) != dict or len(post) == 0):
@@ -257,24 +477,21 @@ class Api:
             
             # IMPORTANT!
             ## 20 max comments per post
-            self.connection.getMediaComments(post['id_media'])
-            if (self.connection.LastJson['status'].lower() != 'ok'):    # pragma: no cover
-                raise MaxRequestsExceed("Max requests exceed. Wait to send more.")
+            self.send_request(self.connection.getMediaComments, post['id_media'])
             # Save the user who wrote the comment and the text
             if ('comments' in self.connection.LastJson):
                 post_comments = self.connection.LastJson['comments']
+                known_ids = set(known_comments.get(post['id_media'], []))
                 comments_list = []
                 for comm in post_comments:
-                    if (comm['user']['username'] != username):
+                    if (comm['user']['username'] != username and self.get_comment_id(comm) not in known_ids):
                         comments_list.append({'user':comm['user']['username'], 'text':comm['text']})
                 
                 """Add the comments of the post"""
                 comments.append({'id_media':post['id_media'], 'texts':comments_list})
-            
-            """Wait some time to avoid flooding the servers."""
-            time.sleep(20)
+                comment_ids[post['id_media']] = [self.get_comment_id(comm) for comm in post_comments]
         
-        return comments
+        return comments, comment_ids
     
     def get_levpasha_instagram_data(self, search_user, use_session_file=True, 
                                     session_file="./levpasha_session.txt"):
@@ -301,7 +518,8 @@ class Api:
         Raises
         ------
         UsernameNotFound
-            If the provided username is not a non-empty string.
+            If the provided username is not a non-empty string or the user has
+            not been found.
         MaxRequestsExceed
             If the maximum number of requests has been excedeed.
 
@@ -326,16 +544,13 @@ class Api:
         try:
             # Profile
             user_data['profile'] = self.get_levpasha_instagram_profile(search_user)
-            time.sleep(30)
             print("\nPROFILE\n", user_data['profile'])
             # Posts
             user_data['medias'] = self.get_levpasha_instagram_posts(user_data['profile']['userid'])
-            time.sleep(30)
             print("\nMEDIAS\n", len(user_data['medias']))
             # Comments of the posts
             user_data['comments'] = self.get_levpasha_instagram_posts_comments(
                 user_data['profile']['username'], user_data['medias'])
-            time.sleep(30)
             print("\nCOMMENTS\n",len(user_data['comments'] ))
         except MaxRequestsExceed:   # pragma: no cover
             raise MaxRequestsExceed("Max requests exceed. Wait to send more.")
@@ -6,7 +6,6 @@ methods to verify the values of the collected data.
 
 @author: Lidia Sánchez Mérida
 """
-import time
 import sys
 sys.path.append("../")
 import mongodb
@@ -15,21 +14,29 @@ from exceptions import InvalidMongoDbObject, ProfileDictNotFound, InvalidTextLis
     , UserDataNotFound, CollectionNotFound, InvalidQuery, InvalidSocialMediaSource \
     , UsernameNotFound, InvalidMediaId, InvalidQueryValues, InvalidUserId
 from datetime import date, datetime
-from google_trans_new import google_translator  
-import re
+from translators import default_translation_service
+from language_detector import LanguageDetector
+from text_normalizer import TextNormalizer
 
 class CommonData:
 
-    def __init__(self, mongodb=None):
+    def __init__(self, mongodb=None, translator=None):
         """
         Creates a CommonData object whose attributes are:
             - A MongoDB object to operate with the Mongo database. It could be
                 None if the MongoDB operations are not required.
+            - A TranslationService object to translate the texts to English. If
+                it's None, the default service will be created the first time
+                the texts are cleaned.
+            - A LanguageDetector object to only translate the non-English texts.
+            - The number of translated and skipped texts of the last cleaned batch.
             - The list of the required keys for the user profile.
             - The list of the required keys for the media posts.
             - The list of the required keys for the media texts.
             - The list of avalaible social media sources.
             - The list of stopwords to remove from text.
+            - A TextNormalizer object to remove the stopwords, numbers and special
+            characters of the texts.
             - The relationship between the user data and the collection to save them.
 
         Parameters
@@ -37,12 +44,18 @@ class CommonData:
         mongodb : MongoDB, optional
             It's the MongoDB object which contains the connection to the Mongo
             database in order to operate with it. The default is None.
+        translator : TranslationService, optional
+            It's the service which translates the texts before cleaning them.
+            The default is None, so Google Translate will be used.
 
         Returns
         -------
         A CommonData object.
         """
         self.mongodb = mongodb
+        self.translator = translator
+        self.language_detector = LanguageDetector()
+        self.last_translation_report = {"translated":0, "english":0, "empty":0}
         self.profile_keys = ['biography', 'birthday', 'date_joined', 'gender', 
                           'location', 'n_followers', 'n_followings', 'n_medias', 
                           'name', 'profile_pic', 'userid', 'username']
@@ -53,6 +66,7 @@ class CommonData:
         self.stopwords = ['a', 'an', 'the', 'and', 'or', 'i', 'you', 'he', 'she',
                           'it', 'we', 'they', 'my', 'your', 'his', 'her', 'its',
                           'ours', 'yours', 'them', 'me', 'us']
+        self.text_normalizer = TextNormalizer(self.stopwords)
         self.related_collections = {
             "profiles":"insert_profile",
             "medias":"insert_medias",
@@ -86,6 +100,19 @@ class CommonData:
         self.mongodb = mongodb_connection
         return self.mongodb
 
+    def get_translator(self):
+        """
+        Gets the service which translates the texts. If it has not been provided,
+        the default one will be created the first time it's required.
+
+        Returns
+        -------
+        A TranslationService object.
+        """
+        if (self.translator == None):
+            self.translator = default_translation_service()
+        return self.translator
+
     def preprocess_profile(self, user_profile, social_media):
         """
         Preprocesses the dict of the user profile as well as their keys and values.
@@ -329,7 +356,10 @@ class CommonData:
     def clean_texts(self, texts):
         """
         Cleans a list of text by applying this set of operations.
-            - Translate the text to English.
+            - Translate the text to English. Only the non-English texts are sent
+            to the translator, whereas the texts without words, such as emojis or
+            mentions, are skipped. The texts are translated in batches and the
+            translations are cached, so each text is only translated once.
             - Remove specific stopwords like some prepositions, pronouns, etc.
             - Remove numbers.
             - Remove some useless special characters.
@@ -357,31 +387,17 @@ class CommonData:
         if (not all(isinstance(text, str) for text in texts)):
             raise InvalidTextList("ERROR. All texts should be non-empty strings.")
 
+        # Translate only the non-English texts in batches
+        labels = self.language_detector.detect_many(texts)
+        foreign_texts = [text for text, label in zip(texts, labels) if label == "foreign"]
+        translations = iter(self.get_translator().translate(foreign_texts) if len(foreign_texts) > 0 else [])
+        translated_texts = [next(translations) if label == "foreign" else text
+                            for text, label in zip(texts, labels)]
+        self.last_translation_report = {"translated":len(foreign_texts),
+                                        "english":labels.count("english"),
+                                        "empty":labels.count("empty")}
         # Clean the texts
-        cleaned_texts = []
-        # Translator
-        translator = google_translator()  
-        for text in texts:
-            try:
-                english_words = (translator.translate(text)).split()
-            except: # pragma no cover
-                try:
-                    english_words = (translator.translate(text)).split()
-                except:
-                    english_words = text
-            # Remove some stop words
-            non_stopwords = [word for word in english_words if word.lower() not in self.stopwords]
-            non_stopwords = ' '.join(non_stopwords)
-            # Remove numbers
-            non_numbers = re.sub(r"\d+", "", non_stopwords)
-            # Remove some special characters
-            non_special_characters = re.sub(r'[#@\"\-"*$%&\+\_]', ' ', non_numbers)
-            # Add the cleaned text to the list of cleaned texts
-            cleaned_texts.append(non_special_characters)
-            # Wait a few seconds to not overwhelm the API
-            time.sleep(1)
-        
-        return cleaned_texts
+        return list(self.text_normalizer.normalize_many(translated_texts))
 
     def insert_user_data(self, user_data, collection):
         """
@@ -428,12 +444,54 @@ class CommonData:
                 raise InvalidMongoDbObject("ERROR. The connection to the MongoDB database "+
                                        "should be a MongoDB object.")
         
-        # Set the collection to insert the user data
-        self.mongodb.set_collection(collection)
         # Stores user data in the specified collection of a Mongo database.
-        return self.mongodb.insert_item(user_data)
+        return self.mongodb.insert_item(user_data, collection)
+
+    def insert_many_user_data(self, user_data_list, collection):
+        """
+        Inserts the data of several users or days in a collection of Mongo database
+        with a single request. The documents which already exist are not inserted.
+
+        Parameters
+        ----------
+        user_data_list : list of dicts
+            It's the list of user data from any social media source.
+        collection : str
+            It's the collection in which the user data is going to be inserted.
+
+        Raises
+        ------
+        UserDataNotFound
+            If the provided user data is not a non-empty list of non-empty dicts.
+        CollectionNotFound
+            If the provided collection is not a non-empty string.
+        InvalidMongoDbObject
+            If the MongoDB object does not contain the connection to the Mongo database.
+
+        Returns
+        -------
+        A dict with the number of inserted documents, the number of documents
+        which already existed and the ids of the inserted documents.
+        """
+        # Check the provided user data
+        if (type(user_data_list) != list or len(user_data_list) == 0 or
+            not all(type(user_data) == dict and len(user_data) > 0 for user_data in user_data_list)):
+            raise UserDataNotFound("ERROR. The user data should be a non-empty list of non-empty dicts.")
+        # Check the provided collection
+        if (collection == "" or type(collection) != str):
+            raise CollectionNotFound("ERROR. The collection name should be a non-empty string.")
+        # Check if the collection exists
+        if (collection not in self.related_collections):
+            raise CollectionNotFound("ERROR. The provided collection does not exist.")
+        # Check the current MongoDB object
+        if (type(self.mongodb) != mongodb.MongoDB):
+            raise InvalidMongoDbObject("ERROR. The connection to the MongoDB database "+
+                                       "should be a MongoDB object.")
+
+        # Insert all the user data in the collection at once
+        return self.mongodb.insert_items(user_data_list, collection)
 
-    def get_user_data(self, collection, query, values={}):
+    def get_user_data(self, collection, query, values={}, fields=None, lazy=False):
         """
         Gets the matched records from a specific collection and related to a
         specific query.
@@ -448,6 +506,11 @@ class CommonData:
         values : dict, optional
             They're the parameters to add to the query in order to filter the
             data to recover. The default is {}.
+        fields : list of str, optional
+            They're the fields of the records to recover. The default is None, so
+            all the fields will be recovered.
+        lazy : bool, optional
+            If it's True a cursor will be returned instead of a list. The default is False.
 
         Raises
         ------
@@ -484,6 +547,5 @@ class CommonData:
         if (type(values) != dict):
             raise InvalidQueryValues("ERROR. The values should be a dict.")
         
-        # Set the collection
-        self.mongodb.set_collection(collection)
-        return self.mongodb.get_records(query, values)
+        # The collection is provided to the query so the connected one is not changed
+        return self.mongodb.get_records(query, values, fields, lazy, collection)
@@ -17,14 +17,11 @@ These analysis are:
 
 @author: Lidia Sánchez Mérida
 """
+import numpy as np
 # Sentiment Analyzer based on pre-trained models
-from flair.models import TextClassifier
 from flair.data import Sentence
-        
-# Sentiment Analyzer based on lexicon
-import nltk
-nltk.download('vader_lexicon')
-from nltk.sentiment.vader import SentimentIntensityAnalyzer
+# Shared registry of the pre-trained models and the lexicon
+from sentiment_models import sentiment_models
 
 from exceptions import ValuesNotFound, KeysNotFound, ExpectedSameSize \
     , ProfilesNotFound, UsernameNotFound, TextNotFound \
@@ -33,13 +30,20 @@ from exceptions import ValuesNotFound, KeysNotFound, ExpectedSameSize \
 
 class DataAnalyzer:
     
-    def __init__(self):
+    def __init__(self, models=None):
         """
         Creates a DataAnalyzer object whose attributes are:
             - The list of avalaible social media sources
             - The list of colours to draw the plots.
             - The default path to store the differents plots.
             - The list of avalaible analysis.
+            - The registry of the sentiment analysis models.
+
+        Parameters
+        ----------
+        models : SentimentModels, optional
+            It's the registry which loads the sentiment analysis models. The
+            default is None, so the shared registry of the process will be used.
 
         Returns
         -------
@@ -58,6 +62,10 @@ class DataAnalyzer:
            "test_media_evolution", "test_media_popularity",
            "test_comment_sentiment_analysis", "test_title_sentiment_analysis", 
            "test_user_behaviours"]
+        # Registry of the sentiment analysis models
+        self.sentiment_models = models if models != None else sentiment_models
+        # Number of texts to classify in each mini-batch
+        self.sentiment_batch_size = 32
     
     def get_values_per_one_week(self, values, keys):
         """
@@ -150,15 +158,13 @@ class DataAnalyzer:
         # Initialize the final dict to store the average per key
         result = {key:[] for key in keys}
         for i in range(1, len(list(value_list.keys()))):
-            # Get the values for each key
-            key_values = value_list[keys[i]]
-            # Transform the values from string to int
-            key_values = [int(i) for i in key_values]
-            while (len(key_values) > 0):
-                # Compute the average
-                result[keys[i]].append(round(sum(key_values[:7])/len(key_values[:7])))
-                # Delete the computed numbers
-                key_values = key_values[7:]
+            # Transform the values of each key from string to int
+            key_values = np.array(value_list[keys[i]], dtype=np.int64)
+            # Compute the average of each chunk of seven values at once
+            week_starts = np.arange(0, len(key_values), 7)
+            week_sums = np.add.reduceat(key_values, week_starts)
+            week_sizes = np.diff(np.append(week_starts, len(key_values)))
+            result[keys[i]].extend([round(mean) for mean in (week_sums/week_sizes).tolist()])
         
         # Add the weeks depending on the number of averages
         weeks = ["Semana "+str(i+1) for i in range(0, len(result[keys[1]]))]
@@ -166,6 +172,46 @@ class DataAnalyzer:
         
         return result
         
+    def get_means_per_group(self, groups, columns, sort=False):
+        """
+        Computes the rounded average of some columns of values for each group
+        in a single pass. Each group is identified by its position in a list of
+        unique groups and the sums of each group are computed with np.bincount,
+        so the values are not scanned again for each group.
+
+        Parameters
+        ----------
+        groups : list
+            It's the group of each record, such as its date or its media code.
+        columns : list of lists
+            It's the list of columns whose values will be averaged. Each value
+            should be an int or a string which contains an int.
+        sort : bool, optional
+            If it's True the groups will be sorted. Otherwise, they will be in
+            the same order than their first appearance. The default is False.
+
+        Returns
+        -------
+        A tuple whose first value is the list of unique groups and whose second
+        value is a list with the rounded averages of each column per group.
+        """
+        # Get the index of the group of each record
+        group_indexes = {}
+        inverse = np.fromiter((group_indexes.setdefault(group, len(group_indexes)) for group in groups),
+                              dtype=np.intp, count=len(groups))
+        unique_groups = list(group_indexes)
+        order = sorted(range(0, len(unique_groups)), key=unique_groups.__getitem__) if sort \
+            else list(range(0, len(unique_groups)))
+        # Compute the average of each column per group
+        counts = np.bincount(inverse)
+        means = []
+        for column in columns:
+            sums = np.bincount(inverse, weights=np.array(column, dtype=np.int64))
+            column_means = (sums/counts).tolist()
+            means.append([round(column_means[i]) for i in order])
+
+        return [unique_groups[i] for i in order], means
+
     ########################## PROFILE ANALYSIS ##############################
     def profile_evolution(self, username, profile_list):
         """
@@ -293,16 +339,10 @@ class DataAnalyzer:
             if (type(interaction) != tuple or len(interaction) != 3):
                 raise PostInteractionsNotFound("ERROR. The three fields to analyze the medias evolution should be tuples.")
         
-        # Compute the mean of likes and comments for each post
-        mean_post_interactions = []
-        # Get the dates without duplicates
-        dates = list(set([item[0] for item in post_interactions]))
-        dates.sort()
-        # Compute an average of the number of comments and likes per day
-        for date in dates:
-            likes = [int(item[1]) for item in post_interactions if item[0] == date]
-            comments = [int(item[2]) for item in post_interactions if item[0] == date]
-            mean_post_interactions.append((date, round(sum(likes)/len(likes)), round(sum(comments)/len(comments))))
+        # Compute an average of the number of comments and likes per day sorted by date
+        dates, likes, comments = zip(*post_interactions)
+        dates, (mean_likes, mean_comments) = self.get_means_per_group(dates, [likes, comments], sort=True)
+        mean_post_interactions = list(zip(dates, mean_likes, mean_comments))
         
         # Get the values per one week
         if (len(mean_post_interactions) <= 7):
@@ -356,26 +396,20 @@ class DataAnalyzer:
             if (type(interaction) != tuple or len(interaction) != 3):
                 raise PostInteractionsNotFound("ERROR. The three fields to analyze the medias popularity should be tuples.")
         
-        # Computes the average of the number of likes and comments
-        media_codes = [item[0] for item in post_popularities]
-        unique_media_codes = list(dict.fromkeys(media_codes))
-        analysis_results = []
-        for code in unique_media_codes:
-            likes = [int(item[1]) for item in post_popularities if item[0] == code]
-            comments = [int(item[2]) for item in post_popularities if item[0] == code]
-            mean_likes = round(sum(likes)/len(likes))
-            mean_comments = round(sum(comments)/len(comments))
-            analysis_results.append((code, mean_likes, mean_comments)) 
+        # Computes the average of the number of likes and comments per media
+        media_codes, likes, comments = zip(*post_popularities)
+        media_codes, (mean_likes, mean_comments) = self.get_means_per_group(media_codes, [likes, comments])
         
-        return analysis_results
+        return list(zip(media_codes, mean_likes, mean_comments))
     
     ############################ TEXT ANALYSIS ##############################
-    def sentiment_analysis_text(self, username, text_data):
+    def sentiment_analysis_text(self, username, text_data, batch_size=None):
         """
         Performs a sentiment analysis on a list of texts in order to show the
         number of positive, neutral and negative texts on a chart along with
         the polarity of each one of them, which shows how sure the classifier is
-        when it labeled each text. 
+        when it labeled each text. The texts are sorted by their length and
+        classified in mini-batches to reduce the padding of each batch.
 
         Parameters
         ----------
@@ -384,6 +418,9 @@ class DataAnalyzer:
         text_data : dict
             It's a dict whose first key is the list of text ids, and whose second
             key is a list of tuples which contains the preprocessed text to analyze.
+        batch_size : int, optional
+            It's the number of texts to classify in each mini-batch. The default
+            is None, so the batch size of the object will be used.
 
         Raises
         ------
@@ -403,89 +440,115 @@ class DataAnalyzer:
         # Check the provided list of post texts
         if (type(text_data) != list or len(text_data) == 0):
             raise TextDataNotFound("ERROR. The preprocessed texts to analyze should be a non-empty list of tuples.")
-
-        # For pre-trained models 
-        flair_analyzer = TextClassifier.load('sentiment')
-        # For VADER lexicon
-        vader_analyzer = SentimentIntensityAnalyzer()
-        
-        # Perform the sentiment analysis
-        text_analysis_results = []
+        # Check that there are three fields: id, preprocessed text and original text
         for text in text_data:
-            # Check that there are two fields: id and text
             if (type(text) != tuple or len(text) != 3):
                 raise TextNotFound("ERROR. The text to analyze should be in a three-size tuple.")
-            
-            # 1. Apply a pre-trained model to identifiy the sentiment of the text
-            sentence = Sentence(text[1])
-            flair_analyzer.predict(sentence)
+        if (batch_size == None):
+            batch_size = self.sentiment_batch_size
+
+        # For pre-trained models 
+        flair_analyzer = self.sentiment_models.get_flair_model()
+        
+        # 1. Apply a pre-trained model to identifiy the sentiment of the texts
+        # sorted by their length, so the texts of each mini-batch are similar
+        text_order = sorted(range(0, len(text_data)), key=lambda i: len(text_data[i][1]))
+        sentences = [Sentence(text_data[i][1]) for i in text_order]
+        flair_analyzer.predict(sentences, mini_batch_size=batch_size)
+        
+        # Analysis results to insert in the same order as the provided texts
+        text_analysis_results = [None]*len(text_data)
+        unlabeled_texts = []
+        for index, sentence in zip(text_order, sentences):
             total_sentiment = sentence.labels
             if (len(total_sentiment) > 0):
-                sentiment = total_sentiment[0].value
-                score = total_sentiment[0].score
-                sentiment = "pos" if sentiment.lower() == "positive" else "neg"
-                # Analysis results to insert
-                text_analysis_results.append({"original_text":text[2], "sentiment":sentiment, "degree":score})
-            # 2. Apply the VADER lexicon if the pre-trained model could not identify the sentiment of the text
+                sentiment = "pos" if total_sentiment[0].value.lower() == "positive" else "neg"
+                text_analysis_results[index] = {"original_text":text_data[index][2], 
+                                                "sentiment":sentiment, "degree":total_sentiment[0].score}
             else: #pragma no cover
-                # Get the sentiments
-                analysis = vader_analyzer.polarity_scores(text[1])
-                del analysis['compound']
-                # Get the sentiment of the text
-                sentiment = "none"
-                if (analysis['pos'] != 0 or analysis['neu'] != 0 or analysis['neg'] != 0):
-                    sentiment = max(analysis, key=analysis.get)
-                # Analysis results to insert
-                text_analysis_results.append({"original_text":text[2], "sentiment":sentiment, 
-                                              "degree":analysis[sentiment] if sentiment != "none" else 0.0})
+                unlabeled_texts.append(index)
+        
+        # 2. Apply the VADER lexicon if the pre-trained model could not identify the sentiment of the texts
+        if (len(unlabeled_texts) > 0): #pragma no cover
+            for index, result in zip(unlabeled_texts, 
+                                     self.vader_sentiment_analysis([text_data[i][1] for i in unlabeled_texts])):
+                result["original_text"] = text_data[index][2]
+                text_analysis_results[index] = result
         
         return text_analysis_results
 
-    def user_behaviours(self, username, user_list):
+    def vader_sentiment_analysis(self, texts):
         """
-        Computes the evolution of the number of haters and friends based on the
-        sentiment analysis performed on their comments during a specific period of
-        time. If it's more than 7 days, the method will calculate the average of 
-        likers and haters per week.
+        Classifies a list of texts by using the VADER lexicon. The positive, neutral 
+        and negative scores of all the texts are stored in a matrix in order to 
+        get the sentiment of every text at once.
 
         Parameters
         ----------
-        username : str
-            It's the username of the studied user.
-        user_list : list of tuples
+        texts : list of str
+            It's the list of texts to classify.
+
+        Returns
+        -------
+        A list of dicts, one per text in the same order, which contain the identified 
+        sentiment as well as the polarity degree.
+        """
+        # For VADER lexicon
+        vader_analyzer = self.sentiment_models.get_vader_model()
+        # Same order as the scores of VADER so the ties are solved in the same way
+        sentiments = ["neg", "neu", "pos"]
+        scores = [vader_analyzer.polarity_scores(text) for text in texts]
+        scores = np.array([[score[key] for key in sentiments] for score in scores], dtype=float)
+        
+        # Get the sentiment of the texts which have any score
+        best_sentiments = scores.argmax(axis=1)
+        best_degrees = scores.max(axis=1)
+        has_sentiment = scores.any(axis=1)
+        return [{"sentiment":sentiments[best_sentiments[i]] if has_sentiment[i] else "none",
+                 "degree":float(best_degrees[i]) if has_sentiment[i] else 0.0}
+                for i in range(0, len(texts))]
+
+    def get_behaviours_per_date(self, user_list):
+        """
+        Counts the number of likers and haters of each date based on the sentiment
+        analysis performed on their comments. An author is a liker or a hater of
+        a date if most of their comments of that date are positive or negative.
+
+        Parameters
+        ----------
+        user_list : list or iterator of dicts
             It's the list of users which their identified sentiment for each date
-            of downloaded data.
+            of downloaded data. It could be an iterator, such as the records streamed
+            from the database, so the comments are counted without loading all of
+            them in memory.
 
         Raises
         ------
-        UsernameNotFound
-            If the provided username is not a non-empty string.
-        SentimentTupleNotFound
-            If the provided list of sentiments is not a non-empty list of tuples.
+        SentimentNotFound
+            If the provided sentiments are not a list or an iterator of dicts.
 
         Returns
         -------
-        A dict with the UserBehaviours analysis results per date.
+        A list of tuples with the date, the number of likers and the number of haters.
+        The list will be empty if there are not any comments.
         """
-        # Check the provided username
-        if (type(username) != str or username == ""):
-            raise UsernameNotFound("ERROR. The username should be a non-empty string.")
         # Check the provided list identified sentiments
-        if (type(user_list) != list or len(user_list) == 0 or 
-            not all(isinstance(item, dict) for item in user_list)):
+        if (user_list == None or isinstance(user_list, (str, dict)) or not hasattr(user_list, "__iter__")):
             raise SentimentNotFound("ERROR. The users to analyze should be in a non-empty list of dicts.")
-        
+
         # Count the number of different sentiments for each date without duplicates
         user_patterns = {}
         for item in user_list:
+            if (not isinstance(item, dict)):
+                raise SentimentNotFound("ERROR. The users to analyze should be in a non-empty list of dicts.")
             if ("date" not in item or "author" not in item or "sentiment" not in item):
                 raise SentimentNotFound("ERROR. Each item should be the three keys: 'date', 'author' and 'sentiment'.")
             
             # Case 1. The date is not in the analysis results
             if (item["date"] not in user_patterns):
                 user_patterns[item["date"]] = {}
-            # Case 1.1. The user is not in the analysis results
-            if (item["author"] not in user_patterns):
+            # Case 1.1. The user is not in the analysis results of the date
+            if (item["author"] not in user_patterns[item["date"]]):
                 user_patterns[item["date"]][item["author"]] = {"pos":0, "neu":0, "neg":0}
             # Add the identified sentiment
             if (item["sentiment"] != "none"):
@@ -502,7 +565,44 @@ class DataAnalyzer:
         
             # Add the results per date in order to plot them
             behaviour_summary.append((date, n_likers, n_haters))
-                    
+        return behaviour_summary
+
+    def user_behaviours(self, username, user_list):
+        """
+        Computes the evolution of the number of haters and friends based on the
+        sentiment analysis performed on their comments during a specific period of
+        time. If it's more than 7 days, the method will calculate the average of 
+        likers and haters per week.
+
+        Parameters
+        ----------
+        username : str
+            It's the username of the studied user.
+        user_list : list or iterator of dicts
+            It's the list of users which their identified sentiment for each date
+            of downloaded data. It could be an iterator, such as the records streamed
+            from the database, so the comments are counted without loading all of
+            them in memory.
+
+        Raises
+        ------
+        UsernameNotFound
+            If the provided username is not a non-empty string.
+        SentimentTupleNotFound
+            If the provided list of sentiments is not a non-empty list of tuples.
+
+        Returns
+        -------
+        A dict with the UserBehaviours analysis results per date.
+        """
+        # Check the provided username
+        if (type(username) != str or username == ""):
+            raise UsernameNotFound("ERROR. The username should be a non-empty string.")
+
+        # Get the number of likers and haters per date without duplicates
+        behaviour_summary = self.get_behaviours_per_date(user_list)
+        if (len(behaviour_summary) == 0):
+            raise SentimentNotFound("ERROR. The users to analyze should be in a non-empty list of dicts.")
         # Get the data per week or per more than a week
         if (len(behaviour_summary) <= 7):
             return self.get_values_per_one_week(behaviour_summary, ['date', 'likers', 'haters'])
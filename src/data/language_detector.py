@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Class which identifies offline whether a text should be translated before cleaning
+it. Most of the Instagram comments are mentions, emojis or short English texts,
+which do not need to be sent to the translator. Each text is labelled as:
+    - empty: there are not any words after removing mentions, links, emojis
+    and numbers, so there is nothing to translate.
+    - english: all its letters are ASCII and most of its words are common English words.
+    - foreign: the rest of texts, which will be translated.
+
+@author: Lidia Sánchez Mérida
+"""
+import re
+from exceptions import TextListNotFound, InvalidTextList
+
+# Most frequent English words, mainly function words, as well as the most common
+# words of the comments wrote on social media
+ENGLISH_WORDS = frozenset("""
+a about after all also am an and any are as at be because been before being but by
+can could did do does doing done for from had has have having he her here hers him
+his how i if in into is it its just me more most my no not now of off on once only or
+other our ours out over own same she should so some such than that the their theirs
+them then there these they this those through to too under until up very was we were
+what when where which while who whom why will with would you your yours yourself
+yes yeah ok okay oh wow omg lol please thanks thank love loved loving like likes
+great good nice cool amazing awesome beautiful best better pretty cute perfect lovely
+wonderful fantastic incredible excellent happy so much many new day today car cars
+looks look looking photo pic picture post color colour well done congrats
+congratulations dream want need wish day night time man guy guys girl bro dude
+""".split())
+
+class LanguageDetector:
+
+    def __init__(self, english_words=ENGLISH_WORDS, threshold=0.5):
+        """
+        Creates a LanguageDetector object whose attributes are:
+            - The set of common English words.
+            - The minimum ratio of common English words to label a text as English.
+            - The precompiled patterns to remove mentions and links and to find words.
+
+        Parameters
+        ----------
+        english_words : frozenset, optional
+            It's the set of common English words in lower case. The default is ENGLISH_WORDS.
+        threshold : float, optional
+            It's the minimum ratio of common English words. The default is 0.5.
+
+        Returns
+        -------
+        A LanguageDetector object.
+        """
+        self.english_words = english_words
+        self.threshold = threshold
+        self.ignored_pattern = re.compile(r"@[\w.]+|https?://\S+|www\.\S+")
+        self.word_pattern = re.compile(r"[^\W\d_]+")
+
+    def detect(self, text):
+        """
+        Labels a text in order to know whether it should be translated.
+
+        Parameters
+        ----------
+        text : str
+            It's the text to label.
+
+        Returns
+        -------
+        A string which is 'empty', 'english' or 'foreign'.
+        """
+        words = self.word_pattern.findall(self.ignored_pattern.sub(" ", text))
+        if (len(words) == 0):
+            return "empty"
+        # Any accent or non-latin letter means that it's not English
+        if (not all(word.isascii() for word in words)):
+            return "foreign"
+        n_english_words = len([word for word in words if word.lower() in self.english_words])
+        return "english" if n_english_words/len(words) >= self.threshold else "foreign"
+
+    def detect_many(self, texts):
+        """
+        Labels a list of texts in order to know which of them should be translated.
+
+        Parameters
+        ----------
+        texts : list of str
+            It's the list of texts to label.
+
+        Raises
+        ------
+        TextListNotFound
+            If the provided texts are not in a list.
+        InvalidTextList
+            If the provided list of texts are not strings.
+
+        Returns
+        -------
+        A list with the label of each text in the same order.
+        """
+        if (type(texts) != list):
+            raise TextListNotFound("ERROR. The texts to label should be in a list.")
+        if (not all(isinstance(text, str) for text in texts)):
+            raise InvalidTextList("ERROR. All texts to label should be strings.")
+        return [self.detect(text) for text in texts]
@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Classes which limit the rate of the requests sent to an external service:
+    - TokenBucket, which limits the requests to a service such as a translator.
+    Instead of waiting a fixed amount of time after each request, the bucket
+    allows bursts up to its capacity and then refills the tokens at a constant rate.
+    - RateLimiter, which has a token bucket per account of a service such as
+    Instagram, so the requests of the same account are limited together even if
+    they're sent by different threads. When a request is rejected, it's sent again
+    after an exponential backoff with jitter, so only the failed request is retried.
+
+@author: Lidia Sánchez Mérida
+"""
+import random
+import threading
+import time
+from exceptions import InvalidLimit, MaxRequestsExceed
+
+class TokenBucket:
+
+    def __init__(self, rate, capacity=1, clock=time.monotonic, sleep=time.sleep):
+        """
+        Creates a TokenBucket object whose attributes are:
+            - The number of tokens which are added per second.
+            - The maximum number of tokens of the bucket.
+            - The current number of tokens and when they were updated.
+            - The functions to get the current time and to wait.
+            - A lock to share the bucket between many threads.
+
+        Parameters
+        ----------
+        rate : float
+            It's the number of tokens which are added per second.
+        capacity : int, optional
+            It's the maximum number of tokens, so the maximum burst. The default is 1.
+        clock : function, optional
+            It's the function which returns the current time in seconds.
+        sleep : function, optional
+            It's the function to wait a number of seconds.
+
+        Raises
+        ------
+        InvalidLimit
+            If the provided rate or capacity are not positive numbers.
+
+        Returns
+        -------
+        A TokenBucket object.
+        """
+        if (not isinstance(rate, (int, float)) or rate <= 0):
+            raise InvalidLimit("ERROR. The rate should be a number greater than 0.")
+        if (type(capacity) != int or capacity <= 0):
+            raise InvalidLimit("ERROR. The capacity should be a number greater than 0.")
+
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.clock = clock
+        self.sleep = sleep
+        self.updated_at = clock()
+        self.lock = threading.Lock()
+
+    def refill(self):
+        """
+        Adds the tokens generated since the last update without exceeding the
+        capacity of the bucket. The lock should be acquired before calling it.
+        """
+        now = self.clock()
+        self.tokens = min(self.capacity, self.tokens+(now-self.updated_at)*self.rate)
+        self.updated_at = now
+
+    def try_acquire(self, tokens=1):
+        """
+        Takes the provided number of tokens if they're avalaible without waiting.
+
+        Returns
+        -------
+        True if the tokens have been taken, False if they haven't.
+        """
+        with self.lock:
+            self.refill()
+            if (self.tokens >= tokens):
+                self.tokens -= tokens
+                return True
+            return False
+
+    def acquire(self, tokens=1):
+        """
+        Takes the provided number of tokens, waiting until they're avalaible.
+
+        Parameters
+        ----------
+        tokens : int, optional
+            It's the number of tokens to take. The default is 1.
+
+        Raises
+        ------
+        InvalidLimit
+            If the number of tokens is greater than the capacity of the bucket.
+
+        Returns
+        -------
+        A float with the number of seconds it has waited.
+        """
+        if (tokens > self.capacity):
+            raise InvalidLimit("ERROR. The tokens to take should not exceed the capacity.")
+
+        waited = 0.0
+        while True:
+            with self.lock:
+                self.refill()
+                if (self.tokens >= tokens):
+                    self.tokens -= tokens
+                    return waited
+                wait_time = (tokens-self.tokens)/self.rate
+            self.sleep(wait_time)
+            waited += wait_time
+
+
+class RateLimiter:
+
+    def __init__(self, rate, capacity=1, max_retries=5, base_delay=30, max_delay=900,
+                 clock=time.monotonic, sleep=time.sleep, jitter=random.random):
+        """
+        Creates a RateLimiter object whose attributes are:
+            - The rate and the capacity of the token bucket of each account.
+            - The token buckets of the accounts which have sent requests.
+            - The maximum number of retries of a rejected request.
+            - The delay before the first retry and the maximum delay.
+            - The functions to get the current time, to wait and to get a random
+            number between 0 and 1 for the jitter.
+            - A lock to create the token buckets from many threads.
+
+        Parameters
+        ----------
+        rate : float
+            It's the number of requests per second of each account.
+        capacity : int, optional
+            It's the maximum number of requests of a burst. The default is 1.
+        max_retries : int, optional
+            It's the maximum number of retries of a rejected request. The default is 5.
+        base_delay : float, optional
+            It's the number of seconds before the first retry, which is doubled
+            for each retry. The default is 30.
+        max_delay : float, optional
+            It's the maximum number of seconds before a retry. The default is 900.
+        clock : function, optional
+            It's the function which returns the current time in seconds.
+        sleep : function, optional
+            It's the function to wait a number of seconds.
+        jitter : function, optional
+            It's the function which returns a random number between 0 and 1.
+
+        Raises
+        ------
+        InvalidLimit
+            If the provided rate, capacity, retries or delays are not valid.
+
+        Returns
+        -------
+        A RateLimiter object.
+        """
+        if (type(max_retries) != int or max_retries < 0):
+            raise InvalidLimit("ERROR. The number of retries should be a positive number.")
+        if (not isinstance(base_delay, (int, float)) or not isinstance(max_delay, (int, float)) or
+            base_delay < 0 or max_delay < base_delay):
+            raise InvalidLimit("ERROR. The delays should be positive numbers and the maximum the greatest.")
+        # Check the rate and the capacity of the buckets
+        TokenBucket(rate, capacity, clock, sleep)
+
+        self.rate = rate
+        self.capacity = capacity
+        self.buckets = {}
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.clock = clock
+        self.sleep = sleep
+        self.jitter = jitter
+        self.lock = threading.Lock()
+
+    def get_bucket(self, account):
+        """
+        Gets the token bucket of an account, which is created the first time.
+        """
+        with self.lock:
+            if (account not in self.buckets):
+                self.buckets[account] = TokenBucket(self.rate, self.capacity, self.clock, self.sleep)
+            return self.buckets[account]
+
+    def get_delay(self, retry):
+        """
+        Gets the seconds to wait before a retry. The delay is doubled for each
+        retry up to the maximum, and half of it is random so the rejected requests
+        of many threads are not retried at the same time.
+        """
+        delay = min(self.max_delay, self.base_delay*2**retry)
+        return delay/2+delay/2*self.jitter()
+
+    def send(self, account, request, is_accepted, is_throttled=None):
+        """
+        Sends a request of an account when the token bucket of the account allows
+        it. If the request is rejected because of the limit of requests, it's
+        sent again after a backoff.
+
+        Parameters
+        ----------
+        account : str
+            It's the account which sends the request.
+        request : function
+            It's the function which sends the request.
+        is_accepted : function
+            It's the function which checks if the last request has been accepted.
+        is_throttled : function, optional
+            It's the function which checks if the last rejected request has been
+            rejected because of the limit of requests. The other rejected requests
+            are not sent again. The default is None, so every rejected request
+            is sent again.
+
+        Raises
+        ------
+        MaxRequestsExceed
+            If the request is still rejected after the maximum number of retries.
+
+        Returns
+        -------
+        The value returned by the request, which could have been rejected for a
+        reason other than the limit of requests.
+        """
+        bucket = self.get_bucket(account)
+        for retry in range(0, self.max_retries+1):
+            bucket.acquire()
+            result = request()
+            if (is_accepted() or (is_throttled != None and not is_throttled())):
+                return result
+            if (retry < self.max_retries):
+                self.sleep(self.get_delay(retry))
+        raise MaxRequestsExceed("Max requests exceed. Wait to send more.")
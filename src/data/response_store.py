@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Classes which record the raw responses of the LevPasha Instagram API and replay
+them without connecting to Instagram:
+    - ResponseStore, which stores the responses of each user and day in a JSON
+    Lines file compressed with gzip.
+    - RecordingConnection, which wraps a connection to the API and stores the
+    response of each request of the profiles, the posts and the comments.
+    - ReplayConnection, which answers the same requests with the recorded
+    responses at once, so the download and the analyses of the user data can
+    be measured offline.
+
+@author: Lidia Sánchez Mérida
+"""
+import gzip
+import json
+import os
+import threading
+import time
+from datetime import datetime
+from exceptions import UsernameNotFound
+
+class ResponseStore:
+
+    def __init__(self, folder):
+        """
+        Creates a ResponseStore object whose attributes are:
+            - The folder which contains a subfolder per day with a file per user.
+            - A lock to write the files from many threads.
+
+        Parameters
+        ----------
+        folder : str
+            It's the path to the folder of the recorded responses.
+
+        Returns
+        -------
+        A ResponseStore object.
+        """
+        self.folder = folder
+        self.lock = threading.Lock()
+
+    def get_path(self, username, day):
+        """
+        Gets the path to the file of a user and a day with the format dd-mm-YYYY.
+
+        Raises
+        ------
+        UsernameNotFound
+            If the provided username is not a valid name of a file.
+        """
+        if (type(username) != str or username in ("", ".", "..") or os.sep in username or "/" in username):
+            raise UsernameNotFound("ERROR. The username should be a non-empty string.")
+        return os.path.join(self.folder, day, username+".jsonl.gz")
+
+    def record(self, username, request, args, response, day=None):
+        """
+        Appends a response to the file of a user and a day.
+
+        Parameters
+        ----------
+        username : str
+            It's the user whose data have been requested.
+        request : str
+            It's the name of the method of the connection which sent the request.
+        args : list
+            They're the values of the request.
+        response : dict
+            It's the raw response of the API.
+        day : str, optional
+            It's the day with the format dd-mm-YYYY. The default is None, so the
+            current day will be used.
+
+        Returns
+        -------
+        The path to the file of the user and the day.
+        """
+        day = datetime.now().strftime("%d-%m-%Y") if day == None else day
+        path = self.get_path(username, day)
+        line = json.dumps({"request":request, "args":list(args), "response":response, "time":time.time()})
+        with self.lock:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Each append adds a new gzip member, which is read as a single file
+            with gzip.open(path, "at", encoding="utf-8") as responses_file:
+                responses_file.write(line+"\n")
+        return path
+
+    def load(self, username, day):
+        """
+        Reads the responses recorded for a user during a day.
+
+        Returns
+        -------
+        A list of dicts with the request, its values, the response and the time
+        of each recorded response, sorted by time.
+        """
+        path = self.get_path(username, day)
+        if (not os.path.exists(path)):
+            return []
+        with gzip.open(path, "rt", encoding="utf-8") as responses_file:
+            return [json.loads(line) for line in responses_file if line.strip() != ""]
+
+    def get_days(self):
+        """
+        Gets the days which have recorded responses.
+        """
+        if (not os.path.exists(self.folder)):
+            return []
+        return sorted(os.listdir(self.folder), key=lambda day: datetime.strptime(day, "%d-%m-%Y"))
+
+    def get_users(self, day):
+        """
+        Gets the users which have recorded responses during a day.
+        """
+        day_folder = os.path.join(self.folder, day)
+        if (not os.path.exists(day_folder)):
+            return []
+        return sorted(name[:-len(".jsonl.gz")] for name in os.listdir(day_folder) if name.endswith(".jsonl.gz"))
+
+class RecordingConnection:
+
+    def __init__(self, connection, store):
+        """
+        Creates a RecordingConnection object whose attributes are:
+            - The wrapped connection to the LevPasha Instagram API.
+            - The store of the responses.
+            - The usernames of the user ids whose profiles have been requested,
+            in order to store the posts and the comments in the file of the user.
+
+        Parameters
+        ----------
+        connection : InstagramAPI
+            It's the connection to the LevPasha Instagram API.
+        store : ResponseStore
+            It's the store of the responses.
+
+        Returns
+        -------
+        A RecordingConnection object.
+        """
+        self.connection = connection
+        self.store = store
+        self.usernames = {}
+
+    def __getattr__(self, name):
+        """
+        Gets the attributes of the wrapped connection, such as its last response.
+        """
+        return getattr(self.__dict__["connection"], name)
+
+    def searchUsername(self, username):
+        result = self.connection.searchUsername(username)
+        if ('user' in self.connection.LastJson):
+            self.usernames[self.connection.LastJson['user']['pk']] = username
+        self.store.record(username, "searchUsername", [username], self.connection.LastJson)
+        return result
+
+    def getUserFeed(self, user_id, max_id=""):
+        result = self.connection.getUserFeed(user_id, max_id)
+        self.store.record(self.usernames.get(user_id, str(user_id)), "getUserFeed", [user_id, max_id],
+                          self.connection.LastJson)
+        return result
+
+    def getMediaComments(self, id_media):
+        result = self.connection.getMediaComments(id_media)
+        # The media ids of Instagram end with the id of their owner
+        owner = str(id_media).split("_")[-1]
+        username = self.usernames.get(int(owner), owner) if owner.isdigit() else owner
+        self.store.record(username, "getMediaComments", [id_media], self.connection.LastJson)
+        return result
+
+class ReplayConnection:
+
+    def __init__(self, store, day=None):
+        """
+        Creates a ReplayConnection object whose attributes are:
+            - The accepted responses of each request, which are the last recorded
+            ones of the provided day or of all the days.
+            - The last response, as the LevPasha Instagram API.
+            - The number of replayed requests.
+
+        Parameters
+        ----------
+        store : ResponseStore
+            It's the store of the recorded responses.
+        day : str, optional
+            It's the day of the responses with the format dd-mm-YYYY. The default
+            is None, so the responses of all the days are replayed, and the ones
+            of the last day replace the previous ones.
+
+        Returns
+        -------
+        A ReplayConnection object.
+        """
+        self.username = "replay"
+        self.responses = {}
+        self.LastJson = {}
+        self.n_requests = 0
+        for replay_day in (store.get_days() if day == None else [day]):
+            for username in store.get_users(replay_day):
+                for item in store.load(username, replay_day):
+                    if (str(item["response"].get("status", "")).lower() == "ok"):
+                        self.responses[(item["request"], json.dumps(item["args"]))] = item["response"]
+
+    def replay(self, request, args):
+        """
+        Answers a request with its recorded response. If it has not been recorded,
+        the request is rejected.
+        """
+        self.n_requests += 1
+        self.LastJson = self.responses.get((request, json.dumps(args)),
+                                           {"status":"fail", "message":"The request has not been recorded."})
+        return self.LastJson["status"] == "ok"
+
+    def searchUsername(self, username):
+        return self.replay("searchUsername", [username])
+
+    def getUserFeed(self, user_id, max_id=""):
+        return self.replay("getUserFeed", [user_id, max_id])
+
+    def getMediaComments(self, id_media):
+        return self.replay("getMediaComments", [id_media])
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Class which contains the shared registry of the sentiment analysis models. The
+pre-trained Flair model takes several hundreds of MB in memory and a few seconds
+to be deserialized from disk, so it will be loaded only once per process, the
+first time it's required, and then reused by every DataAnalyzer object, Dash
+callback and Huey task of the same process.
+    - The Flair pre-trained model to classify the sentiment of a text.
+    - The VADER lexicon to classify the texts which the previous model could not label.
+
+@author: Lidia Sánchez Mérida
+"""
+import os
+import threading
+import time
+
+class SentimentModels:
+
+    def __init__(self, flair_model_name="sentiment"):
+        """
+        Creates a SentimentModels object whose attributes are:
+            - The name of the Flair pre-trained model to load.
+            - The version of the models, which identifies the results they return.
+            - The loaded models, which will be None until they're required.
+            - A lock to load each model only once even if many threads ask for it.
+            - The load statistics of each model: the time it took to load it
+            and the resident memory of the process before and after loading it.
+
+        Parameters
+        ----------
+        flair_model_name : str, optional
+            It's the name of the Flair pre-trained model to load. The default is "sentiment".
+
+        Returns
+        -------
+        A SentimentModels object.
+        """
+        self.flair_model_name = flair_model_name
+        self.model_version = "flair-"+flair_model_name+"+vader"
+        self.flair_model = None
+        self.vader_model = None
+        self.lock = threading.Lock()
+        self.load_stats = {}
+
+    def get_resident_memory(self):
+        """
+        Gets the current resident memory of the process from /proc/self/statm,
+        whose second field is the number of resident pages.
+
+        Returns
+        -------
+        A float which is the resident memory in MB or None if the system doesn't
+        provide the /proc filesystem.
+        """
+        try:
+            with open("/proc/self/statm", "r") as statm_file:
+                resident_pages = int(statm_file.read().split()[1])
+        except (OSError, IndexError, ValueError): # pragma no cover
+            return None
+        return round(resident_pages*os.sysconf("SC_PAGE_SIZE")/(1024*1024), 2)
+
+    def load_model(self, model, loader):
+        """
+        Loads a model by using the provided function and saves the time it took
+        as well as the resident memory of the process before and after loading it.
+
+        Parameters
+        ----------
+        model : str
+            It's the name of the model to save its statistics.
+        loader : function
+            It's the function which loads and returns the model.
+
+        Returns
+        -------
+        The loaded model.
+        """
+        memory_before = self.get_resident_memory()
+        start = time.perf_counter()
+        loaded_model = loader()
+        self.load_stats[model] = {"load_time":round(time.perf_counter()-start, 3),
+                                  "rss_before":memory_before,
+                                  "rss_after":self.get_resident_memory()}
+        return loaded_model
+
+    def get_flair_model(self):
+        """
+        Gets the Flair pre-trained model. It will be loaded the first time it's
+        required and then reused.
+
+        Returns
+        -------
+        A Flair TextClassifier object.
+        """
+        if (self.flair_model == None):
+            with self.lock:
+                # Another thread could have loaded it while this one was waiting
+                if (self.flair_model == None):
+                    from flair.models import TextClassifier
+                    self.flair_model = self.load_model("flair",
+                        lambda: TextClassifier.load(self.flair_model_name))
+        return self.flair_model
+
+    def get_vader_model(self):
+        """
+        Gets the VADER analyzer based on lexicon. The lexicon will be downloaded,
+        if it's not already, and loaded the first time it's required.
+
+        Returns
+        -------
+        A SentimentIntensityAnalyzer object.
+        """
+        if (self.vader_model == None):
+            with self.lock:
+                if (self.vader_model == None):
+                    import nltk
+                    from nltk.sentiment.vader import SentimentIntensityAnalyzer
+                    def load_vader():
+                        nltk.download('vader_lexicon', quiet=True)
+                        return SentimentIntensityAnalyzer()
+                    self.vader_model = self.load_model("vader", load_vader)
+        return self.vader_model
+
+    def warm_up(self):
+        """
+        Loads every model in advance. It's meant to be called when a process
+        boots, such as a Gunicorn worker or the Huey consumer, so the first
+        request does not have to wait for the models.
+
+        Returns
+        -------
+        A dict with the load statistics of each model.
+        """
+        self.get_flair_model()
+        self.get_vader_model()
+        return self.get_stats()
+
+    def get_stats(self):
+        """
+        Gets the load statistics of the models as well as the current resident
+        memory of the process.
+
+        Returns
+        -------
+        A dict whose keys are the loaded models and the current resident memory.
+        """
+        stats = {model:dict(values) for model, values in self.load_stats.items()}
+        stats["rss"] = self.get_resident_memory()
+        return stats
+
+# Shared registry for the whole process
+sentiment_models = SentimentModels()
+
+def warm_up():
+    """
+    Loads the sentiment models of the shared registry of the current process.
+
+    Returns
+    -------
+    A dict with the load statistics of each model.
+    """
+    return sentiment_models.warm_up()
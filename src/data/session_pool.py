@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Class which contains a pool of sessions of several Instagram accounts, which are
+leased to the workers which download the user data at the same time:
+    - Each account has its own session file and its own token bucket in the rate
+    limiter, so the number of requests per second grows with the number of accounts.
+    - Each account has a budget of requests per window of time, which is enforced
+    on every request of a lease. The account with the greatest remaining budget
+    is leased first.
+    - When the requests of an account are rejected, the account cools down for
+    some time and the next lease rotates to another account.
+
+@author: Lidia Sánchez Mérida
+"""
+import os
+import threading
+import time
+from api import Api
+from rate_limiter import RateLimiter
+from exceptions import InvalidCredentials, InvalidPoolSize, MaxRequestsExceed
+
+class SessionPool:
+
+    def __init__(self, credentials=None, rate_limiter=None, max_requests=200, window=3600,
+                 cooldown=900, session_folder=".", clock=time.monotonic, api_factory=Api):
+        """
+        Creates a SessionPool object whose attributes are:
+            - The sessions of the Instagram accounts, which have the credentials,
+            the connected API object, if it's leased, the remaining requests of the
+            current window and when the cooldown of the account finishes.
+            - The rate limiter shared by the API objects of all the accounts.
+            - The budget of requests per window, the length of the window and the
+            cooldown in seconds.
+            - The folder which stores the session files of the accounts.
+            - The functions to get the current time and to create the API objects.
+            - A condition to wait until an account is released.
+
+        Parameters
+        ----------
+        credentials : list of tuples, optional
+            They're the usernames and passwords of the accounts. The default is None,
+            so they'll be read from the env variables INSTAGRAM_USER and INSTAGRAM_PSWD,
+            INSTAGRAM_USER2 and INSTAGRAM_PSWD2, and so on.
+        rate_limiter : RateLimiter, optional
+            It's the rate limiter of the requests. The default is None, so a new
+            one which allows a request every 20 seconds per account will be created.
+        max_requests : int, optional
+            It's the number of requests of each account per window. The default is 200.
+        window : float, optional
+            It's the number of seconds of each window. The default is 3600.
+        cooldown : float, optional
+            It's the number of seconds that an account is not leased after its
+            requests have been rejected. The default is 900.
+        session_folder : str, optional
+            It's the folder of the session files. The default is the current one.
+        clock : function, optional
+            It's the function which returns the current time in seconds.
+        api_factory : function, optional
+            It's the function which creates an API object from a rate limiter.
+            The default is the Api class.
+
+        Raises
+        ------
+        InvalidCredentials
+            If there aren't credentials or they're not pairs of non-empty strings.
+        InvalidPoolSize
+            If the budget of requests, the window or the cooldown are not positive.
+
+        Returns
+        -------
+        A SessionPool object.
+        """
+        if (credentials == None):
+            credentials = self.get_env_credentials()
+        if (type(credentials) != list or len(credentials) == 0 or
+            not all(isinstance(item, tuple) and len(item) == 2 and
+                    all(isinstance(value, str) and value != "" for value in item) for item in credentials)):
+            raise InvalidCredentials("ERROR. The credentials should be a non-empty list of usernames and passwords.")
+        if (type(max_requests) != int or max_requests <= 0):
+            raise InvalidPoolSize("ERROR. The budget of requests should be a number greater than 0.")
+        if (not isinstance(window, (int, float)) or not isinstance(cooldown, (int, float)) or
+            window <= 0 or cooldown < 0):
+            raise InvalidPoolSize("ERROR. The window and the cooldown should be positive numbers of seconds.")
+
+        now = clock()
+        self.sessions = [{"username":username, "pswd":pswd, "api":None, "leased":False,
+                          "remaining":max_requests, "window_start":now, "cooldown_until":now}
+                         for username, pswd in credentials]
+        self.rate_limiter = RateLimiter(rate=0.05) if rate_limiter == None else rate_limiter
+        self.max_requests = max_requests
+        self.window = window
+        self.cooldown = cooldown
+        self.session_folder = session_folder
+        self.clock = clock
+        self.api_factory = api_factory
+        self.released = threading.Condition()
+
+    def get_env_credentials(self):
+        """
+        Gets the credentials of the Instagram accounts from the env variables
+        INSTAGRAM_USER and INSTAGRAM_PSWD, INSTAGRAM_USER2 and INSTAGRAM_PSWD2,
+        and so on, until one of them is not set.
+
+        Returns
+        -------
+        A list of tuples with the username and password of each account.
+        """
+        credentials = []
+        suffix = ""
+        while (os.environ.get("INSTAGRAM_USER"+suffix) and os.environ.get("INSTAGRAM_PSWD"+suffix)):
+            credentials.append((os.environ["INSTAGRAM_USER"+suffix], os.environ["INSTAGRAM_PSWD"+suffix]))
+            suffix = str(len(credentials)+1)
+        return credentials
+
+    def get_available_at(self, session, now):
+        """
+        Gets when a session which is not leased could be leased. Its budget is
+        renewed if its window has finished. The condition should be acquired
+        before calling it.
+        """
+        if (now-session["window_start"] >= self.window):
+            session["window_start"] = now
+            session["remaining"] = self.max_requests
+        if (session["remaining"] <= 0):
+            return max(session["cooldown_until"], session["window_start"]+self.window)
+        return session["cooldown_until"]
+
+    def lease(self, max_wait=0):
+        """
+        Leases the session of an account which is not leased, has not been rejected
+        recently and has remaining requests. If some accounts are leased, it waits
+        until one of them is released or another one is available.
+
+        Parameters
+        ----------
+        max_wait : float, optional
+            It's the maximum number of seconds to wait for an account which is
+            cooling down or has no remaining requests, when none of them is
+            leased. The default is 0.
+
+        Raises
+        ------
+        MaxRequestsExceed
+            If none of the accounts could be leased in the maximum time.
+        InvalidCredentials
+            If the account could not be connected.
+
+        Returns
+        -------
+        An API object connected to the leased account, which raises MaxRequestsExceed
+        once the remaining requests of the account have been sent.
+        """
+        deadline = self.clock()+max_wait
+        with self.released:
+            while True:
+                now = self.clock()
+                free_sessions = [session for session in self.sessions if not session["leased"]]
+                available = [session for session in free_sessions if self.get_available_at(session, now) <= now]
+                if (len(available) > 0):
+                    session = max(available, key=lambda session: session["remaining"])
+                    session["leased"] = True
+                    break
+                # Wait for the first account which is released or available. If
+                # none is leased, only the accounts available in time are waited
+                available_at = min([self.get_available_at(session, now) for session in free_sessions],
+                                   default=None)
+                if (len(free_sessions) == len(self.sessions) and available_at > deadline):
+                    raise MaxRequestsExceed("Max requests exceed in all the accounts. Wait to send more.")
+                self.released.wait(None if available_at == None else available_at-now)
+
+        # The account is connected out of the condition the first time
+        try:
+            if (session["api"] == None):
+                api = self.api_factory(self.rate_limiter)
+                api.connect_levpasha_instagram_account(session["username"], session["pswd"],
+                    os.path.join(self.session_folder, "levpasha_session_"+session["username"]+".txt"))
+                session["api"] = api
+        except Exception:
+            self.release(session, rejected=True)
+            raise
+        session["requests_at_lease"] = session["api"].n_requests
+        session["api"].max_requests = session["api"].n_requests+session["remaining"]
+        return session["api"]
+
+    def get_session(self, api):
+        """
+        Gets the session of an API object.
+        """
+        return next(session for session in self.sessions if session["api"] is api)
+
+    def release(self, api, rejected=False):
+        """
+        Releases the session of an account and subtracts the sent requests from
+        its budget.
+
+        Parameters
+        ----------
+        api : Api
+            It's the API object which has been leased, or its session.
+        rejected : bool, optional
+            If it's True the requests of the account have been rejected, so it
+            won't be leased until its cooldown has finished. The default is False.
+
+        Returns
+        -------
+        A dict with the session of the account.
+        """
+        with self.released:
+            session = api if isinstance(api, dict) else self.get_session(api)
+            if (session["api"] != None):
+                session["remaining"] -= session["api"].n_requests-session.get("requests_at_lease", 0)
+            if (rejected):
+                session["cooldown_until"] = self.clock()+self.cooldown
+            session["leased"] = False
+            self.released.notify()
+            return session
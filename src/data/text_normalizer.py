@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Class which normalizes the translated texts before analyzing their sentiment:
+    - Remove specific stopwords like some prepositions, pronouns, etc.
+    - Remove numbers.
+    - Remove some useless special characters.
+The stopwords are indexed in a frozenset, whereas the numbers and the special
+characters are processed in a single str.translate pass whose table is built
+once per process the first time a text is normalized, so there are not any
+regular expressions to run per text.
+
+@author: Lidia Sánchez Mérida
+"""
+import functools
+import sys
+import unicodedata
+from exceptions import InvalidTextList
+
+# Characters which are replaced by a blank space
+SPECIAL_CHARACTERS = '#@"-*$%&+_'
+
+def build_translation_table(special_characters=SPECIAL_CHARACTERS):
+    """
+    Builds the table to remove every decimal digit, as the regular expression
+    '\\d' does, and to replace the special characters by a blank space.
+
+    Returns
+    -------
+    A dict whose keys are Unicode code points and whose values are their replacement.
+    """
+    table = {code:None for code in range(0, sys.maxunicode+1)
+             if unicodedata.category(chr(code)) == "Nd"}
+    table.update({ord(character):" " for character in special_characters})
+    return table
+
+@functools.lru_cache(maxsize=None)
+def get_translation_table():
+    """
+    Gets the table of the default special characters. Scanning every Unicode
+    code point takes about 0.2 seconds, so the table is built the first time
+    it's used in each process instead of when the module is imported.
+    """
+    return build_translation_table()
+
+class TextNormalizer:
+
+    def __init__(self, stopwords):
+        """
+        Creates a TextNormalizer object whose attributes are:
+            - The set of stopwords to remove from the texts in lower case.
+            - The table to remove the numbers and replace the special characters,
+            which is got the first time a text is normalized.
+
+        Parameters
+        ----------
+        stopwords : list of str
+            It's the list of stopwords in lower case.
+
+        Returns
+        -------
+        A TextNormalizer object.
+        """
+        self.stopwords = frozenset(stopwords)
+        self.translation_table = None
+
+    def normalize(self, text):
+        """
+        Normalizes a text by removing the stopwords, the numbers and the special
+        characters.
+
+        Parameters
+        ----------
+        text : str
+            It's the text to normalize.
+
+        Returns
+        -------
+        A string with the normalized text.
+        """
+        if (self.translation_table == None):
+            self.translation_table = get_translation_table()
+        stopwords = self.stopwords
+        non_stopwords = ' '.join([word for word in text.split() if word.lower() not in stopwords])
+        return non_stopwords.translate(self.translation_table)
+
+    def normalize_many(self, texts):
+        """
+        Normalizes an iterable of texts lazily.
+
+        Parameters
+        ----------
+        texts : iterable of str
+            It's the iterable of texts to normalize.
+
+        Raises
+        ------
+        InvalidTextList
+            If any of the provided texts is not a string.
+
+        Returns
+        -------
+        A generator of the normalized texts in the same order.
+        """
+        for text in texts:
+            if (type(text) != str):
+                raise InvalidTextList("ERROR. All texts to normalize should be strings.")
+            yield self.normalize(text)
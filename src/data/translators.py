@@ -0,0 +1,273 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Classes which translate the texts to English before cleaning them. The translation
+is split in three pieces so each one of them could be replaced:
+    - The backends, which translate a batch of texts by using a specific service.
+    Google Translate is used for the real texts, whereas a local dictionary
+    backend allows to run the tests and the offline executions without the API.
+    - The cache, which stores the translations in a SQLite file in the disk so
+    a text is only translated once.
+    - The service, which gets the cached translations and sends the rest of the
+    texts to the backend in batches limited by a token bucket.
+
+@author: Lidia Sánchez Mérida
+"""
+import os
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from exceptions import TextListNotFound, InvalidTextList
+from rate_limiter import TokenBucket
+
+class TranslatorBackend(ABC):
+    """
+    Interface of the translator backends. Each backend should have a name to
+    identify its translations in the cache and translate a batch of texts.
+    """
+    name = "backend"
+
+    @abstractmethod
+    def translate_batch(self, texts):
+        """
+        Translates a batch of texts to English.
+
+        Parameters
+        ----------
+        texts : list of str
+            It's the list of texts to translate.
+
+        Returns
+        -------
+        A list with the translated texts in the same order.
+        """
+
+class DictionaryTranslatorBackend(TranslatorBackend):
+    """
+    Local backend which translates the texts by using a dictionary. The texts
+    which are not in the dictionary are returned as they are, so without a
+    dictionary it does not translate anything.
+    """
+    name = "dictionary"
+
+    def __init__(self, dictionary=None):
+        self.dictionary = dictionary if dictionary != None else {}
+        self.n_calls = 0
+
+    def translate_batch(self, texts):
+        self.n_calls += 1
+        return [self.dictionary.get(text, text) for text in texts]
+
+class GoogleTranslatorBackend(TranslatorBackend):
+    """
+    Backend which translates the texts by using Google Translate. The texts of
+    a batch are joined in a single request by separating them with line breaks.
+    """
+    name = "google"
+
+    def __init__(self, max_chars=4500):
+        # Imported here so the rest of backends do not require the library
+        from google_trans_new import google_translator
+        self.translator = google_translator()
+        self.max_chars = max_chars
+
+    def translate_batch(self, texts):
+        # The line breaks of each text are the separator of the batch
+        texts = [" ".join(text.split()) for text in texts]
+        translations = []
+        chunk = []
+        for text in texts + [None]:
+            # Send the current chunk when the next text does not fit or there are not more texts
+            if (len(chunk) > 0 and (text == None or len("\n".join(chunk+[text])) > self.max_chars)):
+                translations.extend(self.translate_chunk(chunk))
+                chunk = []
+            if (text != None):
+                chunk.append(text)
+        return translations
+
+    def translate_chunk(self, chunk):
+        """
+        Translates a set of texts in one request. If the translator merges or
+        splits any line, each text will be translated separately.
+        """
+        translated_lines = self.translator.translate("\n".join(chunk), lang_tgt="en").strip().split("\n")
+        if (len(translated_lines) != len(chunk)): # pragma no cover
+            return [self.translator.translate(text, lang_tgt="en").strip() for text in chunk]
+        return [line.strip() for line in translated_lines]
+
+class TranslationCache:
+
+    def __init__(self, path=":memory:"):
+        """
+        Creates a TranslationCache object whose attributes are:
+            - The SQLite database in which the translations are stored.
+            - A lock to share the database connection between many threads.
+
+        Parameters
+        ----------
+        path : str, optional
+            It's the file of the SQLite database. The default is ":memory:",
+            so the translations are not stored in the disk.
+
+        Returns
+        -------
+        A TranslationCache object.
+        """
+        self.path = path
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.execute("CREATE TABLE IF NOT EXISTS translations ("+
+                                "backend TEXT NOT NULL, source_text TEXT NOT NULL, "+
+                                "translated_text TEXT NOT NULL, PRIMARY KEY (backend, source_text))")
+        self.connection.commit()
+
+    def get_translations(self, backend, texts):
+        """
+        Gets the stored translations of a list of texts for a specific backend.
+
+        Returns
+        -------
+        A dict whose keys are the source texts and whose values are their translations.
+        The texts which have not been translated are not included.
+        """
+        translations = {}
+        texts = list(dict.fromkeys(texts))
+        with self.lock:
+            # SQLite limits the number of parameters of each query
+            for i in range(0, len(texts), 500):
+                chunk = texts[i:i+500]
+                rows = self.connection.execute("SELECT source_text, translated_text FROM translations "+
+                    "WHERE backend=? AND source_text IN ("+",".join("?"*len(chunk))+")", [backend]+chunk)
+                translations.update(rows.fetchall())
+        return translations
+
+    def store_translations(self, backend, translations):
+        """
+        Stores the translations of a set of texts for a specific backend.
+
+        Parameters
+        ----------
+        backend : str
+            It's the name of the backend which has translated the texts.
+        translations : dict
+            It's the dict whose keys are the source texts and whose values are
+            their translations.
+        """
+        with self.lock:
+            self.connection.executemany("INSERT OR REPLACE INTO translations (backend, source_text, translated_text) "+
+                                        "VALUES (?, ?, ?)", [(backend, source, translated)
+                                        for source, translated in translations.items()])
+            self.connection.commit()
+
+    def size(self):
+        """
+        Gets the number of stored translations.
+        """
+        with self.lock:
+            return self.connection.execute("SELECT count(*) FROM translations").fetchone()[0]
+
+class TranslationService:
+
+    def __init__(self, backend, cache=None, rate_limiter=None, batch_size=50):
+        """
+        Creates a TranslationService object whose attributes are:
+            - The backend which translates the texts.
+            - The cache of the translations.
+            - The token bucket which limits the number of requests to the backend.
+            - The maximum number of texts of each request to the backend.
+            - The number of cached texts, translated texts, requests and failed texts.
+
+        Parameters
+        ----------
+        backend : TranslatorBackend
+            It's the backend which translates the texts.
+        cache : TranslationCache, optional
+            It's the cache of the translations. The default is None, so the
+            translations are stored in memory.
+        rate_limiter : TokenBucket, optional
+            It's the token bucket to limit the requests to the backend. The default
+            is None, so the requests are not limited.
+        batch_size : int, optional
+            It's the maximum number of texts of each request. The default is 50.
+
+        Returns
+        -------
+        A TranslationService object.
+        """
+        self.backend = backend
+        self.cache = cache if cache != None else TranslationCache()
+        self.rate_limiter = rate_limiter
+        self.batch_size = batch_size
+        self.stats = {"cached":0, "translated":0, "requests":0, "failed":0}
+
+    def translate_with_retry(self, batch):
+        """
+        Translates a batch of texts by using the backend. If the request fails,
+        it will be retried once and then the texts will not be translated.
+
+        Returns
+        -------
+        A list with the translations or None if they could not be translated.
+        """
+        for attempt in range(0, 2):
+            if (self.rate_limiter != None):
+                self.rate_limiter.acquire()
+            self.stats["requests"] += 1
+            try:
+                return self.backend.translate_batch(batch)
+            except Exception: # pragma no cover
+                continue
+        return None # pragma no cover
+
+    def translate(self, texts):
+        """
+        Translates a list of texts to English. The translations which are not
+        cached are requested to the backend in batches.
+
+        Parameters
+        ----------
+        texts : list of str
+            It's the list of texts to translate.
+
+        Raises
+        ------
+        TextListNotFound
+            If the provided texts are not in a list.
+        InvalidTextList
+            If the provided list of texts are not strings.
+
+        Returns
+        -------
+        A list with the translated texts in the same order. The texts which could
+        not be translated are returned as they are.
+        """
+        if (type(texts) != list):
+            raise TextListNotFound("ERROR. The texts to translate should be in a list.")
+        if (not all(isinstance(text, str) for text in texts)):
+            raise InvalidTextList("ERROR. All texts to translate should be strings.")
+
+        translations = self.cache.get_translations(self.backend.name, texts)
+        self.stats["cached"] += len(texts)-len([text for text in texts if text not in translations])
+        pending_texts = [text for text in dict.fromkeys(texts) if text not in translations]
+        for i in range(0, len(pending_texts), self.batch_size):
+            batch = pending_texts[i:i+self.batch_size]
+            translated_batch = self.translate_with_retry(batch)
+            if (translated_batch == None): # pragma no cover
+                self.stats["failed"] += len(batch)
+                continue
+            new_translations = dict(zip(batch, translated_batch))
+            self.cache.store_translations(self.backend.name, new_translations)
+            translations.update(new_translations)
+            self.stats["translated"] += len(batch)
+
+        return [translations.get(text, text) for text in texts]
+
+def default_translation_service():
+    """
+    Creates the translation service for the real texts, which uses Google Translate,
+    stores the translations in the file of the env variable TRANSLATION_CACHE
+    (./translations_cache.db by default) and sends one request per second at most.
+    """
+    return TranslationService(GoogleTranslatorBackend(),
+                              TranslationCache(os.environ.get("TRANSLATION_CACHE", "./translations_cache.db")),
+                              TokenBucket(rate=1, capacity=5))
@@ -22,6 +22,12 @@ class MaxRequestsExceed(Exception):
     def __init__(self, mensaje):
         self.mensaje = mensaje
 
+class RequestRejected(Exception):
+    """Class exception to point out that a request to the API has been rejected
+        for a reason other than the limit of requests, so it won't be sent again."""
+    def __init__(self, mensaje):
+        self.mensaje = mensaje
+
 class InvalidUserId(Exception):
     """Class exception to point out that the provided user id is not right."""
     def __init__(self, mensaje):
@@ -153,6 +159,18 @@ class InvalidQueryValues(Exception):
     is not valid."""
     def __init__(self, mensaje):
         self.mensaje = mensaje
+
+class InvalidPoolSize(Exception):
+    """Class exception to point out that the provided size of the pool of
+    connections is not valid."""
+    def __init__(self, mensaje):
+        self.mensaje = mensaje
+
+class ConnectionTimeout(Exception):
+    """Class exception to point out that there are not any avalaible connections
+    to the database after waiting the maximum time."""
+    def __init__(self, mensaje):
+        self.mensaje = mensaje
         
 ############################ CLASS DATAANALYZER #############################     
 class TextNotFound(Exception):
@@ -1,8 +1,8 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 """
-File which includes the automatic and periodic tasks to download data of a specific
-user and from a particular social media source.
+File which includes the automatic and periodic tasks to download data of the
+users of the watchlist and from their social media source.
 
 @author: Lidia Sánchez Mérida
 """
@@ -10,17 +10,30 @@ from huey import SqliteHuey, crontab
 huey = SqliteHuey(filename='/tmp/huey_sqlite.db')
 
 from main_ops import MainOperations
+from ingest_scheduler import IngestScheduler
+from session_pool import SessionPool
+from sentiment_models import warm_up
 
-@huey.periodic_task(crontab(day='*/1', hour='19'))
+@huey.on_startup()
+def load_sentiment_models():
+    """
+    Loads the sentiment analysis models once when the Huey consumer boots, so 
+    the tasks of this process reuse them instead of loading them on each analysis.
+    """
+    warm_up()
+
+@huey.periodic_task(crontab(minute='0', hour='19-23'))
+@huey.lock_task('get-user-data')
 def get_user_data():
     """
-    Function to download the data of a specific user from the selected social media
-    source every day at 7 o'clock.
+    Function to download the data of the users of the watchlist from their social
+    media source every day from 7 o'clock. The next runs of the same day only
+    resume the users which couldn't be stored, such as the ones which were pending
+    when the maximum number of requests was exceeded. Each worker leases one of
+    the Instagram accounts set in the env variables.
     """
     mainops_object = MainOperations()
-    collected_data = {}
-    if (mainops_object.social_media_source.lower() == "instagram"):
-        collected_data = mainops_object.get_user_instagram_common_data(mainops_object.user_to_study, "real")
-
-    return collected_data
-
+    session_pool = SessionPool()
+    scheduler = IngestScheduler(mainops_object, mainops_object.ingest_state, "real",
+                                max_workers=len(session_pool.sessions), session_pool=session_pool)
+    return scheduler.run()
@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Class which downloads every day the data of the users of the watchlist. The
+users are downloaded by a pool of workers, so the waits between the requests of
+one user are overlapped with the requests of the other ones, whereas all the
+workers share the rate limiter of the Instagram account which sends the requests:
+    - Each worker has its own connection to the API, since the connection stores
+    the response of the last request.
+    - The progress of each user is stored after each step, so if the task server
+    stops in the middle of a user, the next run only downloads the missing data.
+    - The downloads are incremental. The pages of medias stop at the first one
+    which has been already downloaded, so only the likes and comments of the
+    recent medias are refreshed, whereas the older ones keep their last values.
+    The comments are only requested for the new medias and the ones whose number
+    of comments has changed, and only the new comments are stored.
+    - If there is a pool of sessions of several accounts, each user is downloaded
+    with a leased account, which is rotated when its requests are throttled.
+    The users which can't be downloaded for other reasons, such as the ones which
+    are not found, fail without rotating the accounts.
+    - When the maximum number of requests is exceeded in all the accounts, the
+    pending users are left for the next run.
+
+@author: Lidia Sánchez Mérida
+"""
+import copy
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import sys
+sys.path.append('src/data')
+sys.path.append('data')
+
+from api import Api
+from rate_limiter import RateLimiter
+from ingest_state import IngestState
+from exceptions import InvalidMode, InvalidPoolSize, InvalidSocialMediaSource, MaxRequestsExceed
+
+class IngestScheduler:
+
+    def __init__(self, mainops_object, ingest_state=None, mode="real", max_workers=4,
+                 rate=0.05, capacity=3, comments_chunk=10, max_medias=100, api_factory=Api,
+                 session_pool=None):
+        """
+        Creates an IngestScheduler object whose attributes are:
+            - The MainOperations object which preprocesses and stores the user data.
+            - The state with the watchlist and the progress of each user.
+            - The mode in which the user data are stored.
+            - The number of workers which download the users at the same time.
+            - The rate limiter of the Instagram account, shared by all the workers.
+            - The number of medias whose comments are downloaded before storing
+            the progress of the user.
+            - The maximum number of medias of each user.
+            - The function which creates the API objects, as well as the API
+            object of each worker.
+            - The pool of sessions of several accounts, if there is one.
+            - A lock to preprocess and store the data of one user at a time.
+
+        Parameters
+        ----------
+        mainops_object : MainOperations
+            It's the object which preprocesses and stores the user data.
+        ingest_state : IngestState, optional
+            It's the state of the downloads. The default is None, so a new one
+            will be created in the default folder.
+        mode : str, optional
+            It's the mode in which the user data are stored. The default is "real".
+        max_workers : int, optional
+            It's the number of workers. The default is 4.
+        rate : float, optional
+            It's the number of requests per second of the Instagram account. The
+            default is 0.05, which is a request every 20 seconds.
+        capacity : int, optional
+            It's the maximum number of requests which can be sent in a burst.
+            The default is 3.
+        comments_chunk : int, optional
+            It's the number of medias whose comments are downloaded between two
+            updates of the progress. The default is 10.
+        max_medias : int, optional
+            It's the maximum number of medias of each user. The default is 100.
+        api_factory : function, optional
+            It's the function which creates an API object from a rate limiter.
+            The default is the Api class.
+        session_pool : SessionPool, optional
+            It's the pool of sessions which are leased to the workers. The default
+            is None, so each worker connects to the API with the default account.
+
+        Raises
+        ------
+        InvalidMode
+            If the provided mode is not 'test' or 'real'.
+        InvalidPoolSize
+            If the number of workers, the size of the chunks or the maximum number
+            of medias are not positive integers.
+        InvalidLimit
+            If the provided rate or capacity are not positive numbers.
+
+        Returns
+        -------
+        An IngestScheduler object.
+        """
+        if (mode != "test" and mode != "real"):
+            raise InvalidMode("ERROR. The mode should be 'test' or 'real.")
+        if (type(max_workers) != int or max_workers <= 0):
+            raise InvalidPoolSize("ERROR. The number of workers should be a number greater than 0.")
+        if (type(comments_chunk) != int or comments_chunk <= 0):
+            raise InvalidPoolSize("ERROR. The size of the chunks should be a number greater than 0.")
+        if (type(max_medias) != int or max_medias <= 0):
+            raise InvalidPoolSize("ERROR. The maximum number of medias should be a number greater than 0.")
+
+        self.mainops_object = mainops_object
+        self.ingest_state = IngestState() if ingest_state == None else ingest_state
+        self.mode = mode
+        self.max_workers = max_workers
+        self.rate_limiter = RateLimiter(rate, capacity)
+        self.comments_chunk = comments_chunk
+        self.max_medias = max_medias
+        self.api_factory = api_factory
+        self.workers = threading.local()
+        self.session_pool = session_pool
+        self.store_lock = threading.Lock()
+
+    def get_api(self):
+        """
+        Gets the API object of the current worker, which is connected the first
+        time that the worker downloads a user.
+
+        Returns
+        -------
+        An API object connected to the LevPasha Instagram API.
+        """
+        if (getattr(self.workers, "api", None) == None):
+            api = self.api_factory(self.rate_limiter)
+            api.connect_levpasha_instagram_api()
+            self.workers.api = api
+        return self.workers.api
+
+    def collect_user(self, username, social_media, day=None, api=None):
+        """
+        Downloads the profile, the new or recent medias and their new comments
+        of a user which haven't been downloaded yet during the day, and stores
+        them once all of them have been downloaded. Then, the cursor of the user
+        is updated.
+
+        Parameters
+        ----------
+        username : str
+            It's the username of the user.
+        social_media : str
+            It's the social media source of the user data.
+        day : str, optional
+            It's the day of the download with the format dd-mm-YYYY. The default
+            is None, so the current day will be used.
+        api : Api, optional
+            It's the API object to download the data. The default is None, so the
+            API object of the current worker will be used.
+
+        Raises
+        ------
+        InvalidSocialMediaSource
+            If the provided social media is not avalaible.
+        MaxRequestsExceed
+            If the maximum number of requests has been exceeded. The downloaded
+            data are kept for the next run.
+
+        Returns
+        -------
+        A dict with the downloaded data of the user as well as if they've been stored.
+        """
+        if (type(social_media) != str or social_media.lower() != "instagram"):
+            raise InvalidSocialMediaSource("ERROR. The avalaible social media source is Instagram.")
+        progress = self.ingest_state.get_progress(username, day)
+        if (progress.get("stored", False)):
+            return progress
+
+        api = self.get_api() if api == None else api
+        cursor = self.ingest_state.get_cursor(username)
+        if ("profile" not in progress):
+            progress["profile"] = api.get_levpasha_instagram_profile(username)
+            self.ingest_state.update_progress(username, progress, day)
+        if ("medias" not in progress):
+            known_medias = {media["id_media"]:media for media in cursor["medias"]}
+            recent_medias = api.get_levpasha_instagram_posts(progress["profile"]["userid"], self.max_medias,
+                                                             set(known_medias))
+            recent_ids = set(media["id_media"] for media in recent_medias)
+            # The older medias keep the values of the last download
+            progress["medias"] = (recent_medias+[media for media in cursor["medias"]
+                                                 if media["id_media"] not in recent_ids])[:self.max_medias]
+            progress["medias_to_comment"] = [media for media in recent_medias
+                                             if media["id_media"] not in known_medias or
+                                             media["comment_count"] != known_medias[media["id_media"]]["comment_count"]]
+            progress["comments"] = []
+            progress["comment_ids"] = {}
+            self.ingest_state.update_progress(username, progress, day)
+        # Download the new comments per chunks of medias
+        while (len(progress["medias_to_comment"]) > 0):
+            medias = progress["medias_to_comment"][:self.comments_chunk]
+            comments, comment_ids = api.get_levpasha_instagram_new_comments(
+                progress["profile"]["username"], medias, cursor["comments"])
+            progress["comments"].extend(comments)
+            progress["comment_ids"].update(comment_ids)
+            progress["medias_to_comment"] = progress["medias_to_comment"][len(medias):]
+            self.ingest_state.update_progress(username, progress, day)
+
+        # The medias without new comments are stored with an empty list of them.
+        # The preprocessing modifies the data, so a copy is provided
+        commented_ids = set(comment["id_media"] for comment in progress["comments"])
+        comments = progress["comments"]+[{"id_media":media["id_media"], "texts":[]} for media in progress["medias"]
+                                         if media["id_media"] not in commented_ids]
+        user_data = copy.deepcopy({"profile":progress["profile"], "medias":progress["medias"], "comments":comments})
+        with self.store_lock:
+            self.mainops_object.preprocess_and_store_common_data(user_data, social_media, self.mode)
+        cursor["comments"].update(progress["comment_ids"])
+        self.ingest_state.update_cursor(username, progress["medias"], cursor["comments"])
+        progress["stored"] = True
+        self.ingest_state.update_progress(username, progress, day)
+        return progress
+
+    def run(self, day=None):
+        """
+        Downloads the data of the users of the watchlist which haven't been
+        stored yet during the day. Once the maximum number of requests has been
+        exceeded, the remaining users are not downloaded.
+
+        Parameters
+        ----------
+        day : str, optional
+            It's the day of the download with the format dd-mm-YYYY. The default
+            is None, so the current day will be used.
+
+        Returns
+        -------
+        A dict whose keys are the usernames of the watchlist and whose values
+        are "stored" if their data have been stored, "pending" if they have to
+        be downloaded in the next run or the error raised by their download.
+        """
+        day = self.ingest_state.get_day() if day == None else day
+        limit_exceeded = threading.Event()
+
+        def collect(username, social_media):
+            if (limit_exceeded.is_set()):
+                return "pending"
+            try:
+                if (self.session_pool == None):
+                    self.collect_user(username, social_media, day)
+                    return "stored"
+                # Rotate the accounts whose requests are throttled until the user
+                # is stored, trying each account once at most. The other errors
+                # fail the user without cooling down the account
+                for _ in range(0, len(self.session_pool.sessions)):
+                    api = self.session_pool.lease()
+                    try:
+                        self.collect_user(username, social_media, day, api)
+                    except MaxRequestsExceed:
+                        self.session_pool.release(api, rejected=True)
+                        continue
+                    except Exception:
+                        self.session_pool.release(api)
+                        raise
+                    self.session_pool.release(api)
+                    return "stored"
+                raise MaxRequestsExceed("Max requests exceed in all the accounts. Wait to send more.")
+            except MaxRequestsExceed:
+                limit_exceeded.set()
+                return "pending"
+            except Exception as error:
+                return getattr(error, "mensaje", str(error))
+
+        watchlist = self.ingest_state.get_watchlist()
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            results = {username:executor.submit(collect, username, social_media)
+                       for username, social_media in watchlist.items()}
+        return {username:result.result() for username, result in results.items()}
@@ -0,0 +1,286 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Class which contains the persistent state of the download of the user data,
+which is stored in a folder of JSON files shared by the web platform and the
+task server:
+    - The watchlist of the users whose data are downloaded every day and their
+    social media source. Each watched user has their own file, so the web
+    platform and the task server can add and remove users at the same time
+    without losing the changes of each other.
+    - The progress of the download of each user during the current day, so the
+    downloaded profile, medias and comments are not requested again if the task
+    server stops in the middle of a user. Each user has their own file, so the
+    users which are downloaded at the same time don't rewrite the same file.
+    - The cursor of each user, which has the newest medias that have been already
+    downloaded with their number of likes and comments, as well as the ids of
+    the downloaded comments of each media, so the next days only download the
+    new medias and comments.
+The files are rewritten atomically after each change, so they're always valid.
+
+@author: Lidia Sánchez Mérida
+"""
+import json
+import os
+import re
+import threading
+from datetime import datetime
+from exceptions import UsernameNotFound, InvalidSocialMediaSource
+
+class IngestState:
+
+    def __init__(self, state_folder=None):
+        """
+        Creates an IngestState object whose attributes are:
+            - The path to the folder which stores the state.
+            - The pattern of the valid usernames, which are the Instagram ones.
+
+        Parameters
+        ----------
+        state_folder : str, optional
+            It's the path to the folder. The default is None, so the env variable
+            INGEST_STATE_FOLDER or "/tmp/ingest_state" will be used.
+
+        Returns
+        -------
+        An IngestState object.
+        """
+        if (state_folder == None):
+            state_folder = os.environ.get("INGEST_STATE_FOLDER", "/tmp/ingest_state")
+        self.state_folder = state_folder
+        for folder in ["watchlist", "progress", "cursors"]:
+            os.makedirs(os.path.join(self.state_folder, folder), exist_ok=True)
+        self.username_pattern = re.compile(r"^[A-Za-z0-9._]{1,30}$")
+
+    def get_path(self, username, folder="progress"):
+        """
+        Gets the path to the file of a user in the watchlist or of their progress
+        or cursor.
+        """
+        return os.path.join(self.state_folder, folder, username+".json")
+
+    def load(self, path, default):
+        """
+        Reads a JSON file of the state.
+
+        Returns
+        -------
+        The content of the file or the provided default value if it doesn't exist.
+        """
+        try:
+            with open(path, "r") as state_file:
+                return json.load(state_file)
+        except FileNotFoundError:
+            return default
+
+    def save(self, path, content):
+        """
+        Writes the content into a temporary file which then replaces the JSON file.
+        """
+        tmp_path = path+"."+str(os.getpid())+"."+str(threading.get_ident())+".tmp"
+        with open(tmp_path, "w") as state_file:
+            json.dump(content, state_file)
+        os.replace(tmp_path, path)
+
+    def check_username(self, username):
+        """
+        Checks that the provided username is a valid Instagram username, which
+        has up to 30 letters, numbers, periods and underscores, so it's also a
+        valid name of a file.
+
+        Raises
+        ------
+        UsernameNotFound
+            If the provided username is not a valid Instagram username.
+        """
+        if (type(username) != str or not self.username_pattern.match(username) or
+            username.strip(".") == ""):
+            raise UsernameNotFound("ERROR. The username should have up to 30 letters, numbers, "+
+                                   "periods and underscores.")
+
+    def add_user(self, username, social_media):
+        """
+        Adds a user to the watchlist.
+
+        Parameters
+        ----------
+        username : str
+            It's the username of the user to download their data every day.
+        social_media : str
+            It's the social media source of the user data.
+
+        Raises
+        ------
+        UsernameNotFound
+            If the provided username is not a valid Instagram username.
+        InvalidSocialMediaSource
+            If the provided social media is not a non-empty string.
+
+        Returns
+        -------
+        A dict with the users of the watchlist and their social media source.
+        """
+        self.check_username(username)
+        if (type(social_media) != str or social_media == ""):
+            raise InvalidSocialMediaSource("ERROR. The social media should be a non-empty string.")
+        self.save(self.get_path(username, "watchlist"), {"social_media":social_media})
+        return self.get_watchlist()
+
+    def remove_user(self, username):
+        """
+        Removes a user from the watchlist as well as their progress and cursor.
+
+        Raises
+        ------
+        UsernameNotFound
+            If the provided username is not a valid Instagram username.
+
+        Returns
+        -------
+        A dict with the users of the watchlist and their social media source.
+        """
+        self.check_username(username)
+        for folder in ["watchlist", "progress", "cursors"]:
+            try:
+                os.remove(self.get_path(username, folder))
+            except FileNotFoundError:
+                pass
+        return self.get_watchlist()
+
+    def get_watchlist(self):
+        """
+        Gets the users of the watchlist.
+
+        Returns
+        -------
+        A dict whose keys are the usernames and whose values are their social
+        media source.
+        """
+        watchlist = {}
+        for name in sorted(os.listdir(os.path.join(self.state_folder, "watchlist"))):
+            if (name.endswith(".json")):
+                # The user could have been removed after listing the folder
+                item = self.load(os.path.join(self.state_folder, "watchlist", name), None)
+                if (item != None):
+                    watchlist[name[:-len(".json")]] = item["social_media"]
+        return watchlist
+
+    def get_day(self):
+        """
+        Gets the current day as a string with the format dd-mm-YYYY.
+        """
+        return datetime.now().strftime("%d-%m-%Y")
+
+    def get_progress(self, username, day=None):
+        """
+        Gets the progress of the download of a user during a day. The progress
+        of the previous days is discarded.
+
+        Parameters
+        ----------
+        username : str
+            It's the username of the user.
+        day : str, optional
+            It's the day of the download with the format dd-mm-YYYY. The default
+            is None, so the current day will be used.
+
+        Raises
+        ------
+        UsernameNotFound
+            If the provided username is not a valid Instagram username.
+
+        Returns
+        -------
+        A dict with the downloaded data of the user during the day, which is empty
+        if the download has not started yet.
+        """
+        self.check_username(username)
+        day = self.get_day() if day == None else day
+        progress = self.load(self.get_path(username), {})
+        if (progress.get("day") != day):
+            return {}
+        return progress["data"]
+
+    def update_progress(self, username, user_progress, day=None):
+        """
+        Stores the progress of the download of a user during a day, which replaces
+        the progress of the previous days.
+
+        Parameters
+        ----------
+        username : str
+            It's the username of the user.
+        user_progress : dict
+            It's the downloaded data of the user. It should be serializable to JSON.
+        day : str, optional
+            It's the day of the download with the format dd-mm-YYYY. The default
+            is None, so the current day will be used.
+
+        Raises
+        ------
+        UsernameNotFound
+            If the provided username is not a valid Instagram username.
+
+        Returns
+        -------
+        The stored progress of the user.
+        """
+        self.check_username(username)
+        day = self.get_day() if day == None else day
+        self.save(self.get_path(username), {"day":day, "data":user_progress})
+        return user_progress
+
+    def get_cursor(self, username):
+        """
+        Gets the cursor of the downloads of a user.
+
+        Parameters
+        ----------
+        username : str
+            It's the username of the user.
+
+        Raises
+        ------
+        UsernameNotFound
+            If the provided username is not a valid Instagram username.
+
+        Returns
+        -------
+        A dict with the list of the newest downloaded medias and the dict of
+        the downloaded comment ids of each media, which are empty if the user
+        has not been downloaded yet.
+        """
+        self.check_username(username)
+        return self.load(self.get_path(username, "cursors"), {"medias":[], "comments":{}})
+
+    def update_cursor(self, username, medias, comments):
+        """
+        Stores the cursor of the downloads of a user. Only the comment ids of the
+        provided medias are kept.
+
+        Parameters
+        ----------
+        username : str
+            It's the username of the user.
+        medias : list of dicts
+            It's the list of the newest downloaded medias, sorted from the newest
+            to the oldest one.
+        comments : dict
+            It's the dict whose keys are the media ids and whose values are the
+            ids of their downloaded comments.
+
+        Raises
+        ------
+        UsernameNotFound
+            If the provided username is not a valid Instagram username.
+
+        Returns
+        -------
+        The stored cursor of the user.
+        """
+        self.check_username(username)
+        media_ids = set(media["id_media"] for media in medias)
+        cursor = {"medias":medias,
+                  "comments":{id_media:ids for id_media, ids in comments.items() if id_media in media_ids}}
+        self.save(self.get_path(username, "cursors"), cursor)
+        return cursor
@@ -5,7 +5,8 @@ Class which contains the main operations which can be done on the web platform.
 
 @author: Lidia Sánchez Mérida
 """
-from datetime import datetime
+from bisect import bisect_left
+from datetime import datetime, timedelta
 import sys
 sys.path.append('src/data')
 sys.path.append('data')
@@ -15,9 +16,14 @@ import commondata
 import data_analyzer
 from mongodb import MongoDB
 from postgredb import PostgreDB
+from sentiment_cache import SentimentCache
+from metric_rollups import MetricRollups
+from analysis_cache import AnalysisCache
+from ingest_state import IngestState
 from exceptions import UsernameNotFound, MaxRequestsExceed, UserDataNotFound \
    , InvalidMongoDbObject, InvalidSocialMediaSource, InvalidMode, InvalidAnalysis \
-    , InvalidDates, CollectionNotFound, InvalidQuery
+    , InvalidDates, CollectionNotFound, InvalidQuery, ProfilesNotFound, UserActivityNotFound \
+    , PostInteractionsNotFound, SentimentNotFound
 
 class MainOperations:
 
@@ -30,8 +36,14 @@ class MainOperations:
             on the context (test or real).
             - A CommonData object to preprocess the user data.
             - A DataAnalyzer object to perform the different analysis.
+            - The cache of the identified sentiments for each mode.
+            - The daily and weekly rollups of the profile and media metrics for each mode.
+            - The cache of the daily results of the analyses which are computed
+            per day as well as the keys of their results and the collections
+            which identify them.
             - The list of avalaible analysis.
             - The user to download their data as well as the social media source.
+            - The state of the daily downloads with the watchlist of users.
 
         Raises
         ------
@@ -124,14 +136,44 @@ class MainOperations:
         self.common_data_object = commondata.CommonData(self.mongodb_object)
         # DataAnalyzer object to perform the chosen analysis
         self.data_analyzer_object = data_analyzer.DataAnalyzer()
+        # Cache of the identified sentiments for each mode
+        model_version = self.data_analyzer_object.sentiment_models.model_version
+        self.sentiment_caches = {
+            'test':SentimentCache(self.postgresdb_object, model_version, 'test'),
+            'real':SentimentCache(self.postgresdb_object, model_version, 'real')
+            }
+        # Rollups of the profile and media metrics for each mode
+        self.metric_rollups = {
+            'test':MetricRollups(self.postgresdb_object, 'test'),
+            'real':MetricRollups(self.postgresdb_object, 'real')
+            }
+        # Cache of the daily results of the analyses so the overlapping periods
+        # of time are only computed once
+        self.analysis_cache = AnalysisCache()
+        self.cached_analysis_keys = {
+            'profile_evolution':["date", "n_followers", "n_followings", "n_medias"],
+            'profile_activity':["date", "n_medias"],
+            'media_evolution':['date', 'like_count', 'comment_count'],
+            'user_behaviours':["date", "likers", "haters"]
+            }
+        # Mongo collections whose snapshot versions identify the cached results,
+        # so they're not reused once new data are stored, even by another process
+        self.cached_analysis_collections = {
+            'profile_evolution':'profiles',
+            'profile_activity':'profiles',
+            'media_evolution':'medias',
+            'user_behaviours':'comments'
+            }
         # User to collect data and social media source
         self.user_to_study = None
         self.social_media_source = 'Instagram'
+        self.ingest_state = IngestState()
     
     def set_user_to_study(self, user):
         """
         Sets the name of the user to collect data in order to analyze them later
-        and plot the results.
+        and plot the results. The user is added to the watchlist, so their data
+        will be downloaded every day by the task server.
 
         Parameters
         ----------
@@ -141,7 +183,7 @@ class MainOperations:
         Raises
         ------
         UsernameNotFound
-            If the provided username is not a non-empty string.
+            If the provided username is not a valid Instagram username.
 
         Returns
         -------
@@ -150,10 +192,35 @@ class MainOperations:
         if (type(user) != str or user == ""):
             raise UsernameNotFound("ERROR. The user to study should be a non-empty string.")
         
+        self.ingest_state.add_user(user, self.social_media_source)
         self.user_to_study = user 
         return self.user_to_study
 
-    def get_user_instagram_common_data(self, search_user, mode):
+    def remove_user_to_study(self, user):
+        """
+        Removes a user from the watchlist, so their data won't be downloaded
+        anymore by the task server. Their downloaded data are kept.
+
+        Parameters
+        ----------
+        user : str
+            It's the username of the user to stop studying.
+
+        Raises
+        ------
+        UsernameNotFound
+            If the provided username is not a valid Instagram username.
+
+        Returns
+        -------
+        A dict with the users of the watchlist and their social media source.
+        """
+        watchlist = self.ingest_state.remove_user(user)
+        if (self.user_to_study == user):
+            self.user_to_study = None
+        return watchlist
+
+    def get_user_instagram_common_data(self, search_user, mode, api_backend=None):
         """
         Gets common Instagram data of a specific user using the LevPasha Instagram
         API. The downloaded user data is stored in the Mongo database.
@@ -164,6 +231,9 @@ class MainOperations:
             It's the username of the user to get their data.
         mode : str
             It's the mode in which the user data will be stored in the Mongo database.
+        api_backend : object, optional
+            It's the connection which answers the requests instead of the LevPasha
+            Instagram API, such as a replay of recorded responses. The default is None.
 
         Raises
         ------
@@ -187,7 +257,7 @@ class MainOperations:
             raise InvalidMode("ERROR. The mode should be 'test' or 'real.")
         try:
             # Connect to the Levpasha Instagram API
-            inst_api = Api()
+            inst_api = Api(backend=api_backend)
             inst_api.connect_levpasha_instagram_api()
             # Download Instagram user data
             user_instagram_data = inst_api.get_levpasha_instagram_data(search_user)
@@ -198,7 +268,7 @@ class MainOperations:
             # Try to connect again to the Instagram LevPasha API using the credentials
             # instead of the session file in order to avoid logout exceptions
             try:
-                inst_api = Api()
+                inst_api = Api(backend=api_backend)
                 inst_api.connect_levpasha_instagram_api(use_session_file=False)
                 user_instagram_data = inst_api.get_levpasha_instagram_data(search_user)
                 user_data = self.preprocess_and_store_common_data(user_instagram_data, "Instagram", mode)
@@ -267,11 +337,97 @@ class MainOperations:
             preprocessed_data['media_list'], self.mongo_collections[mode]['medias'])
         self.common_data_object.insert_user_data(
             preprocessed_data['media_comments'], self.mongo_collections[mode]['comments'])
+        # Update the rollups of the profile and media metrics with the new day
+        self.metric_rollups[mode].update_profiles([preprocessed_data['profile']])
+        self.metric_rollups[mode].update_medias([preprocessed_data['media_list']])
 
         return {'profile':preprocessed_data["profile"], 'media':preprocessed_data["media_list"],
                 'comments':preprocessed_data["media_comments"]}
 
-    def get_data_from_mongodb(self, username, social_media, collection, date_list):
+    def preprocess_and_store_many_common_data(self, user_data_list, social_media, mode, day=None):
+        """
+        Preprocesses the common data of several users from any API source and
+        stores them in the Mongo database with one request per collection. The
+        documents which already exist with the same user, social media and date
+        won't be inserted.
+
+        Parameters
+        ----------
+        user_data_list : list of dicts
+            It's the list of user data to preprocess and store.
+        social_media : str
+            It's the social media which the user data came from.
+        mode : str
+            It's the mode in which the user data will be stored in the Mongo database.
+        day : datetime, optional
+            It's the day of the user data, such as the day in which they were
+            recorded. The default is None, so the current day will be used.
+
+        Raises
+        ------
+        UserDataNotFound
+            If the provided user data is not a non-empty list of non-empty dicts.
+        InvalidSocialMediaSource
+            If the provided social media source is not a non-empty string or it's
+            not one of the avalaible social media sources.
+        InvalidMode
+            If the provided mode is not 'test' or 'real'.
+        InvalidDates
+            If the provided day is not a datetime.
+        InvalidMongoDbObject
+            If the MongoDB object has not been initialized and does not have the
+            connection to the Mongo database.
+
+        Returns
+        -------
+        A dict whose keys are the different user data and whose values are dicts
+        with the number of inserted and already existing documents.
+        """
+        if (type(user_data_list) != list or len(user_data_list) == 0 or
+            not all(type(user_data) == dict and len(user_data) > 0 for user_data in user_data_list)):
+            raise UserDataNotFound("ERROR. User data should be a non empty list of dicts.")
+        # Check the provided social media source
+        if (type(social_media) != str or social_media == ""):
+            raise InvalidSocialMediaSource("ERROR. The social media source should be a non-empty string.")
+        if (social_media.lower() not in self.common_data_object.social_media_sources):
+            raise InvalidSocialMediaSource("ERROR. Avalaible social media sources: "
+               +str(self.common_data_object.social_media_sources))
+        # Check the provided mode
+        if (mode != "test" and mode != "real"):
+            raise InvalidMode("ERROR. The mode should be 'test' or 'real.")
+        # Check the provided day
+        if (day != None and type(day) != datetime):
+            raise InvalidDates("ERROR. The day should be a datetime.")
+
+        # Check the Mongo database object
+        if (type(self.mongodb_object) != MongoDB):
+            raise InvalidMongoDbObject("ERROR. The connection to the MongoDB database "+
+                                       "should be a MongoDB object.")
+        # Preprocess the data of every user
+        preprocessed_data = [self.common_data_object.preprocess_user_data(user_data, social_media)
+                             for user_data in user_data_list]
+        # The preprocessing dates the user data with the current day
+        if (day != None):
+            day = datetime.strptime(day.strftime("%d-%m-%Y"), "%d-%m-%Y")
+            for item in preprocessed_data:
+                for key in item:
+                    item[key]['date'] = day
+        profiles = [item['profile'] for item in preprocessed_data]
+        media_lists = [item['media_list'] for item in preprocessed_data]
+
+        # Save the data which don't already exist with a request per collection
+        inserted_data = {
+            'profile':self.common_data_object.insert_many_user_data(profiles, self.mongo_collections[mode]['profiles']),
+            'media':self.common_data_object.insert_many_user_data(media_lists, self.mongo_collections[mode]['medias']),
+            'comments':self.common_data_object.insert_many_user_data([item['media_comments'] for item in preprocessed_data],
+                                                                     self.mongo_collections[mode]['comments'])
+            }
+        # Update the rollups of the profile and media metrics with the new days
+        self.metric_rollups[mode].update_profiles(profiles)
+        self.metric_rollups[mode].update_medias(media_lists)
+        return inserted_data
+
+    def get_data_from_mongodb(self, username, social_media, collection, date_list, fields=None):
         """
         Gets any kind of user data of a specific social media source and a related
         range of dates by recovering the information from a specific collection
@@ -289,6 +445,9 @@ class MainOperations:
         date_list : list of tuples
             It's the range of dates to add to the query in order to get the data
             for each range.
+        fields : list of str, optional
+            They're the fields of the data samples to get. The default is None,
+            so all the fields will be got.
 
         Raises
         ------
@@ -347,7 +506,7 @@ class MainOperations:
             # Complete the get query to make it to the Mongo database
             mongo_values = {"username":username, "social_media":social_media, "date_ini":date_range[0], "date_fin":date_range[1]}
             # Make the query
-            mongo_data.extend(self.common_data_object.get_user_data(collection, "get_item", mongo_values))
+            mongo_data.extend(self.common_data_object.get_user_data(collection, "get_item", mongo_values, fields))
 
         return mongo_data
 
@@ -402,6 +561,263 @@ class MainOperations:
 
         return {"ids":id_data, "data":postgres_data}
 
+    def get_daily_results(self, username, analysis, social_media, first_day, last_day):
+        """
+        Computes the results of each day of the ProfilesEvolution, ProfilesActivity,
+        MediasEvolution or UserBehaviours analysis during a period of time. The
+        required user data are got from the Mongo database and inserted in the
+        Postgres database as well as in the rollups if they're not already.
+
+        Parameters
+        ----------
+        username : str
+            It's the username of the user which is going to be studied.
+        analysis : str
+            It's the type of analysis to perform.
+        social_media : str
+            It's the social media source which the user data will be recovered.
+        first_day : date
+            It's the first day of the period of time.
+        last_day : date
+            It's the last day of the period of time.
+
+        Returns
+        -------
+        A dict whose keys are the days with data and whose values are tuples with
+        the results of each day in the same order than the keys of the analysis.
+        """
+        date_ini, date_fin = first_day.strftime("%d-%m-%Y"), last_day.strftime("%d-%m-%Y")
+        metric_rollups = self.metric_rollups["test" if "test" in analysis else "real"]
+        id_user = metric_rollups.get_id_user(username, social_media)
+        if ("profile" in analysis):
+            # 1. Get the required data from Mongo database
+            collection = self.analysis_mongo_collections[analysis]
+            mongo_data = self.get_data_from_mongodb(username, social_media, collection, [(date_ini, date_fin)])
+            # 2. Insert the recovered data to Postgres database
+            insert_query = self.analysis_postgres_insert_queries[analysis]
+            check_query = self.postgresdb_object.check_queries[insert_query]
+            check_keys = self.postgresdb_object.select_queries[check_query]['fields']
+            for item in mongo_data:
+                if (len(check_keys) > 0):
+                    check_dict = {key:item[key] for key in check_keys}
+                # Insert the data and provide the check values, if there are any
+                self.postgresdb_object.insert_data(insert_query, [dict(sorted(item.items()))], [check_dict])
+            # 3. Add the days which are not in the rollups yet and get the daily buckets
+            metric_rollups.update_profiles(mongo_data, only_missing=True)
+            return self.get_bucket_results(analysis, metric_rollups.get_buckets("profile", id_user, "day",
+                                                                               first_day, last_day))
+
+        elif ("media_evolution" in analysis):
+            # 1. Get and insert the required medias, which are also added to the rollups
+            self.insert_media_data(username, analysis, social_media, date_ini, date_fin)
+            # 2. Get the daily averages of likes and comments
+            return self.get_bucket_results(analysis, metric_rollups.get_buckets("media", id_user, "day",
+                                                                               first_day, last_day))
+
+        # 1. Get the media comments, their authors and their identified sentiments
+        get_comments_query = "test_get_comments_and_sentiments" if "test" in analysis else "get_comments_and_sentiments"
+        query_values = {"comment_date_ini":date_ini, "comment_date_fin":date_fin,
+                        "media_date_ini":date_ini, "media_date_fin":date_fin,
+                        "username":username, "social_media":social_media}
+        # 2. The comments are streamed so long periods of time are analyzed with bounded memory
+        recovered_comments = self.postgresdb_object.stream_data(get_comments_query, query_values)
+        analysed_comments = ({"date":comment[0].strftime("%d-%m-%Y"), "author":comment[1],
+                              "sentiment":comment[2]} for comment in recovered_comments)
+        # 3. Count the likers and haters per date
+        return {datetime.strptime(date, "%d-%m-%Y").date():(n_likers, n_haters) for date, n_likers, n_haters
+                in self.data_analyzer_object.get_behaviours_per_date(analysed_comments)}
+
+    def get_bucket_results(self, analysis, buckets, period="day"):
+        """
+        Gets the results of the ProfilesEvolution, ProfilesActivity or MediasEvolution
+        analysis from the daily or weekly buckets of the rollups. The results of
+        a weekly bucket are the sums of the results of its days.
+
+        Parameters
+        ----------
+        analysis : str
+            It's the type of analysis to perform.
+        buckets : dict
+            It's the dict whose keys are the days in which the buckets start and
+            whose values are tuples with the number of samples and the sum of each metric.
+        period : str, optional
+            It's the period of the buckets: 'day' or 'week'. The default is 'day'.
+
+        Returns
+        -------
+        A dict whose keys are the days in which the buckets start and whose values
+        are tuples with the results in the same order than the keys of the analysis.
+        """
+        if ("profile_evolution" in analysis):
+            return {day:(bucket[2], bucket[3], bucket[1]) for day, bucket in buckets.items()}
+        elif ("profile_activity" in analysis):
+            return {day:(bucket[1],) for day, bucket in buckets.items()}
+        elif (period == "week"):
+            # The weekly buckets already contain the sums of the daily averages
+            return {day:tuple(bucket[1:]) for day, bucket in buckets.items()}
+        return {day:(round(bucket[1]/bucket[0]), round(bucket[2]/bucket[0])) for day, bucket in buckets.items()}
+
+    def get_values_per_weeks(self, daily_results, weekly_results, keys):
+        """
+        Groups the results of the days with data in date order into weeks of seven
+        days and computes their averages, as DataAnalyzer.get_values_per_many_weeks
+        does. The complete weeks which start one of those weeks are averaged from
+        the sums of their weekly buckets.
+
+        Parameters
+        ----------
+        daily_results : dict
+            It's the dict whose keys are the days with data and whose values are
+            the results of each day.
+        weekly_results : dict
+            It's the dict whose keys are the Mondays of the complete weeks and whose
+            values are the sums of the results of their seven days.
+        keys : list of str
+            It's the list of keys of the analysis results.
+
+        Returns
+        -------
+        A dict whose keys are the keys of the analysis results and whose values
+        are the averages of each week.
+        """
+        result = {key:[] for key in keys}
+        week_sums, week_days = [0]*(len(keys)-1), 0
+        for day in sorted(list(daily_results)+list(weekly_results)):
+            if (day in weekly_results):
+                averages = [value/7 for value in weekly_results[day]]
+            else:
+                week_sums = [total+value for total, value in zip(week_sums, daily_results[day])]
+                week_days += 1
+                if (week_days < 7):
+                    continue
+                averages = [total/week_days for total in week_sums]
+                week_sums, week_days = [0]*(len(keys)-1), 0
+            for key, average in zip(keys[1:], averages):
+                result[key].append(round(average))
+        # The last week could have fewer days
+        if (week_days > 0):
+            for key, total in zip(keys[1:], week_sums):
+                result[key].append(round(total/week_days))
+        result["date"] = ["Semana "+str(i+1) for i in range(0, len(result[keys[1]]))]
+        return result
+
+    def get_analysis_per_period(self, username, analysis, social_media, date_ini,
+                                date_fin, only_cached=False):
+        """
+        Gets the results of the ProfilesEvolution, ProfilesActivity, MediasEvolution
+        or UserBehaviours analysis during a period of time. The results of the
+        days which have been analyzed before are got from the cache, even if they
+        belong to several overlapping periods of time, so only the results of the
+        missing periods are computed. The results are cached per snapshot version
+        of the Mongo collection of the analysis and only for the days with data
+        before today, so the new data are analyzed even if their days were
+        analyzed before. For the analyses of the rollups, the weeks with data in
+        their seven days are got from the weekly buckets, so their days are not
+        computed. If there are seven days or less with data, the results of each
+        day will be returned. Otherwise, the days with data are grouped in date
+        order into weeks of seven days, whose averages are returned as "Semana 1",
+        "Semana 2" and so on, so the last week could have fewer days.
+
+        Parameters
+        ----------
+        username : str
+            It's the username of the user which is going to be studied.
+        analysis : str
+            It's the type of analysis to perform.
+        social_media : str
+            It's the social media source which the user data will be recovered.
+        date_ini : str
+            It's the initial date of the period of time to perform the analysis.
+        date_fin : str
+            It's the final date of the period of time to perform the analysis.
+        only_cached : bool, optional
+            If it's True the missing periods will not be computed. The default is False.
+
+        Raises
+        ------
+        ProfilesNotFound
+            If there are not any profiles in the period of time.
+        UserActivityNotFound
+            If there are not any profiles in the period of time for the ProfilesActivity analysis.
+        PostInteractionsNotFound
+            If there are not any medias in the period of time.
+        SentimentNotFound
+            If there are not any analysed comments in the period of time.
+
+        Returns
+        -------
+        A dict with the analysis results per date or per week, or None if only
+        the cached results are required and some days are missing.
+        """
+        keys = self.cached_analysis_keys[analysis.replace("test_", "")]
+        mode = "test" if "test" in analysis else "real"
+        # The cached results are only valid while the collection doesn't get new data
+        collection = self.mongo_collections[mode][self.cached_analysis_collections[analysis.replace("test_", "")]]
+        cache_key = (analysis, username+"_"+social_media, self.mongodb_object.get_snapshot(collection))
+        first_day = datetime.strptime(date_ini, "%d-%m-%Y").date()
+        last_day = datetime.strptime(date_fin, "%d-%m-%Y").date()
+        # 1. Get the cached results and the missing periods of time
+        daily_results, missing_periods = self.analysis_cache.get(cache_key, first_day, last_day)
+        if (only_cached and len(missing_periods) > 0):
+            return None
+        # 2. Get the complete weeks from the weekly buckets of the rollups, so
+        # their days are removed from the missing periods of time
+        metric_rollups = self.metric_rollups[mode]
+        id_user = metric_rollups.get_id_user(username, social_media)
+        kind = "profile" if "profile" in analysis else ("media" if "media_evolution" in analysis else None)
+        weekly_results = {}
+        if (kind != None and len(missing_periods) > 0):
+            weekly_results = self.get_bucket_results(analysis, metric_rollups.get_complete_weeks(
+                kind, id_user, first_day, last_day), "week")
+        periods_to_compute = []
+        for missing_first_day, missing_last_day in missing_periods:
+            current_day = missing_first_day
+            for week in sorted(weekly_results):
+                if (week > missing_last_day):
+                    break
+                if (week > current_day):
+                    periods_to_compute.append((current_day, week-timedelta(days=1)))
+                current_day = max(current_day, week+timedelta(days=7))
+            if (current_day <= missing_last_day):
+                periods_to_compute.append((current_day, missing_last_day))
+        for week in weekly_results:
+            for i in range(0, 7):
+                daily_results.pop(week+timedelta(days=i), None)
+        # 3. Compute the results of the rest of days
+        last_cached_day = datetime.today().date()-timedelta(days=1)
+        for missing_first_day, missing_last_day in periods_to_compute:
+            new_results = self.get_daily_results(username, analysis, social_media, missing_first_day, missing_last_day)
+            daily_results.update(new_results)
+            # The days without data are not cached, since their data could be stored later
+            self.analysis_cache.put_days(cache_key, {day:values for day, values in new_results.items()
+                                                     if day <= last_cached_day})
+
+        # 4. Get the results per date or per week
+        if (len(daily_results) == 0 and len(weekly_results) == 0):
+            if ("profile_evolution" in analysis):
+                raise ProfilesNotFound("ERROR. There are not any profiles in the period of time.")
+            elif ("profile_activity" in analysis):
+                raise UserActivityNotFound("ERROR. There are not any profiles in the period of time.")
+            elif ("media_evolution" in analysis):
+                raise PostInteractionsNotFound("ERROR. There are not any medias in the period of time.")
+            raise SentimentNotFound("ERROR. There are not any analysed comments in the period of time.")
+        # The complete weeks which don't start a week of the results, or the
+        # only week of seven days, are got from their daily buckets
+        sorted_days = sorted(daily_results)
+        split_weeks = [week for week in sorted(weekly_results) if len(daily_results)+7*len(weekly_results) <= 7
+                       or bisect_left(sorted_days, week) % 7 != 0]
+        if (len(split_weeks) > 0):
+            daily_results.update(self.get_bucket_results(analysis, metric_rollups.get_buckets(
+                kind, id_user, "day", split_weeks[0], split_weeks[-1]+timedelta(days=6))))
+            weekly_results = {week:results for week, results in weekly_results.items()
+                              if week < split_weeks[0] or week > split_weeks[-1]}
+        if (len(weekly_results) > 0):
+            return self.get_values_per_weeks(daily_results, weekly_results, keys)
+        values = [(day.strftime("%d-%m-%Y"),)+daily_results[day] for day in sorted(daily_results)]
+        if (len(values) <= 7):
+            return self.data_analyzer_object.get_values_per_one_week(values, keys)
+        return self.data_analyzer_object.get_values_per_many_weeks(values, keys)
+
     def perform_profile_evolution(self, username, analysis, social_media,
                                   date_ini, date_fin):
         """
@@ -432,39 +848,16 @@ class MainOperations:
             - The file name of the saved analysis results.
             - The ids of the inserted analysis results.
         """
-        # 1. Get the required data from Mongo database
-        collection = self.analysis_mongo_collections[analysis]
-        mongo_data = self.get_data_from_mongodb(username, social_media, collection, [(date_ini, date_fin)])
-
-        # 2. Insert the recovered data to Postgres database
-        insert_query = self.analysis_postgres_insert_queries[analysis]
-        check_query = self.postgresdb_object.check_queries[insert_query]
-        check_keys = self.postgresdb_object.select_queries[check_query]['fields']
-        for item in mongo_data:
-            if (len(check_keys) > 0):
-                check_dict = {key:item[key] for key in check_keys}
-            # Insert the data and provide the check values, if there are any
-            self.postgresdb_object.insert_data(insert_query, [dict(sorted(item.items()))], [check_dict])
-
-        # 3. Get only the required fields to perform the analysis
-        select_query = self.analysis_postgres_select_queries[analysis]
-        select_values = {"username":username, "social_media":social_media,
-                          "date_ini":date_ini, "date_fin":date_fin}
-        required_data = self.postgresdb_object.get_data(select_query, select_values)
-
-        # 4. Perform the analysis
-        analysis_results = self.data_analyzer_object.profile_evolution(username, required_data)
-        # Store the analysis results
+        # 1. Get the cached daily results and compute the ones of the missing periods of time
+        analysis_results = self.get_analysis_per_period(username, analysis, social_media, date_ini, date_fin)
+        # 2. Store the analysis results
         insert_query = self.analysis_results_insert_queries[analysis]
         analysis_ids = []
         for i in range(0, len(analysis_results["date"])):
-            if("date" in str(type(analysis_results["date"][i]))):
-                analysis_results["date"][i] = datetime.strftime(analysis_results["date"][i], "%d-%m-%Y")
-
             analysis_dict = {"date_fin":date_fin, "date_ini":date_ini, "id_user":username+"_"+social_media,
                              "mean_followers":analysis_results["n_followers"][i],
                              "mean_followings":analysis_results["n_followings"][i],
-                             "mean_medias":analysis_results["n_posts"][i],
+                             "mean_medias":analysis_results["n_medias"][i],
                              "time":analysis_results["date"][i]}
             check_values = {"date_ini":date_ini, "date_fin":date_fin,
                             "id_user":username+"_"+social_media, "time":analysis_results["date"][i]}
@@ -502,37 +895,14 @@ class MainOperations:
             - The file name of the saved analysis results.
             - The ids of the inserted analysis results.
         """
-        # 1. Get the required data from Mongo database
-        collection = self.analysis_mongo_collections[analysis]
-        mongo_data = self.get_data_from_mongodb(username, social_media, collection, [(date_ini, date_fin)])
-
-        # 2. Insert the recovered data to Postgres database
-        insert_query = self.analysis_postgres_insert_queries[analysis]
-        check_query = self.postgresdb_object.check_queries[insert_query]
-        check_keys = self.postgresdb_object.select_queries[check_query]['fields']
-        for item in mongo_data:
-            if (len(check_keys) > 0):
-                check_dict = {key:item[key] for key in check_keys}
-            # Insert the data and provide the check values, if there are any
-            self.postgresdb_object.insert_data(insert_query, [dict(sorted(item.items()))], [check_dict])
-
-        # 3. Get only the required fields to perform the analysis
-        select_query = self.analysis_postgres_select_queries[analysis]
-        select_values = {"username":username, "social_media":social_media,
-                          "date_ini":date_ini, "date_fin":date_fin}
-        required_data = self.postgresdb_object.get_data(select_query, select_values)
-
-        # 4. Perform the analysis
-        analysis_results = self.data_analyzer_object.user_activity(username, required_data)
-        # Store the analysis results
+        # 1. Get the cached daily results and compute the ones of the missing periods of time
+        analysis_results = self.get_analysis_per_period(username, analysis, social_media, date_ini, date_fin)
+        # 2. Store the analysis results
         insert_query = self.analysis_results_insert_queries[analysis]
         analysis_ids = []
         for i in range(0, len(analysis_results["date"])):
-            if("date" in str(type(analysis_results["date"][i]))):
-                analysis_results["date"][i] = datetime.strftime(analysis_results["date"][i], "%d-%m-%Y")
-
             analysis_dict = {"date_fin":date_fin, "date_ini":date_ini, "id_user":username+"_"+social_media,
-                             "mean_medias":analysis_results["n_posts"][i],
+                             "mean_medias":analysis_results["n_medias"][i],
                              "time":analysis_results["date"][i]}
             check_values = {"date_ini":date_ini, "date_fin":date_fin,
                             "id_user":username+"_"+social_media, "time":analysis_results["date"][i]}
@@ -544,7 +914,9 @@ class MainOperations:
                                  date_ini, date_fin):
         """
         Recovers the required media data from the Mongo database and inserts the
-        media data as well as their titles and comments.
+        media data as well as their titles and comments. The profiles, medias and
+        comments of the range of dates are got only once and indexed by the media
+        id and date, so the medias and their texts are inserted in bulk.
 
         Parameters
         ----------
@@ -563,67 +935,75 @@ class MainOperations:
         -------
         None
         """
-        # 1. Get the required data from Mongo database
-        collection = "test_medias" if "test" in analysis else "medias"
-        mongo_data = self.get_data_from_mongodb(username, social_media, collection, [(date_ini, date_fin)])
-        # 2. Insert the recovered medias with their related id profile and title
-        # to the Postgres database
-        insert_medias_query = "insert_test_medias" if "test" in analysis else "insert_medias"
-        insert_titles_query = "insert_test_media_titles" if "test" in analysis else "insert_media_titles"
-        get_id_profile_query = "check_test_profile" if "test" in analysis else "check_profile"
-        for item in mongo_data:
+        prefix = "test_" if "test" in analysis else ""
+        # 1. Get the ids of the user profiles of the whole range of dates at once
+        profile_values = {"username":username, "social_media":social_media,
+                          "date_ini":date_ini, "date_fin":date_fin}
+        profile_ids = {date.strftime("%Y-%m-%d"):id_profile for id_profile, date in
+                       self.postgresdb_object.get_data(prefix+"get_profile_ids", profile_values)}
+        # 2. Get the medias and, if it's a comment analysis, the comments of the
+        # range of dates from the Mongo database only once
+        medias_collection = "test_medias" if "test" in analysis else "medias"
+        mongo_medias = self.get_data_from_mongodb(username, social_media, medias_collection, [(date_ini, date_fin)])
+        # Add the days which are not in the rollups of the media metrics yet
+        self.metric_rollups["test" if "test" in analysis else "real"].update_medias(mongo_medias, only_missing=True)
+        mongo_comments = []
+        if ("comment" in analysis):
+            comments_collection = "test_comments" if "test" in analysis else "comments"
+            mongo_comments = self.get_data_from_mongodb(username, social_media, comments_collection, [(date_ini, date_fin)],
+                                                        ["date", "comments.id_media", "comments.texts"])
+
+        # 3. Index the medias and the comments by their id and date. The medias
+        # whose profile has not been inserted are skipped
+        medias = {}
+        for item in mongo_medias:
+            date = item["date"].strftime("%Y-%m-%d")
+            if (date not in profile_ids):
+                continue
             for media in item["medias"]:
-                # 2.1. Get the id of the profile which own the recovered medias
-                postgres_data = self.get_data_from_postgresdb(get_id_profile_query, [{"username":username,
-                      "social_media":social_media, "date":item["date"].strftime("%Y-%m-%d")}])
-                item["id_profile"] = postgres_data["ids"][0]
-                # 2.2. Insert the media and recover the id in order to insert the title
-                media_checks = {"id_media":media["id_media"], "date":item["date"]}
-                media_to_insert = {"id_media":media["id_media"],
-                         "id_profile":item["id_profile"],
-                         "like_count":media["like_count"],
-                         "comment_count":media["comment_count"],
-                         "date":item["date"],
-                         "uploaded_date":media["taken_at"]}
-                media_id = self.postgresdb_object.insert_data(insert_medias_query,
-                          [dict(sorted(media_to_insert.items()))], [media_checks])
-
-                # 2.3. Preprocess the title of each media
-                if (media["title"] != None and len(media_id) > 0):
-                    preprocessed_title = self.common_data_object.clean_texts([media["title"]])[0]
-                    # 2.4. Insert the preprocessed media title
-                    got_media_id = media_id[0] if type(media_id) == list else media_id
-                    title_check = {"id_media_aut":got_media_id, "original_text":media["title"],
-                                   "author":item["username"]}
-                    title_to_insert = {"id_media_aut":got_media_id, "original_text":media["title"],
-                                       "preprocessed_text":preprocessed_title,
-                                       "author":item["username"], "date":item["date"]}
-                    self.postgresdb_object.insert_data(insert_titles_query,
-                          [dict(sorted(title_to_insert.items()))], [title_check])
-
-                # 3. Insert the comments of the media if it's a comment analysis
-                if ("comment" in analysis):
-                    # Get the media id if it's not been got
-                    if (len(media_id) == 0):
-                        get_media_id_query = "check_test_media" if "test" in analysis else "check_media"
-                        check_values = {"id_media":media["id_media"], "date":item["date"]}
-                        media_id = self.postgresdb_object.get_data(get_media_id_query, check_values)
-
-                    collection = "test_comments" if "test" in analysis else "comments"
-                    mongo_data = self.get_data_from_mongodb(username, social_media, collection, [(date_ini, date_fin)])
-                    insert_query = "insert_test_media_comments" if "test" in analysis else "insert_media_comments"
-                    got_media_id = media_id[0] if type(media_id) == list else media_id
-                    for record in mongo_data:
-                        for comment_item in record["comments"]:
-                            # 3.1. Clean the comments
-                            for comment in comment_item["texts"][:20]:
-                                prep_text = self.common_data_object.clean_texts([comment["text"]])[0]
-                                # 3.2. Insert the preprocessed text
-                                comment_to_insert = {"author":comment["user"], "date":item["date"],
-                                                      "id_media_aut":got_media_id, "original_text":comment["text"],
-                                                      "preprocessed_text":prep_text}
-                                check_values = {"original_text":prep_text, "author":username, "id_media_aut":got_media_id}
-                                self.postgresdb_object.insert_data(insert_query, [comment_to_insert], [check_values])
+                medias[(media["id_media"], date)] = (item, media)
+        comments = {}
+        for record in mongo_comments:
+            date = record["date"].strftime("%Y-%m-%d")
+            for comment_item in record["comments"]:
+                comments.setdefault((comment_item["id_media"], date), []).extend(comment_item["texts"][:20])
+        if (len(medias) == 0):
+            return
+
+        # 4. Insert all the medias in bulk. The medias which are already in the
+        # database are skipped
+        medias_to_insert = [dict(sorted({"id_media":media["id_media"],
+                                         "id_profile":profile_ids[date],
+                                         "like_count":media["like_count"],
+                                         "comment_count":media["comment_count"],
+                                         "date":item["date"],
+                                         "uploaded_date":media["taken_at"]}.items()))
+                            for (id_media, date), (item, media) in medias.items()]
+        self.postgresdb_object.bulk_insert_data("insert_"+prefix+"medias", medias_to_insert)
+        # 4.1. Get the ids of the new and the previous medias at once
+        media_ids = {(id_media, date.strftime("%Y-%m-%d")):id_media_aut for id_media_aut, id_media, date in
+                     self.postgresdb_object.get_data(prefix+"get_media_ids", {"date_ini":date_ini,
+                     "date_fin":date_fin, "username":username, "social_media":social_media})}
+
+        # 5. Clean all the titles and comments in a single batch
+        texts = [media["title"] for item, media in medias.values() if media["title"] != None]
+        comment_keys = [key for key in comments if key in medias and key in media_ids]
+        texts.extend([comment["text"] for key in comment_keys for comment in comments[key]])
+        unique_texts = list(dict.fromkeys(texts))
+        prep_texts = dict(zip(unique_texts, self.common_data_object.clean_texts(unique_texts))) if len(unique_texts) > 0 else {}
+
+        # 6. Insert the preprocessed titles and comments in bulk
+        titles_to_insert = [{"author":item["username"], "date":item["date"], "id_media_aut":media_ids[key],
+                             "original_text":media["title"], "preprocessed_text":prep_texts[media["title"]]}
+                            for key, (item, media) in medias.items()
+                            if media["title"] != None and key in media_ids]
+        if (len(titles_to_insert) > 0):
+            self.postgresdb_object.bulk_insert_data("insert_"+prefix+"media_titles", titles_to_insert)
+        comments_to_insert = [{"author":comment["user"], "date":medias[key][0]["date"], "id_media_aut":media_ids[key],
+                               "original_text":comment["text"], "preprocessed_text":prep_texts[comment["text"]]}
+                              for key in comment_keys for comment in comments[key]]
+        if (len(comments_to_insert) > 0):
+            self.postgresdb_object.bulk_insert_data("insert_"+prefix+"media_comments", comments_to_insert)
 
     def perform_medias_evolution(self, username, analysis, social_media,
                                  date_ini, date_fin):
@@ -655,23 +1035,12 @@ class MainOperations:
             - The file name of the saved analysis results.
             - The ids of the inserted analysis results.
         """
-        # 1. Get and insert the required medias to perform the analysis
-        self.insert_media_data(username, analysis, social_media, date_ini, date_fin)
-        # 2. Get only the required fields to perform the analysis
-        select_query = self.analysis_postgres_select_queries[analysis]
-        select_values = {"date_ini":date_ini, "date_fin":date_fin,
-                         "username":username, "social_media":social_media}
-        required_data = self.postgresdb_object.get_data(select_query, select_values)
-
-        # 3. Perform the analysis
-        analysis_results = self.data_analyzer_object.post_evolution(username, required_data)
+        # 1. Get the cached daily results and compute the ones of the missing periods of time
+        analysis_results = self.get_analysis_per_period(username, analysis, social_media, date_ini, date_fin)
         insert_analysis_query = "insert_test_medias_evolution" if "test" in analysis else "insert_medias_evolution"
         inserted_analysis_ids = []
-        # 4. Store the analysis results for each day or week
+        # 2. Store the analysis results for each day or week
         for index in range(0, len(analysis_results["date"])):
-            if("date" in str(type(analysis_results["date"][index]))):
-                analysis_results["date"][index] = datetime.strftime(analysis_results["date"][index], "%d-%m-%Y")
-
             new_analysis_result = {"date_fin":date_fin, "date_ini":date_ini, "id_user":username+"_"+social_media,
                                    "mean_comments":analysis_results["comment_count"][index],
                                    "mean_likes":analysis_results["like_count"][index], "time":analysis_results["date"][index]}
@@ -772,8 +1141,20 @@ class MainOperations:
                          "media_date_ini":date_ini, "media_date_fin":date_fin,
                          "username":username, "social_media":social_media}
         required_data = self.postgresdb_object.get_data(select_query, select_values)
-        # 3. Perform the analysis
-        analysis_results = self.data_analyzer_object.sentiment_analysis_text(username, required_data)
+        # 3. Get the sentiments of the texts which have already been analyzed
+        sentiment_cache = self.sentiment_caches["test" if "test" in analysis else "real"]
+        cached_sentiments = sentiment_cache.get_sentiments([item[1] for item in required_data])
+        # 3.1. Perform the analysis only on the texts which have never been analyzed
+        new_texts = list({item[1]:item for item in required_data if item[1] not in cached_sentiments}.values())
+        if (len(new_texts) > 0 or len(required_data) == 0):
+            new_results = self.data_analyzer_object.sentiment_analysis_text(username, new_texts)
+            new_sentiments = {new_texts[i][1]:new_results[i] for i in range(0, len(new_texts))}
+            sentiment_cache.store_sentiments(new_sentiments)
+            cached_sentiments.update(new_sentiments)
+        # 3.2. Analysis results of every text
+        analysis_results = [{"original_text":item[2], 
+                             "sentiment":cached_sentiments[item[1]]["sentiment"],
+                             "degree":cached_sentiments[item[1]]["degree"]} for item in required_data]
         # 4. Store the sentiment analysis results for the analyzed texts and count
         # the number of each one as well as the average polarity
         total_sentiments = {'pos':0.0, 'neu':0.0, 'neg':0.0}
@@ -832,26 +1213,9 @@ class MainOperations:
             - The file name of the saved analysis results.
             - The ids of the inserted analysis results.
         """
-        # 1. Get the media comments as well as the authors
-        get_comments_query = "test_get_comments_and_authors" if "test" in analysis else "get_comments_and_authors"
-        query_values = {"comment_date_ini":date_ini, "comment_date_fin":date_fin,
-                        "media_date_ini":date_ini, "media_date_fin":date_fin,
-                        "username":username, "social_media":social_media}
-        recovered_comments = self.postgresdb_object.get_data(get_comments_query, query_values)
-        # 2. Get the sentiments of the recovered comments
-        get_sentiments_query = "test_get_comment_sentiment" if "test" in analysis else "get_comment_sentiment"
-        data_to_analyze = []
-        for comment in recovered_comments:
-            recovered_sentiment = self.postgresdb_object.get_data(get_sentiments_query,
-                                                                  {"original_text":comment[2]})
-
-            if (len(recovered_sentiment) > 0):
-                data_to_analyze.append({"date":comment[0].strftime("%d-%m-%Y"), "author":comment[1],
-                                        "sentiment":recovered_sentiment[0][0]})
-
-        # 3. Analyze the user behaviours from the recovered analysed comments
-        analysis_results = self.data_analyzer_object.user_behaviours(username, data_to_analyze)
-        # 4. Insert the analysis results
+        # 1. Get the cached daily results and compute the ones of the missing periods of time
+        analysis_results = self.get_analysis_per_period(username, analysis, social_media, date_ini, date_fin)
+        # 2. Insert the analysis results
         inserted_analysis = []
         insert_query = self.analysis_results_insert_queries[analysis]
         for i in range(0, len(analysis_results["date"])):
@@ -899,6 +1263,11 @@ class MainOperations:
             similar analysis to reuse.
             - Show the analysis results directly because the current analysis
             has been performed previously.
+            - Show the analysis results directly because all the days of the
+            period of time have been analyzed by previous overlapping analysis.
+            It's only for the ProfilesEvolution, ProfilesActivity, MediasEvolution
+            and UserBehaviours analyses, whose results of the missing days will
+            be the only ones computed otherwise.
 
         Parameters
         ----------
@@ -966,32 +1335,44 @@ class MainOperations:
             raise InvalidDates("ERROR. Invalid range of dates. The initial is greater than the final.")
 
         if ("profile_evolution" in analysis):
+            # 1. Check if all the days have been analyzed before
+            cached_analysis = self.get_analysis_per_period(username, analysis, social_media, date_ini, date_fin, only_cached=True)
+            if (cached_analysis != None):
+                return cached_analysis
             analysis_values = {"date_ini":date_ini, "date_fin":date_fin, "id_user":username+"_"+social_media}
             previous_analysis = self.postgresdb_object.get_data(analysis, analysis_values)
-            # 1. Check if the analysis have been performed before
+            # 2. Check if the analysis have been performed before
             if (len(previous_analysis) > 0):
                 return self.format_previous_analysis(previous_analysis,
                               ["date", "n_followers", "n_followings", "n_medias"])
-            # 2. Perform the analysis since the beginning
+            # 3. Perform the analysis by computing only the days which are not cached
             return self.perform_profile_evolution(username, analysis, social_media, date_ini, date_fin)
 
         elif ("profile_activity" in analysis):
+            # 1. Check if all the days have been analyzed before
+            cached_analysis = self.get_analysis_per_period(username, analysis, social_media, date_ini, date_fin, only_cached=True)
+            if (cached_analysis != None):
+                return cached_analysis
             analysis_values = {"date_ini":date_ini, "date_fin":date_fin, "id_user":username+"_"+social_media}
             previous_analysis = self.postgresdb_object.get_data(analysis, analysis_values)
-            # 1. Check if the analysis have been performed before
+            # 2. Check if the analysis have been performed before
             if (len(previous_analysis) > 0):
                 return self.format_previous_analysis(previous_analysis, ["date", "n_medias"])
-            # 2. Perform the analysis since the beginning
+            # 3. Perform the analysis by computing only the days which are not cached
             return self.perform_profile_activity(username, analysis, social_media, date_ini, date_fin)
 
         elif ("media_evolution" in analysis):
+            # 1. Check if all the days have been analyzed before
+            cached_analysis = self.get_analysis_per_period(username, analysis, social_media, date_ini, date_fin, only_cached=True)
+            if (cached_analysis != None):
+                return cached_analysis
             analysis_values = {"date_ini":date_ini, "date_fin":date_fin, "id_user":username+"_"+social_media}
             previous_analysis = self.postgresdb_object.get_data(analysis, analysis_values)
-            # 1. Check if the analysis have been performed before
+            # 2. Check if the analysis have been performed before
             if (len(previous_analysis) > 0):
                 return self.format_previous_analysis(previous_analysis,
                               ['date', 'like_count', 'comment_count'])
-            # 2. Perform the analysis since the beginning
+            # 3. Perform the analysis by computing only the days which are not cached
             return self.perform_medias_evolution(username, analysis, social_media, date_ini, date_fin)
 
         elif ("media_popularity" in analysis):
@@ -1019,11 +1400,16 @@ class MainOperations:
             return self.perform_sentiment_analysis(username, analysis, social_media, date_ini, date_fin)
 
         elif ("user_behaviours" in analysis):
+            # 1. Check if all the days have been analyzed before
+            cached_analysis = self.get_analysis_per_period(username, analysis, social_media, date_ini, date_fin, only_cached=True)
+            if (cached_analysis != None):
+                return cached_analysis
             analysis_values = {"date_ini":date_ini, "date_fin":date_fin, "id_user":username+"_"+social_media}
             previous_analysis = self.postgresdb_object.get_data(analysis, analysis_values)
+            # 2. Check if the analysis have been performed before
             if (len(previous_analysis) > 0):
                 return self.format_previous_analysis(previous_analysis, ["date", "likers", "haters"])
-            # 2. Perform the analysis since the beginning
+            # 3. Perform the analysis by computing only the days which are not cached
             return self.perform_user_behaviours(username, analysis, social_media, date_ini, date_fin)
 
 if __name__ == "__main__":
@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Class which contains the daily and weekly rollups of the profile and media metrics
+of each user and social media source. They're updated incrementally when new
+profiles and medias are downloaded, so the ProfilesEvolution, ProfilesActivity
+and MediasEvolution analyses of any period of time are computed by merging the
+precomputed buckets instead of scanning the profiles and medias again:
+    - The daily buckets contain the sum of the values of each day as well as the
+    number of samples: one profile or the number of downloaded medias.
+    - The weekly buckets start on Monday and contain the number of days with data
+    as well as the sum of their daily values. For the medias, the sum of the
+    rounded daily averages of likes and comments is stored, as the MediasEvolution
+    analysis averages the days of each week.
+The weeks with data in their seven days are got from the weekly buckets when they
+start a week of the analysis results, whereas the rest of days are got from the
+daily buckets.
+
+@author: Lidia Sánchez Mérida
+"""
+from datetime import date, datetime, timedelta
+from exceptions import InvalidMode, InvalidDates, ProfilesNotFound, PostInteractionsNotFound
+
+class MetricRollups:
+
+    def __init__(self, postgresdb, mode="real"):
+        """
+        Creates a MetricRollups object whose attributes are:
+            - A PostgreDB object to operate with the rollup tables.
+            - The queries to get and insert the buckets of the profile and media
+            metrics depending on the mode (test or real).
+            - The metrics of each type of bucket.
+
+        Parameters
+        ----------
+        postgresdb : PostgreDB
+            It's the PostgreDB object which contains the connection to the database.
+        mode : str, optional
+            It's the mode which defines the rollup tables. The default is "real".
+
+        Raises
+        ------
+        InvalidMode
+            If the provided mode is not 'test' or 'real'.
+
+        Returns
+        -------
+        A MetricRollups object.
+        """
+        if (mode != "test" and mode != "real"):
+            raise InvalidMode("ERROR. The mode should be 'test' or 'real.")
+
+        self.postgresdb = postgresdb
+        prefix = "test_" if mode == "test" else ""
+        self.rollups = {
+            "profile":{
+                "get_query":prefix+"get_profile_rollups",
+                "insert_query":"insert_"+prefix+"profile_rollup",
+                "metrics":["sum_medias", "sum_followers", "sum_followings"]
+            },
+            "media":{
+                "get_query":prefix+"get_media_rollups",
+                "insert_query":"insert_"+prefix+"media_rollup",
+                "metrics":["sum_likes", "sum_comments"]
+            }
+        }
+
+    def get_id_user(self, username, social_media):
+        """
+        Gets the id of a user in the rollup tables.
+        """
+        return username+"_"+social_media.lower()
+
+    def get_day(self, value):
+        """
+        Gets the day of a date which could be a datetime, a date or a string
+        with the format dd-mm-YYYY.
+        """
+        if (isinstance(value, datetime)):
+            return value.date()
+        if (isinstance(value, date)):
+            return value
+        try:
+            return datetime.strptime(value, "%d-%m-%Y").date()
+        except (TypeError, ValueError):
+            raise InvalidDates("ERROR. The dates should be datetimes or strings with the format dd-mm-YYYY.")
+
+    def get_week(self, day):
+        """
+        Gets the Monday of the week of a specific day.
+        """
+        return day-timedelta(days=day.weekday())
+
+    def get_buckets(self, kind, id_user, period, date_ini, date_fin):
+        """
+        Gets the buckets of a user between two days.
+
+        Returns
+        -------
+        A dict whose keys are the days in which the buckets start and whose values
+        are tuples with the number of samples and the sum of each metric.
+        """
+        rows = self.postgresdb.get_data(self.rollups[kind]["get_query"], {"id_user":id_user,
+                                        "period":period, "date_ini":date_ini, "date_fin":date_fin})
+        return {row[0]:tuple(row[1:]) for row in rows}
+
+    def store_days(self, kind, daily_buckets, only_missing=False):
+        """
+        Stores the daily buckets of some users and updates the weekly buckets of
+        the weeks of those days.
+
+        Parameters
+        ----------
+        kind : str
+            It's the type of metrics: 'profile' or 'media'.
+        daily_buckets : dict
+            It's the dict whose keys are tuples with the id of the user and the
+            day, and whose values are tuples with the number of samples and the
+            sum of each metric.
+        only_missing : bool, optional
+            If it's True the days which already have a bucket will not be updated.
+            The default is False.
+
+        Returns
+        -------
+        A list with the ids of the inserted or updated buckets.
+        """
+        rollup = self.rollups[kind]
+        days_per_user = {}
+        for id_user, day in daily_buckets:
+            days_per_user.setdefault(id_user, []).append(day)
+
+        new_values = []
+        for id_user, days in days_per_user.items():
+            first_week, last_week = self.get_week(min(days)), self.get_week(max(days))
+            # Get the daily buckets of the weeks to update in a single query
+            stored_days = self.get_buckets(kind, id_user, "day", first_week, last_week+timedelta(days=6))
+            new_days = {day:daily_buckets[(id_user, day)] for day in days
+                        if not only_missing or day not in stored_days}
+            if (len(new_days) == 0):
+                continue
+            stored_days.update(new_days)
+            for day, bucket in new_days.items():
+                new_values.append(dict(zip(["bucket", "id_user", "n_samples", "period"]+rollup["metrics"],
+                                           (day, id_user, bucket[0], "day")+tuple(bucket[1:]))))
+            # Recompute the weekly buckets of the updated days
+            for week in set([self.get_week(day) for day in new_days]):
+                week_days = [stored_days[week+timedelta(days=i)] for i in range(0, 7)
+                             if week+timedelta(days=i) in stored_days]
+                if (kind == "media"):
+                    # The average of each day, as the MediasEvolution analysis computes them
+                    week_sums = [sum([round(bucket[i]/bucket[0]) for bucket in week_days])
+                                 for i in range(1, len(rollup["metrics"])+1)]
+                else:
+                    week_sums = [sum([bucket[i] for bucket in week_days])
+                                 for i in range(1, len(rollup["metrics"])+1)]
+                new_values.append(dict(zip(["bucket", "id_user", "n_samples", "period"]+rollup["metrics"],
+                                           [week, id_user, len(week_days), "week"]+week_sums)))
+
+        if (len(new_values) == 0):
+            return []
+        # Each bucket is sorted as the fields of the insert query
+        return self.postgresdb.bulk_insert_data(rollup["insert_query"],
+                                                [dict(sorted(item.items())) for item in new_values])
+
+    def update_profiles(self, profiles, only_missing=False):
+        """
+        Updates the rollups with the downloaded profiles.
+
+        Parameters
+        ----------
+        profiles : list of dicts
+            It's the list of profiles as they're stored in the Mongo database.
+        only_missing : bool, optional
+            If it's True the days which already have a bucket will not be updated.
+            The default is False.
+
+        Raises
+        ------
+        ProfilesNotFound
+            If the provided profiles are not a list of dicts.
+
+        Returns
+        -------
+        A list with the ids of the inserted or updated buckets.
+        """
+        if (type(profiles) != list or not all(isinstance(profile, dict) for profile in profiles)):
+            raise ProfilesNotFound("ERROR. The profiles should be a list of dicts.")
+
+        daily_buckets = {}
+        for profile in profiles:
+            key = (self.get_id_user(profile["username"], profile["social_media"]), self.get_day(profile["date"]))
+            try:
+                daily_buckets[key] = (1, int(profile["n_medias"]), int(profile["n_followers"]),
+                                      int(profile["n_followings"]))
+            except ValueError:
+                # The profiles without some of the metrics are skipped
+                continue
+        return self.store_days("profile", daily_buckets, only_missing)
+
+    def update_medias(self, media_lists, only_missing=False):
+        """
+        Updates the rollups with the downloaded medias.
+
+        Parameters
+        ----------
+        media_lists : list of dicts
+            It's the list of downloaded medias per day as they're stored in the
+            Mongo database.
+        only_missing : bool, optional
+            If it's True the days which already have a bucket will not be updated.
+            The default is False.
+
+        Raises
+        ------
+        PostInteractionsNotFound
+            If the provided medias are not a list of dicts.
+
+        Returns
+        -------
+        A list with the ids of the inserted or updated buckets.
+        """
+        if (type(media_lists) != list or not all(isinstance(item, dict) for item in media_lists)):
+            raise PostInteractionsNotFound("ERROR. The medias should be a list of dicts.")
+
+        daily_buckets = {}
+        for item in media_lists:
+            # The medias without the number of likes or comments are skipped
+            interactions = [(int(media["like_count"]), int(media["comment_count"])) for media in item["medias"]
+                            if str(media["like_count"]).isdigit() and str(media["comment_count"]).isdigit()]
+            if (len(interactions) == 0):
+                continue
+            key = (self.get_id_user(item["username"], item["social_media"]), self.get_day(item["date"]))
+            n_samples, sum_likes, sum_comments = daily_buckets.get(key, (0, 0, 0))
+            daily_buckets[key] = (n_samples+len(interactions),
+                                  sum_likes+sum([likes for likes, comments in interactions]),
+                                  sum_comments+sum([comments for likes, comments in interactions]))
+        return self.store_days("media", daily_buckets, only_missing)
+
+    def get_complete_weeks(self, kind, id_user, first_day, last_day):
+        """
+        Gets the weekly buckets of the weeks which are completely inside a period
+        of time and have data in their seven days.
+
+        Parameters
+        ----------
+        kind : str
+            It's the type of metrics: 'profile' or 'media'.
+        id_user : str
+            It's the id of the user in the rollup tables.
+        first_day : date
+            It's the first day of the period of time.
+        last_day : date
+            It's the last day of the period of time.
+
+        Returns
+        -------
+        A dict whose keys are the Mondays of the complete weeks and whose values
+        are tuples with the number of days and the sum of each metric.
+        """
+        first_week = first_day if first_day.weekday() == 0 else self.get_week(first_day)+timedelta(days=7)
+        last_week = self.get_week(last_day+timedelta(days=1))-timedelta(days=7)
+        if (first_week > last_week):
+            return {}
+        weekly_buckets = self.get_buckets(kind, id_user, "week", first_week, last_week)
+        return {week:bucket for week, bucket in weekly_buckets.items() if bucket[0] == 7}
@@ -3,18 +3,43 @@
 """
 Class which represents the Single Source of Truth and contains the required
 operations to work with a Mongo database. This class will be used for all the
-classes which need to operate with the Mongo database.
+classes which need to operate with the Mongo database. The query templates are
+read-only and the filters are built for each call, so the same object can be
+shared by several threads if they provide the collection of each operation.
 
 @author: Lidia Sánchez Mérida.
 """
 import os
 import pymongo
+from collections.abc import Mapping
 from datetime import datetime
+from types import MappingProxyType
 import sys
 sys.path.append('src/exceptions')
 from exceptions import ConnectionNotFound, CollectionNotFound \
     , InvalidDatabaseCredentials, InvalidQuery, NewItemNotFound, InvalidQueryValues
 
+def freeze(value):
+    """
+    Gets a read-only copy of a query template, whose dicts are converted into
+    mapping proxies and whose lists are converted into tuples.
+    """
+    if (isinstance(value, Mapping)):
+        return MappingProxyType({key:freeze(item) for key, item in value.items()})
+    if (isinstance(value, (list, tuple))):
+        return tuple([freeze(item) for item in value])
+    return value
+
+def thaw(value):
+    """
+    Gets a new mutable copy of a read-only query template.
+    """
+    if (isinstance(value, Mapping)):
+        return {key:thaw(item) for key, item in value.items()}
+    if (isinstance(value, tuple)):
+        return [thaw(item) for item in value]
+    return value
+
 class MongoDB:
     
     def __init__(self, collection):
@@ -22,8 +47,14 @@ class MongoDB:
         Creates a MongoDB object whose attributes are:
             - The name of the database to connect with.
             - The Mongo database URI and credentials.
-            - The queries to make in order to get some data.
-            - The relationship between the insert and the get queries.
+            - The read-only templates of the queries to get and delete some data,
+            their required values, the values which are dates and the fields
+            which each query returns.
+            - The position of each value in the filters of the queries.
+            - The indexes of the collections and the collections which have
+            been already indexed.
+            - The collection which stores the snapshot version of each collection,
+            which is increased every time that any record is inserted or deleted.
             - The connection to the specified collection in the Mongo database.
 
         Parameters
@@ -49,44 +80,163 @@ class MongoDB:
         if (type(uri) != str or uri == ""):
             raise InvalidDatabaseCredentials("ERROR. The MongoDB uri should be a non-empty string stored as a env variable.")
         
-        # Queries to get data
-        self.get_queries = {
+        # Queries to get data. The projection is applied by the server so the
+        # Mongo id and the fields which are not required are not transferred
+        self.get_queries = freeze({
             "get_dates":{
-                "query":{"date":1},
-                "fields":[]
+                "query":{},
+                "fields":[],
+                "dates":[],
+                "projection":{"_id":0, "date":1}
             },
             "get_item":{
                 "query":{"username":None, "social_media":None, "date":{"$gte":None, "$lte":None}},
-                "fields":["username", "social_media", "date_ini", "date_fin"]
+                "fields":["username", "social_media", "date_ini", "date_fin"],
+                "dates":["date_ini", "date_fin"],
+                "projection":{"_id":0}
             },
             "get_test":{
                 "query":{"username":None, "date":{"$gte":None, "$lte":None}, "social_media":None},
-                "fields":["username", "date_ini", "date_fin", "social_media"]
+                "fields":["username", "date_ini", "date_fin", "social_media"],
+                "dates":["date_ini", "date_fin"],
+                "projection":{"_id":0}
             },
             "general_check":{
                 "query":{"username":None, "date":None, "social_media":None},
-                "fields":["username", "date", "social_media"]
+                "fields":["username", "date", "social_media"],
+                "dates":[],
+                "projection":{"_id":0, "username":1, "date":1, "social_media":1}
             }
-        }
+        })
         
         # Queries to delete some records from a specific collection
-        self.delete_queries = {
+        self.delete_queries = freeze({
             "delete_all":{
-                "query":{}
+                "query":{},
+                "fields":[],
+                "dates":[]
             },
             "delete_item":{
-                "query":{"username":None, "date":None, "social_media":None}
+                "query":{"username":None, "date":None, "social_media":None},
+                "fields":["username", "date", "social_media"],
+                "dates":["date"]
             }
-        }
+        })
+        # Position of the values in the filters which are not a key of their own
+        self.value_paths = freeze({
+            "date_ini":["date", "$gte"],
+            "date_fin":["date", "$lte"]
+        })
         
+        # Indexes of the collections. Every query filters by the user, the social
+        # media and the date, whereas all the dates are got for the calendars.
+        # There is only one document per user, social media and date, so the
+        # concurrent inserts of the same document can't duplicate it
+        self.indexes = freeze([
+            {"keys":[("username", pymongo.ASCENDING), ("social_media", pymongo.ASCENDING),
+                     ("date", pymongo.ASCENDING)], "unique":True},
+            {"keys":[("date", pymongo.ASCENDING)], "unique":False}
+        ])
+        self.indexed_collections = set()
+        self.snapshots_collection = "snapshots"
+
         # Make the connection
         self.client = pymongo.MongoClient(uri)
         self.db = "socialnetworksdb"
         self.connection = self.client[self.db][collection]
+        self.create_indexes()
+
+    def create_indexes(self, connection=None):
+        """
+        Creates the indexes of a collection if they don't exist yet. They're
+        only created once per collection and MongoDB object. The collections
+        written before the unique index should be migrated first with the script
+        migrations/003_mongo_unique_indexes.py, since the unique index can't be
+        created while they have duplicated documents or the non-unique index.
+
+        Parameters
+        ----------
+        connection : Collection, optional
+            It's the collection to index. The default is None, so the connected
+            collection will be indexed.
+
+        Raises
+        ------
+        OperationFailure
+            If the collection has duplicated documents or the non-unique index
+            with the same keys, so it hasn't been migrated yet.
+
+        Returns
+        -------
+        None
+        """
+        connection = self.connection if connection == None else connection
+        if (connection.name not in self.indexed_collections):
+            for index in self.indexes:
+                connection.create_index(list(index["keys"]), unique=index["unique"])
+            self.indexed_collections.add(connection.name)
+
+    def get_connection(self, collection=None):
+        """
+        Gets the connection to a collection without changing the connected one,
+        so several threads can operate with different collections at the same time.
+
+        Parameters
+        ----------
+        collection : str, optional
+            It's the name of the collection. The default is None, so the connected
+            collection will be returned.
+
+        Raises
+        ------
+        CollectionNotFound
+            If the provided collection name is not a non-empty string.
+
+        Returns
+        -------
+        The connection to the collection in the Mongo database.
+        """
+        if (collection == None):
+            return self.connection
+        if (type(collection) != str or collection == ""):
+            raise CollectionNotFound("ERROR. Invalid collection name.")
+        connection = self.client[self.db][collection]
+        self.create_indexes(connection)
+        return connection
+
+    def get_filter(self, template, values):
+        """
+        Builds a new filter document from a read-only query template and the
+        provided values. The values which are dates are converted from the format
+        dd-mm-YYYY into datetimes.
+
+        Parameters
+        ----------
+        template : MappingProxyType
+            It's the template of the query with its required values and dates.
+        values : dict
+            They're the values to complete the query.
+
+        Returns
+        -------
+        A dict with the filter of the query.
+        """
+        final_query = thaw(template["query"])
+        for key in template["fields"]:
+            value = values[key]
+            if (key in template["dates"]):
+                value = datetime.strptime(value, "%d-%m-%Y")
+            path = self.value_paths.get(key, (key,))
+            query_level = final_query
+            for path_key in path[:-1]:
+                query_level = query_level[path_key]
+            query_level[path[-1]] = value
+        return final_query
         
     def set_collection(self, new_collection):
         """
-        Sets a new collection name to connect with in the Mongo database.
+        Sets a new collection name to connect with in the Mongo database and
+        creates its indexes, if it's the first time.
 
         Parameters
         ----------
@@ -106,12 +256,14 @@ class MongoDB:
             raise CollectionNotFound("ERROR. Invalid collection name.")
             
         self.connection = self.client[self.db][new_collection]
+        self.create_indexes()
         return self.connection
     
-    def get_records(self, query, values={}):
+    def get_records(self, query, values={}, fields=None, lazy=False, collection=None):
         """
         Gets the records which matched with the specified query and values from
-        the connected collection in the Mongo database.
+        the connected collection in the Mongo database. Only the fields of the
+        query, or the provided ones, are returned by the server without the Mongo id.
 
         Parameters
         ----------
@@ -120,6 +272,15 @@ class MongoDB:
         values : dict, optional
             They are the required values to make the query, in case it has them. 
             The default is a empty dict.
+        fields : list of str, optional
+            They are the fields of the records to get. The default is None, so
+            the fields of the query will be returned.
+        lazy : bool, optional
+            If it's True the records will be got from the server while they're
+            iterated instead of storing all of them in a list. The default is False.
+        collection : str, optional
+            It's the collection to get the data from. The default is None, so the
+            connected collection will be used.
 
         Raises
         ------
@@ -129,14 +290,17 @@ class MongoDB:
             If the provided query is not a non-empty string or does not exist.
         InvalidQueryValues
             If the provided values to make the query are not a non-empty dict
-            or they haven't the required keys.
+            or they haven't the required keys, or the provided fields are not
+            a non-empty list of strings.
 
         Returns
         -------
-        A list which contains the matched records as dicts.
+        A list which contains the matched records as dicts or, if it's lazy, a
+        cursor which returns them.
         """
         # Check if the connection has been made
-        if (type(self.connection) != pymongo.collection.Collection):
+        connection = self.get_connection(collection)
+        if (type(connection) != pymongo.collection.Collection):
             raise ConnectionNotFound("ERROR. There is not connection to the database.")
         # Check the provided query
         if (type(query) != str or query == ""):
@@ -144,79 +308,214 @@ class MongoDB:
         if (query not in self.get_queries):
             raise InvalidQuery("ERROR. The provided query does not exist.")
         # Check the provided values
-        required_values = self.get_queries[query]["fields"]
+        required_values = list(self.get_queries[query]["fields"])
         if (len(required_values) > 0 and (type(values) != dict or len(values) == 0)):
             raise InvalidQueryValues("ERROR. The specified query needs some values.")
         if (required_values != list(values.keys())):
             raise InvalidQueryValues("ERROR. The provided values to make the query are wrong.")
+        # Check the provided fields
+        if (fields != None and (type(fields) != list or len(fields) == 0 or
+                                not all(isinstance(field, str) and field != "" for field in fields))):
+            raise InvalidQueryValues("ERROR. The fields to get should be a non-empty list of strings.")
+        projection = dict(self.get_queries[query]["projection"])
+        if (fields != None):
+            projection = {"_id":0}
+            projection.update({field:1 for field in fields})
         
-        # Complete the query
-        final_query = self.get_queries[query]["query"]
-        if (query == "get_dates"):
-            item_rows = self.connection.find({}, final_query)
-        elif (query == "general_check"):
-            for key in final_query:
-                final_query[key] = values[key]
-            # Make the final query
-            item_rows = self.connection.find(final_query)
-        else:
-            for key in required_values:
-                if (key == "date_ini"):
-                    final_query["date"]["$gte"] = datetime.strptime(values[key],"%d-%m-%Y")
-                elif (key == "date_fin"):
-                    final_query["date"]["$lte"] = datetime.strptime(values[key],"%d-%m-%Y") 
-                else:
-                    final_query[key] = values[key]
-                    
-            # Make the final query
-            item_rows = self.connection.find(final_query)
-        
-        documents = []
-        for item_r in item_rows:
-            # Delete the Mongo id because it's useless
-            del item_r["_id"]
-            documents.append(item_r)
-            
-        return documents
+        # Build a new filter for this call, which is also the one that a lazy
+        # cursor sends to the server when it's iterated
+        final_query = self.get_filter(self.get_queries[query], values)
+        item_rows = connection.find(final_query, projection)
+        if (lazy):
+            return item_rows
+        return list(item_rows)
+
+    def get_dates(self, username=None, social_media=None, collection=None):
+        """
+        Gets the different dates in which a user received new data from a specific
+        social media. The dates are grouped and sorted by the server, which only
+        reads the compound index of the user, the social media and the date.
+
+        Parameters
+        ----------
+        username : str, optional
+            It's the user whose dates will be got. The default is None, so the
+            dates of all the users will be got.
+        social_media : str, optional
+            It's the social media source of the data. The default is None, so the
+            dates of all the social media sources will be got.
+        collection : str, optional
+            It's the collection to get the dates from. The default is None, so the
+            connected collection will be used.
+
+        Raises
+        ------
+        ConnectionNotFound
+            If the connection to the Mongo database has not been made.
+        InvalidQueryValues
+            If the provided username or social media are not non-empty strings.
+
+        Returns
+        -------
+        A list of datetimes sorted from the oldest to the newest one.
+        """
+        # Check if the connection has been made
+        connection = self.get_connection(collection)
+        if (type(connection) != pymongo.collection.Collection):
+            raise ConnectionNotFound("ERROR. There is not connection to the database.")
+        # Check the provided user and social media
+        match = {}
+        for key, value in [("username", username), ("social_media", social_media)]:
+            if (value != None):
+                if (type(value) != str or value == ""):
+                    raise InvalidQueryValues("ERROR. The "+key+" should be a non-empty string.")
+                match[key] = value
+
+        pipeline = [{"$match":match}, {"$group":{"_id":"$date"}}, {"$sort":{"_id":pymongo.ASCENDING}}]
+        return [item["_id"] for item in connection.aggregate(pipeline)]
+
+    def get_snapshot(self, collection=None):
+        """
+        Gets the snapshot version of a collection, so the data got from it could
+        be cached while the version doesn't change, even by another process.
+
+        Parameters
+        ----------
+        collection : str, optional
+            It's the collection whose version will be got. The default is None,
+            so the connected collection will be used.
+
+        Returns
+        -------
+        An integer which is 0 if there are not inserted records yet.
+        """
+        name = self.get_connection(collection).name
+        snapshot = self.client[self.db][self.snapshots_collection].find_one({"_id":name})
+        return 0 if snapshot == None else snapshot["version"]
+
+    def update_snapshot(self, connection):
+        """
+        Increases the snapshot version of a collection whose records have been
+        inserted or deleted.
+        """
+        self.client[self.db][self.snapshots_collection].update_one(
+            {"_id":connection.name}, {"$inc":{"version":1}}, upsert=True)
     
-    def insert_item(self, new_item):
+    def get_upsert(self, new_item):
+        """
+        Gets the filter and the update which insert a new item only if there
+        isn't any item with the same username, social media and date.
+
+        Raises
+        ------
+        NewItemNotFound
+            If the provided item is not a non-empty dict or it doesn't have the
+            username, the social media or the date.
+
+        Returns
+        -------
+        A tuple with the filter and the update of the upsert.
+        """
+        if (type(new_item) != dict or len(new_item) == 0):
+            raise NewItemNotFound("ERROR. The new item to insert should be a non-empty dict.")
+        if (not all(key in new_item for key in self.get_queries["general_check"]["fields"])):
+            raise NewItemNotFound("ERROR. The new item should have the username, the social media and the date.")
+        item_filter = {key:new_item[key] for key in self.get_queries["general_check"]["fields"]}
+        return item_filter, {"$setOnInsert":new_item}
+
+    def insert_item(self, new_item, collection=None):
         """
         Inserts a new record in a specific collection in the Mongo database if
-        it doesn't already exist.
+        it doesn't already exist. The check and the insertion are done by the
+        server in a single upsert.
 
         Parameters
         ----------
         new_item : dict
             It's the new data to insert.
+        collection : str, optional
+            It's the collection to insert the data into. The default is None, so
+            the connected collection will be used.
 
         Raises
         ------
         ConnectionNotFound
             If the connection to the Mongo database has not been made.
         NewItemNotFound
-            If the provided values to make the query are not a non-empty dict.
+            If the provided item is not a non-empty dict or it doesn't have the
+            username, the social media or the date.
 
         Returns
         -------
         A string id if the item could be inserted, None if it couldn't.
         """
         # Check if the connection has been made
-        if (type(self.connection) != pymongo.collection.Collection):
+        connection = self.get_connection(collection)
+        if (type(connection) != pymongo.collection.Collection):
             raise ConnectionNotFound("ERROR. There is not connection to the database.")
-        # Check the provided new item
-        if (type(new_item) != dict or len(new_item) == 0):
-            raise NewItemNotFound("ERROR. The new item to insert should be a non-empty dict.")
-        
-        # Check if the item to insert already exists
-        final_query = self.get_queries["general_check"]["query"]
-        for key in self.get_queries["general_check"]["fields"]:
-            final_query[key] = new_item[key]
-        
-        matched_records = self.get_records("general_check", final_query)
-        # Insert the query if there are not equal records
-        if (len(matched_records) == 0):
-            id_new_item = self.connection.insert_one(new_item.copy(), bypass_document_validation=True).inserted_id
-            return str(id_new_item)
+        item_filter, item_update = self.get_upsert(new_item)
+
+        # Insert the item if there are not equal records
+        try:
+            result = connection.update_one(item_filter, item_update, upsert=True,
+                                           bypass_document_validation=True)
+        except pymongo.errors.DuplicateKeyError:
+            # The same item has been inserted by another process at the same time
+            return None
+        if (result.upserted_id != None):
+            self.update_snapshot(connection)
+            return str(result.upserted_id)
+
+    def insert_items(self, new_items, collection=None):
+        """
+        Inserts a list of new records in a specific collection in the Mongo database
+        with a single request. The records which already exist are not inserted.
+
+        Parameters
+        ----------
+        new_items : list of dicts
+            It's the list of new data to insert.
+        collection : str, optional
+            It's the collection to insert the data into. The default is None, so
+            the connected collection will be used.
+
+        Raises
+        ------
+        ConnectionNotFound
+            If the connection to the Mongo database has not been made.
+        NewItemNotFound
+            If the provided items are not a non-empty list of non-empty dicts
+            with the username, the social media and the date.
+
+        Returns
+        -------
+        A dict with the number of inserted items, the number of items which
+        already existed and the string ids of the inserted items.
+        """
+        # Check if the connection has been made
+        connection = self.get_connection(collection)
+        if (type(connection) != pymongo.collection.Collection):
+            raise ConnectionNotFound("ERROR. There is not connection to the database.")
+        # Check the provided new items
+        if (type(new_items) != list or len(new_items) == 0):
+            raise NewItemNotFound("ERROR. The new items to insert should be a non-empty list of dicts.")
+        upserts = [pymongo.UpdateOne(*self.get_upsert(new_item), upsert=True) for new_item in new_items]
+
+        # The items are inserted in any order so an existing item doesn't stop the rest
+        try:
+            result = connection.bulk_write(upserts, ordered=False, bypass_document_validation=True)
+            inserted_items = {"inserted":result.upserted_count, "matched":result.matched_count,
+                              "ids":[str(upserted_id) for upserted_id in result.upserted_ids.values()]}
+        except pymongo.errors.BulkWriteError as error:
+            # The duplicated items have been inserted by another process at the same time
+            if (any(write_error["code"] != 11000 for write_error in error.details["writeErrors"])):
+                raise
+            inserted_items = {"inserted":error.details["nUpserted"],
+                              "matched":error.details["nMatched"]+len(error.details["writeErrors"]),
+                              "ids":[str(upserted["_id"]) for upserted in error.details["upserted"]]}
+        if (inserted_items["inserted"] > 0):
+            self.update_snapshot(connection)
+        return inserted_items
     
     def collection_size(self):
         """
@@ -228,7 +527,7 @@ class MongoDB:
         """
         return self.connection.count_documents({})
     
-    def delete_records(self, query, values={}):
+    def delete_records(self, query, values={}, collection=None):
         """
         Deletes the matched records from a specific collection and related to
         the provided query.
@@ -239,6 +538,9 @@ class MongoDB:
             It's the query to make in order to remove the matched records.
         values : dict, optional
             They're the values to make the query. The default is {}.
+        collection : str, optional
+            It's the collection to delete the data from. The default is None, so
+            the connected collection will be used.
 
         Raises
         ------
@@ -255,7 +557,8 @@ class MongoDB:
         The number of deleted records.
         """
         # Check if the connection has been made
-        if (type(self.connection) != pymongo.collection.Collection):
+        connection = self.get_connection(collection)
+        if (type(connection) != pymongo.collection.Collection):
             raise ConnectionNotFound("ERROR. There is not connection to the database.")
         # Check the provided query
         if (type(query) != str or query == ""):
@@ -263,21 +566,15 @@ class MongoDB:
         if (query not in self.delete_queries):
             raise InvalidQuery("ERROR. The provided query does not exist.")
         # Check the provided values
-        required_values = list(self.delete_queries[query]["query"].keys())
+        required_values = list(self.delete_queries[query]["fields"])
         if (len(required_values) > 0 and (type(values) != dict or len(values) == 0)):
             raise InvalidQueryValues("ERROR. The specified query needs some values.")
         if (required_values != list(values.keys())):
             raise InvalidQueryValues("ERROR. The provided values to make the query are wrong.")
         
-        # Complete the query
-        final_query = self.delete_queries[query]["query"]
-        if (len(required_values) > 0):
-            for key in final_query:
-                if (key == "date"):
-                    final_query[key] = datetime.strptime(values[key],"%d-%m-%Y")
-                else:
-                    final_query[key] = values[key]
-        
-        # Delete the matched items related to the specified query
-        result = self.connection.delete_many(final_query)
+        # Build a new filter for this call and delete the matched items
+        final_query = self.get_filter(self.delete_queries[query], values)
+        result = connection.delete_many(final_query)
+        if (result.deleted_count > 0):
+            self.update_snapshot(connection)
         return result.deleted_count
\ No newline at end of file
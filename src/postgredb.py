@@ -4,45 +4,98 @@
 Class which represents the Single Source of Truth and contains the operations
 which can be done in the PostgreSQL database.
     - Insert a new item in a specific table, if it's not already.
-    - Get the matched records related to a specific query.
+    - Insert many items at once in a specific table, skipping the existing ones.
+    - Get the matched records related to a specific query, all at once or
+    streaming them from a server-side cursor.
     - Get the number of records or size from a table.
 
+The connections are taken from a pool, so a PostgreDB object could be shared by
+many threads, such as the Gunicorn threads of the web app.
+
 This class will be used by the classes which needs to operate with the PostgreSQL database.
 
 @author: Lidia Sánchez Mérida
 """
 import psycopg2
+from psycopg2.extras import execute_values
+from psycopg2.pool import ThreadedConnectionPool
+from contextlib import contextmanager
 import os
+import threading
+import time
+import uuid
 from exceptions import InvalidDatabaseCredentials, InvalidTableName \
-    , InvalidQuery, InvalidQueryValues
+    , InvalidQuery, InvalidQueryValues, InvalidPoolSize, ConnectionTimeout
 
 class PostgreDB:
     
-    def __init__(self):
+    def __init__(self, min_connections=None, max_connections=None, wait_timeout=None,
+                 health_check_interval=30):
         """
         Creates a PostgreSQL object whose attributes are:
             - The name of the PostgreSQL database.
             - The tables of the database.
-            - The connection and the cursor to make queries.
+            - The pool of connections to make queries, its minimum and maximum
+            number of connections and the maximum seconds to wait for a connection.
+            - The statistics of the pool: the number of checkouts, timeouts and
+            reconnections as well as the time waited for the connections.
             - The avalaible queries to make.
             - The check queries to make in order to insert new data.
 
+        Parameters
+        ----------
+        min_connections : int, optional
+            It's the number of connections opened in advance. The default is None,
+            so the env variable POSTGRES_POOL_MIN will be used or 1 if it's not set.
+        max_connections : int, optional
+            It's the maximum number of connections. The default is None, so the
+            env variable POSTGRES_POOL_MAX will be used or 10 if it's not set.
+        wait_timeout : float, optional
+            It's the maximum seconds to wait for a connection. The default is None,
+            so the env variable POSTGRES_POOL_WAIT will be used or 30 if it's not set.
+        health_check_interval : float, optional
+            It's the number of seconds which a connection could be unused before
+            checking it again. The default is 30.
+
+        Raises
+        ------
+        InvalidPoolSize
+            If the provided number of connections or the waiting time are not valid.
+
         Returns
         -------
         A PostgreSQL object with the connection to the PostgreSQL database.
         """
         # Database name
         self.database_name = "socialnetworksdb"
+        # Pool of connections
+        self.min_connections = int(os.environ.get("POSTGRES_POOL_MIN", 1)) if min_connections == None else min_connections
+        self.max_connections = int(os.environ.get("POSTGRES_POOL_MAX", 10)) if max_connections == None else max_connections
+        self.wait_timeout = float(os.environ.get("POSTGRES_POOL_WAIT", 30)) if wait_timeout == None else wait_timeout
+        if (type(self.min_connections) != int or type(self.max_connections) != int or
+            self.min_connections < 0 or self.max_connections < 1 or self.min_connections > self.max_connections):
+            raise InvalidPoolSize("ERROR. The pool should have between 0 and max_connections connections.")
+        if (not isinstance(self.wait_timeout, (int, float)) or self.wait_timeout < 0):
+            raise InvalidPoolSize("ERROR. The waiting time should be a non-negative number of seconds.")
+        self.health_check_interval = health_check_interval
+        self.pool = None
+        self.pool_slots = threading.BoundedSemaphore(self.max_connections)
+        self.stats_lock = threading.Lock()
+        self.last_used = {}
+        self.pool_stats = {"checkouts":0, "timeouts":0, "reconnections":0, "in_use":0,
+                           "total_wait":0.0, "max_wait":0.0}
         # Tables of the database
         self.tables = ['testparent', 'testchild', 'testfk',
                        'testprofiles', 'testprofilesevolution','testprofilesactivity',
                        'testmedias', 'testmediasevolution', 'testmediaspopularity',
                        'testmediatitles', 'testmediacomments',
                        'testtextsentiments', 'testcommentsentiments', 'testuserbehaviours',
+                       'testsentimentcache', 'testprofilerollups', 'testmediarollups',
                        
                        'profiles', 'profilesevolution', 'profilesactivity',
                        'medias', 'mediasevolution', 'mediaspopularity',
-                       'textsentiments', 'userbehaviours'
+                       'textsentiments', 'userbehaviours', 'sentimentcache',
+                       'profilerollups', 'mediarollups'
                        ]
         # Connect to the database
         self.connect_to_database()
@@ -76,6 +129,11 @@ class PostgreDB:
                 'query':'SELECT date, n_medias FROM testprofiles WHERE '+
                     'username=%s AND social_media=%s AND date>=%s AND date<=%s',
                 'fields':['username', 'social_media', 'date_ini', 'date_fin']},
+            ## Get the ids of the profiles of a specific range of dates to insert their medias
+            'test_get_profile_ids':{
+                'query':"SELECT id_profile, date FROM testprofiles WHERE username=%s AND social_media=%s "+
+                    "AND date>=TO_DATE(%s,'DD-MM-YYYY') AND date<=TO_DATE(%s,'DD-MM-YYYY')",
+                'fields':['username', 'social_media', 'date_ini', 'date_fin']},
             ## Check if the ProfilesEvolution analysis results are already in the database
             'check_test_profile_evolution':{
                 'query':'SELECT id_profile_evolution FROM testprofilesevolution WHERE '+
@@ -119,6 +177,13 @@ class PostgreDB:
                     "(SELECT id_profile FROM testprofiles WHERE username=%s AND social_media=%s)",
                 'fields':['date_ini', 'date_fin', 'username', 'social_media'],
             },
+            # Get the ids of the medias of a specific range of dates to insert their titles and comments
+            'test_get_media_ids':{
+                'query':"SELECT id_media_aut, id_media, date FROM testmedias "+
+                    "WHERE date>=TO_DATE(%s,'DD-MM-YYYY') AND date<=TO_DATE(%s,'DD-MM-YYYY') AND id_profile IN "+
+                    "(SELECT id_profile FROM testprofiles WHERE username=%s AND social_media=%s)",
+                'fields':['date_ini', 'date_fin', 'username', 'social_media'],
+            },
             # Check if a specific comment is already in the database before inserting it
             'check_test_media_comment':{
                 'query':"SELECT id_text FROM testmediacomments WHERE type='comment' AND original_text=%s AND author=%s AND id_media_aut=%s",
@@ -201,6 +266,17 @@ class PostgreDB:
                 'fields':["comment_date_ini", "comment_date_fin", "media_date_ini", "media_date_fin",
                           "username", "social_media"]
             },
+            # Get the analysed comments, their authors and their identified sentiments
+            # in a single query instead of one query per comment
+            'test_get_comments_and_sentiments':{
+                'query':"SELECT c.date, c.author, s.sentiment FROM testmediacomments c JOIN LATERAL "+
+                    "(SELECT sentiment FROM testcommentsentiments WHERE original_text=c.original_text LIMIT 1) s ON TRUE "+
+                    "WHERE c.type='comment' AND c.date>=%s AND c.date<=%s AND c.id_media_aut IN "+
+                    "(SELECT id_media_aut FROM testmedias WHERE type='common' AND date>=%s AND date<=%s AND id_profile IN "+
+                    "(SELECT id_profile FROM testprofiles WHERE username=%s AND social_media=%s))",
+                'fields':["comment_date_ini", "comment_date_fin", "media_date_ini", "media_date_fin",
+                          "username", "social_media"]
+            },
             # Get the sentiment from a analysed comment 
             'test_get_comment_sentiment':{
                 'query':"SELECT sentiment FROM testcommentsentiments WHERE original_text=%s",
@@ -218,6 +294,28 @@ class PostgreDB:
                     'date_ini=%s AND date_fin=%s AND id_user=%s',
                 'fields':['date_ini', 'date_fin', 'id_user']
             },
+            # Get the cached sentiments of a list of text hashes
+            'test_get_cached_sentiments':{
+                'query':'SELECT text_hash, sentiment, degree FROM testsentimentcache WHERE text_hash = ANY(%s)',
+                'fields':['text_hashes']
+            },
+            # Check if the sentiment of a text hash is already cached
+            'check_test_cached_sentiment':{
+                'query':'SELECT text_hash FROM testsentimentcache WHERE text_hash=%s',
+                'fields':['text_hash']
+            },
+            # Get the daily or weekly buckets of the profile metrics of a user
+            'test_get_profile_rollups':{
+                'query':'SELECT bucket, n_samples, sum_medias, sum_followers, sum_followings FROM testprofilerollups '+
+                    'WHERE id_user=%s AND period=%s AND bucket>=%s AND bucket<=%s ORDER BY bucket',
+                'fields':['id_user', 'period', 'date_ini', 'date_fin']
+            },
+            # Get the daily or weekly buckets of the likes and comments of a user
+            'test_get_media_rollups':{
+                'query':'SELECT bucket, n_samples, sum_likes, sum_comments FROM testmediarollups '+
+                    'WHERE id_user=%s AND period=%s AND bucket>=%s AND bucket<=%s ORDER BY bucket',
+                'fields':['id_user', 'period', 'date_ini', 'date_fin']
+            },
             
             ############################### REAL ANALYSIS ##################################
             # FOR PROFILES_EVOLUTION AND PROFILES_ACTIVITY
@@ -235,6 +333,11 @@ class PostgreDB:
                 'query':'SELECT date, n_medias FROM profiles WHERE '+
                     'username=%s AND social_media=%s AND date>=%s AND date<=%s',
                 'fields':['username', 'social_media', 'date_ini', 'date_fin']},
+            ## Get the ids of the profiles of a specific range of dates to insert their medias
+            'get_profile_ids':{
+                'query':"SELECT id_profile, date FROM profiles WHERE username=%s AND social_media=%s "+
+                    "AND date>=TO_DATE(%s,'DD-MM-YYYY') AND date<=TO_DATE(%s,'DD-MM-YYYY')",
+                'fields':['username', 'social_media', 'date_ini', 'date_fin']},
             ## Check if the ProfilesEvolution analysis results are already in the database
             'check_profile_evolution':{
                 'query':'SELECT id_profile_evolution FROM profilesevolution WHERE '+
@@ -278,6 +381,13 @@ class PostgreDB:
                     "(SELECT id_profile FROM profiles WHERE username=%s AND social_media=%s)",
                 'fields':['date_ini', 'date_fin', 'username', 'social_media'],
             },
+            # Get the ids of the medias of a specific range of dates to insert their titles and comments
+            'get_media_ids':{
+                'query':"SELECT id_media_aut, id_media, date FROM medias "+
+                    "WHERE date>=TO_DATE(%s,'DD-MM-YYYY') AND date<=TO_DATE(%s,'DD-MM-YYYY') AND id_profile IN "+
+                    "(SELECT id_profile FROM profiles WHERE username=%s AND social_media=%s)",
+                'fields':['date_ini', 'date_fin', 'username', 'social_media'],
+            },
             # Check if a specific comment is already in the database before inserting it
             'check_media_comment':{
                 'query':"SELECT id_text FROM mediacomments WHERE type='comment' AND original_text=%s AND author=%s AND id_media_aut=%s",
@@ -360,6 +470,17 @@ class PostgreDB:
                 'fields':["comment_date_ini", "comment_date_fin", "media_date_ini", "media_date_fin",
                           "username", "social_media"]
             },
+            # Get the analysed comments, their authors and their identified sentiments
+            # in a single query instead of one query per comment
+            'get_comments_and_sentiments':{
+                'query':"SELECT c.date, c.author, s.sentiment FROM mediacomments c JOIN LATERAL "+
+                    "(SELECT sentiment FROM commentsentiments WHERE original_text=c.original_text LIMIT 1) s ON TRUE "+
+                    "WHERE c.type='comment' AND c.date>=%s AND c.date<=%s AND c.id_media_aut IN "+
+                    "(SELECT id_media_aut FROM medias WHERE type='common' AND date>=%s AND date<=%s AND id_profile IN "+
+                    "(SELECT id_profile FROM profiles WHERE username=%s AND social_media=%s))",
+                'fields':["comment_date_ini", "comment_date_fin", "media_date_ini", "media_date_fin",
+                          "username", "social_media"]
+            },
             # Get the sentiment from a analysed comment 
             'get_comment_sentiment':{
                 'query':"SELECT sentiment FROM commentsentiments WHERE original_text=%s",
@@ -377,6 +498,28 @@ class PostgreDB:
                     'date_ini=%s AND date_fin=%s AND id_user=%s',
                 'fields':['date_ini', 'date_fin', 'id_user']
             },
+            # Get the cached sentiments of a list of text hashes
+            'get_cached_sentiments':{
+                'query':'SELECT text_hash, sentiment, degree FROM sentimentcache WHERE text_hash = ANY(%s)',
+                'fields':['text_hashes']
+            },
+            # Check if the sentiment of a text hash is already cached
+            'check_cached_sentiment':{
+                'query':'SELECT text_hash FROM sentimentcache WHERE text_hash=%s',
+                'fields':['text_hash']
+            },
+            # Get the daily or weekly buckets of the profile metrics of a user
+            'get_profile_rollups':{
+                'query':'SELECT bucket, n_samples, sum_medias, sum_followers, sum_followings FROM profilerollups '+
+                    'WHERE id_user=%s AND period=%s AND bucket>=%s AND bucket<=%s ORDER BY bucket',
+                'fields':['id_user', 'period', 'date_ini', 'date_fin']
+            },
+            # Get the daily or weekly buckets of the likes and comments of a user
+            'get_media_rollups':{
+                'query':'SELECT bucket, n_samples, sum_likes, sum_comments FROM mediarollups '+
+                    'WHERE id_user=%s AND period=%s AND bucket>=%s AND bucket<=%s ORDER BY bucket',
+                'fields':['id_user', 'period', 'date_ini', 'date_fin']
+            },
         }
         
         ## 2. INSERT QUERIES
@@ -478,6 +621,32 @@ class PostgreDB:
                 'fields':["date_fin", "date_ini", "id_user", "n_haters", "n_likers", "time"],
                 'table':"testuserbehaviours"
             },
+            # Insert the sentiment of a text analyzed by a specific model version
+            'insert_test_cached_sentiment':{
+                'query':"INSERT INTO testsentimentcache (degree, model_version, sentiment, text_hash) "+
+                    "VALUES (%s, %s, %s, %s) RETURNING text_hash",
+                'fields':['degree', 'model_version', 'sentiment', 'text_hash'],
+                'table':"testsentimentcache"
+            },
+            # Insert or update the daily or weekly buckets of the profile metrics of a user
+            'insert_test_profile_rollup':{
+                'query':"INSERT INTO testprofilerollups (bucket, id_user, n_samples, period, sum_followers, "+
+                    "sum_followings, sum_medias) VALUES (%s, %s, %s, %s, %s, %s, %s) RETURNING id_profile_rollup",
+                'fields':['bucket', 'id_user', 'n_samples', 'period', 'sum_followers', 'sum_followings', 'sum_medias'],
+                'table':"testprofilerollups",
+                'on_conflict':"(id_user, period, bucket) DO UPDATE SET n_samples=EXCLUDED.n_samples, "+
+                    "sum_followers=EXCLUDED.sum_followers, sum_followings=EXCLUDED.sum_followings, "+
+                    "sum_medias=EXCLUDED.sum_medias"
+            },
+            # Insert or update the daily or weekly buckets of the likes and comments of a user
+            'insert_test_media_rollup':{
+                'query':"INSERT INTO testmediarollups (bucket, id_user, n_samples, period, sum_comments, "+
+                    "sum_likes) VALUES (%s, %s, %s, %s, %s, %s) RETURNING id_media_rollup",
+                'fields':['bucket', 'id_user', 'n_samples', 'period', 'sum_comments', 'sum_likes'],
+                'table':"testmediarollups",
+                'on_conflict':"(id_user, period, bucket) DO UPDATE SET n_samples=EXCLUDED.n_samples, "+
+                    "sum_comments=EXCLUDED.sum_comments, sum_likes=EXCLUDED.sum_likes"
+            },
             
             ###################################### REAL ANALYSIS ##################################
             # FOR PROFILES_EVOLUTION AND PROFILES_ACTIVITY
@@ -563,6 +732,32 @@ class PostgreDB:
                 'fields':["date_fin", "date_ini", "id_user", "n_haters", "n_likers", "time"],
                 'table':"userbehaviours"
             },
+            # Insert the sentiment of a text analyzed by a specific model version
+            'insert_cached_sentiment':{
+                'query':"INSERT INTO sentimentcache (degree, model_version, sentiment, text_hash) "+
+                    "VALUES (%s, %s, %s, %s) RETURNING text_hash",
+                'fields':['degree', 'model_version', 'sentiment', 'text_hash'],
+                'table':"sentimentcache"
+            },
+            # Insert or update the daily or weekly buckets of the profile metrics of a user
+            'insert_profile_rollup':{
+                'query':"INSERT INTO profilerollups (bucket, id_user, n_samples, period, sum_followers, "+
+                    "sum_followings, sum_medias) VALUES (%s, %s, %s, %s, %s, %s, %s) RETURNING id_profile_rollup",
+                'fields':['bucket', 'id_user', 'n_samples', 'period', 'sum_followers', 'sum_followings', 'sum_medias'],
+                'table':"profilerollups",
+                'on_conflict':"(id_user, period, bucket) DO UPDATE SET n_samples=EXCLUDED.n_samples, "+
+                    "sum_followers=EXCLUDED.sum_followers, sum_followings=EXCLUDED.sum_followings, "+
+                    "sum_medias=EXCLUDED.sum_medias"
+            },
+            # Insert or update the daily or weekly buckets of the likes and comments of a user
+            'insert_media_rollup':{
+                'query':"INSERT INTO mediarollups (bucket, id_user, n_samples, period, sum_comments, "+
+                    "sum_likes) VALUES (%s, %s, %s, %s, %s, %s) RETURNING id_media_rollup",
+                'fields':['bucket', 'id_user', 'n_samples', 'period', 'sum_comments', 'sum_likes'],
+                'table':"mediarollups",
+                'on_conflict':"(id_user, period, bucket) DO UPDATE SET n_samples=EXCLUDED.n_samples, "+
+                    "sum_comments=EXCLUDED.sum_comments, sum_likes=EXCLUDED.sum_likes"
+            },
         }
         
         # 3. INSERT-SELECT QUERIES
@@ -587,6 +782,8 @@ class PostgreDB:
             'insert_test_sentiment_analysis':'check_test_sentiment_analysis',
             # FOR USER BEHAVIOURS ANALYSIS
             'insert_test_user_behaviour':'check_test_user_behaviour',
+            # FOR THE SENTIMENT CACHE
+            'insert_test_cached_sentiment':'check_test_cached_sentiment',
             
             ######################### REAL ANALYSIS #########################
             # FOR PROFILES ANALYSIS
@@ -604,12 +801,14 @@ class PostgreDB:
             'insert_sentiment_analysis':'check_sentiment_analysis',
             # FOR USER BEHAVIOURS ANALYSIS
             'insert_user_behaviour':'check_user_behaviour',
+            # FOR THE SENTIMENT CACHE
+            'insert_cached_sentiment':'check_cached_sentiment',
         }
         
     def connect_to_database(self):
         """
-        Makes the connection to the database through the environment variables which
-        contains the credentials.
+        Creates the pool of connections to the database through the environment
+        variables which contains the credentials.
 
         Raises
         ------
@@ -618,7 +817,7 @@ class PostgreDB:
 
         Returns
         -------
-        The cursor object which allows to make the queries.
+        The pool of connections which allows to make the queries.
         """
         # Get the PostgreSQL credentials
         user = os.environ.get("POSTGRES_USER") 
@@ -628,17 +827,117 @@ class PostgreDB:
             raise InvalidDatabaseCredentials("ERROR. The PostgreSQL credentials should be non-empty strings.")
         # Try to connect to the database        
         try:
-            self.connection = psycopg2.connect(host="localhost", user=user, 
-                               password=pswd, database=self.database_name)
-            self.cursor = self.connection.cursor()
-            return self.cursor
+            self.pool = ThreadedConnectionPool(self.min_connections, self.max_connections,
+                               host="localhost", user=user, password=pswd, database=self.database_name)
+            # Check the credentials even if there are not any connections opened in advance
+            with self.get_connection():
+                pass
+            return self.pool
         except Exception: # pragma no cover
             raise InvalidDatabaseCredentials("ERROR. The provided PostgreSQL credentials are wrong.")
-    
-    def get_data(self, query, values={}):
+
+    def is_healthy(self, connection):
         """
-        Makes a predefined query in a specific table and returns the matched records.
-        In order to prevent SQL injection, non-predefined queries will not be allowed.
+        Checks if a connection of the pool could be used. The connections which
+        have not been used recently are checked with a lightweight query.
+
+        Parameters
+        ----------
+        connection : psycopg2 connection
+            It's the connection to check.
+
+        Returns
+        -------
+        True if the connection could be used, False if it couldn't.
+        """
+        if (connection.closed != 0):
+            return False
+        if (time.monotonic()-self.last_used.get(id(connection), 0) < self.health_check_interval):
+            return True
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT 1")
+            connection.rollback()
+            return True
+        except psycopg2.Error:
+            return False
+
+    @contextmanager
+    def get_connection(self):
+        """
+        Takes a connection from the pool and gives it back when the block ends.
+        If the block raises an exception, its transaction will be rolled back.
+        The broken connections are replaced by new ones.
+
+        Raises
+        ------
+        ConnectionTimeout
+            If there are not any avalaible connections after waiting the maximum time.
+
+        Returns
+        -------
+        A psycopg2 connection to make the queries.
+        """
+        start = time.perf_counter()
+        if (not self.pool_slots.acquire(timeout=self.wait_timeout)):
+            with self.stats_lock:
+                self.pool_stats["timeouts"] += 1
+            raise ConnectionTimeout("ERROR. There are not any avalaible connections to the database.")
+        try:
+            connection = self.pool.getconn()
+            if (not self.is_healthy(connection)):
+                self.last_used.pop(id(connection), None)
+                self.pool.putconn(connection, close=True)
+                connection = self.pool.getconn()
+                with self.stats_lock:
+                    self.pool_stats["reconnections"] += 1
+            waited = time.perf_counter()-start
+            with self.stats_lock:
+                self.pool_stats["checkouts"] += 1
+                self.pool_stats["in_use"] += 1
+                self.pool_stats["total_wait"] += waited
+                self.pool_stats["max_wait"] = max(self.pool_stats["max_wait"], waited)
+            try:
+                yield connection
+            except Exception:
+                if (connection.closed == 0):
+                    connection.rollback()
+                raise
+            finally:
+                self.last_used[id(connection)] = time.monotonic()
+                with self.stats_lock:
+                    self.pool_stats["in_use"] -= 1
+                # The pool rolls back the transactions which have not been commited
+                self.pool.putconn(connection, close=connection.closed != 0)
+        finally:
+            self.pool_slots.release()
+
+    def get_pool_stats(self):
+        """
+        Gets the statistics of the pool of connections.
+
+        Returns
+        -------
+        A dict with the number of checkouts, timeouts, reconnections and connections
+        in use as well as the mean and maximum seconds waited for a connection.
+        """
+        with self.stats_lock:
+            stats = dict(self.pool_stats)
+        stats["mean_wait"] = stats["total_wait"]/stats["checkouts"] if stats["checkouts"] > 0 else 0.0
+        stats["max_connections"] = self.max_connections
+        return stats
+
+    def close(self):
+        """
+        Closes all the connections of the pool.
+        """
+        if (self.pool != None):
+            self.pool.closeall()
+
+    def check_select_query(self, query, values):
+        """
+        Checks that the provided query is one of the predefined select queries
+        and the provided values are the ones it requires.
 
         Parameters
         ----------
@@ -646,19 +945,13 @@ class PostgreDB:
             It's the predefined query to make.
         values : dict
             It's the dict which contains the values to make the provided query.
-            It could be not provided if the query does not need any additional parameters.
-        
+
         Raises
         ------
         InvalidQuery
             If the provided query is not a non-empty string or is not one of the defined queries.
         InvalidQueryValues
             If the provided values for the selected query are not valid.
-
-        Returns
-        -------
-        A tuple of lists with the matched results and the values of the specific
-        chosen fields.
         """
         # Check the provided predefined query
         if (type(query) != str or query == ""):
@@ -675,18 +968,100 @@ class PostgreDB:
         value_fields = list(values.keys())
         if (query_fields != value_fields):
             raise InvalidQueryValues("ERROR. Some of the required values are missing or are wrong.")
-    
+
+    def get_data(self, query, values={}):
+        """
+        Makes a predefined query in a specific table and returns the matched records.
+        In order to prevent SQL injection, non-predefined queries will not be allowed.
+
+        Parameters
+        ----------
+        query : str
+            It's the predefined query to make.
+        values : dict
+            It's the dict which contains the values to make the provided query.
+            It could be not provided if the query does not need any additional parameters.
+        
+        Raises
+        ------
+        InvalidQuery
+            If the provided query is not a non-empty string or is not one of the defined queries.
+        InvalidQueryValues
+            If the provided values for the selected query are not valid.
+
+        Returns
+        -------
+        A tuple of lists with the matched results and the values of the specific
+        chosen fields.
+        """
+        self.check_select_query(query, values)
+        
         # Make the final query
-        try: 
-            self.cursor.execute(self.select_queries[query]['query'], list(values.values()))
-            matches = self.cursor.fetchall()
-        except: #pragma no cover
-            self.connect_to_database()
-            self.cursor.execute(self.select_queries[query]['query'], list(values.values()))
-            matches = self.cursor.fetchall()
+        with self.get_connection() as connection:
+            with connection.cursor() as cursor:
+                cursor.execute(self.select_queries[query]['query'], list(values.values()))
+                matches = cursor.fetchall()
+            connection.commit()
         
         return matches
     
+    def stream_data(self, query, values={}, itersize=2000, chunk_size=None):
+        """
+        Makes a predefined query in a specific table and yields the matched records
+        as they're read from a server-side cursor, so only a few thousand of records
+        are in memory at once. The connection is taken from the pool until all the
+        records have been read or the generator is closed.
+
+        Parameters
+        ----------
+        query : str
+            It's the predefined query to make.
+        values : dict
+            It's the dict which contains the values to make the provided query.
+        itersize : int, optional
+            It's the number of records transferred from the server in each round trip.
+            The default is 2000.
+        chunk_size : int, optional
+            It's the number of records of each yielded list. The default is None,
+            so the records are yielded one by one.
+
+        Raises
+        ------
+        InvalidQuery
+            If the provided query is not a non-empty string or is not one of the defined queries.
+        InvalidQueryValues
+            If the provided values for the selected query or the sizes are not valid.
+
+        Returns
+        -------
+        A generator of tuples with the values of the chosen fields, or lists of
+        tuples if the chunk size is provided.
+        """
+        self.check_select_query(query, values)
+        if (type(itersize) != int or itersize <= 0 or
+            (chunk_size != None and (type(chunk_size) != int or chunk_size <= 0))):
+            raise InvalidQueryValues("ERROR. The itersize and chunk size should be positive integers.")
+        return self.stream_records(query, values, itersize, chunk_size)
+
+    def stream_records(self, query, values, itersize, chunk_size):
+        """
+        Generator which reads the records of a checked query from a named cursor.
+        """
+        with self.get_connection() as connection:
+            # Named cursors are server-side cursors which live until the transaction ends
+            with connection.cursor(name="stream_"+uuid.uuid4().hex) as cursor:
+                cursor.itersize = itersize
+                cursor.execute(self.select_queries[query]['query'], list(values.values()))
+                if (chunk_size == None):
+                    for record in cursor:
+                        yield record
+                else:
+                    chunk = cursor.fetchmany(chunk_size)
+                    while (len(chunk) > 0):
+                        yield chunk
+                        chunk = cursor.fetchmany(chunk_size)
+            connection.commit()
+
     def get_table_size(self, table):
         """
         Gets the number of records of the provided table. In order to do that, 
@@ -716,13 +1091,12 @@ class PostgreDB:
             raise InvalidTableName("ERROR. The provided table name does not exist in the PostgreSQL database.")
 
         query = "SELECT count(*) FROM "+table
-        try:
-            self.cursor.execute(query)
-            return self.cursor.fetchone()[0]
-        except: #pragma no cover
-            self.connect_to_database()
-            self.cursor.execute(query)
-            return self.cursor.fetchone()[0]
+        with self.get_connection() as connection:
+            with connection.cursor() as cursor:
+                cursor.execute(query)
+                size = cursor.fetchone()[0]
+            connection.commit()
+        return size
         
     def insert_data(self, query, new_values, check_values=[]):
         """
@@ -789,17 +1163,117 @@ class PostgreDB:
         ## IMPORTANT!!
         # Insert only the data samples which are not already in the database
         new_ids = []
-        for item in data_to_insert:
-            try:
-                self.cursor.execute(self.insert_queries[query]['query'], list(item.values()))
-                self.connection.commit()
-                result = list(self.cursor.fetchone())
-                new_ids.extend(result)
-            except: 
-                raise InvalidQueryValues("ERROR. The new data couldn't be inserted.")
+        with self.get_connection() as connection:
+            with connection.cursor() as cursor:
+                for item in data_to_insert:
+                    try:
+                        cursor.execute(self.insert_queries[query]['query'], list(item.values()))
+                        connection.commit()
+                        result = list(cursor.fetchone())
+                        new_ids.extend(result)
+                    except psycopg2.Error:
+                        connection.rollback()
+                        raise InvalidQueryValues("ERROR. The new data couldn't be inserted.")
         
         return new_ids
     
+    def get_bulk_insert_query(self, query, keys=None):
+        """
+        Builds the query to insert many items in a single statement from a
+        predefined insert query. Its VALUES clause is used as the template of
+        each row and the items which violate any unique constraint are skipped,
+        unless the insert query defines how to update them with 'on_conflict'.
+
+        Parameters
+        ----------
+        query : str
+            It's the predefined insert query.
+        keys : list of str, optional
+            It's the list of columns to return along with the id of each record.
+            The default is None, so only the id is returned.
+
+        Returns
+        -------
+        A tuple with the bulk insert query and the template of each row.
+        """
+        head, tail = self.insert_queries[query]['query'].split("VALUES ", 1)
+        template, returning = tail.split(" RETURNING ", 1)
+        if (keys != None):
+            returning = ", ".join([returning]+keys)
+        on_conflict = self.insert_queries[query].get('on_conflict', "DO NOTHING")
+        return (head+"VALUES %s ON CONFLICT "+on_conflict+" RETURNING "+returning, template.strip())
+
+    def bulk_insert_data(self, query, new_values, page_size=1000, keys=None):
+        """
+        Inserts many new records in a specific table by sending all of them in
+        a single statement inside a single transaction. The records which are
+        already in the table are skipped by the unique constraints of the table,
+        or updated if the insert query defines 'on_conflict', so there are not
+        any check queries per record.
+
+        Postgres does not guarantee that the returned rows follow the order of
+        the VALUES clause and the skipped records don't return any row, so the
+        ids can only be matched with the provided items by the key columns.
+
+        Parameters
+        ----------
+        query : str
+            It's the inserted query to make.
+        new_values : list of dicts
+            It's the list which contains the new items to insert in different dicts.
+        page_size : int, optional
+            It's the maximum number of records of each statement. The default is 1000.
+        keys : list of str, optional
+            It's the list of fields of the insert query which identify each record.
+            The default is None, so the ids are returned without their keys.
+
+        Raises
+        ------
+        InvalidQuery
+            If the provided query is not a non-empty string or is not one of the insert queries.
+        InvalidQueryValues
+            If the provided values for the insert query or the keys are not valid.
+
+        Returns
+        -------
+        A list with the ids of the inserted or updated records in any order if
+        there are not keys. Otherwise, a dict whose keys are tuples with the values
+        of the key columns, as they're stored in the table, and whose values are
+        the ids of the inserted or updated records.
+        """
+        # Check the provided query
+        if (type(query) != str or query == ""):
+            raise InvalidQuery("ERROR. The provided query should be a non-empty string.")
+        # Check if the provided query exists
+        if (query not in self.insert_queries):
+            raise InvalidQuery("ERROR. The provided query is not valid.")
+        # Check the new values
+        if (type(new_values) != list or len(new_values) == 0 or
+            not all(isinstance(item, dict) for item in new_values)):
+            raise InvalidQueryValues("ERROR. The new values should be a non-empty list of dicts")
+        keys_new_values = [True for item in new_values if (list(item.keys()) == self.insert_queries[query]['fields'])]
+        if (len(keys_new_values) != len (new_values)):
+            raise InvalidQueryValues("ERROR. There are some missing keys in the new values.")
+        # Check the key columns
+        if (keys != None and (type(keys) != list or len(keys) == 0 or
+            not all(key in self.insert_queries[query]['fields'] for key in keys))):
+            raise InvalidQueryValues("ERROR. The keys should be a non-empty list of fields of the insert query.")
+
+        bulk_query, template = self.get_bulk_insert_query(query, keys)
+        with self.get_connection() as connection:
+            try:
+                with connection.cursor() as cursor:
+                    results = execute_values(cursor, bulk_query, [list(item.values()) for item in new_values],
+                                             template=template, page_size=page_size, fetch=True)
+                connection.commit()
+            except psycopg2.Error:
+                connection.rollback()
+                raise InvalidQueryValues("ERROR. The new data couldn't be inserted.")
+
+        if (keys == None):
+            return [result[0] for result in results]
+        return {tuple(result[1:]):result[0] for result in results}
+
     def empty_table(self, table):
         """
         Deletes all the records stored in a specific table without removing it.
@@ -829,5 +1303,8 @@ class PostgreDB:
         
         # Deletes all records from the table
         query = "DELETE FROM "+table
-        self.cursor.execute(query)
+        with self.get_connection() as connection:
+            with connection.cursor() as cursor:
+                cursor.execute(query)
+            connection.commit()
         return self.get_table_size(table) == 0
\ No newline at end of file
@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Class which contains the cache of the sentiments identified for the preprocessed
+texts. Each text is identified by the md5 hash of the model version along with
+the preprocessed text, so a text is analyzed only once per model version even
+if it belongs to several overlapping periods of time. There are two tiers:
+    - A local tier, which is a LRU dict in the memory of the process.
+    - A durable tier, which is a table in the PostgreSQL database.
+
+@author: Lidia Sánchez Mérida
+"""
+from collections import OrderedDict
+import hashlib
+import threading
+from exceptions import TextListNotFound, InvalidMode
+
+class SentimentCache:
+
+    def __init__(self, postgresdb, model_version, mode="real", capacity=50000):
+        """
+        Creates a SentimentCache object whose attributes are:
+            - A PostgreDB object to operate with the durable tier.
+            - The version of the models whose results are cached.
+            - The queries to get and insert the cached sentiments depending on
+            the mode (test or real).
+            - The local tier as well as its maximum number of texts.
+            - The number of hits of each tier and the number of misses.
+
+        Parameters
+        ----------
+        postgresdb : PostgreDB
+            It's the PostgreDB object which contains the connection to the database.
+        model_version : str
+            It's the version of the models which identify the sentiments.
+        mode : str, optional
+            It's the mode which defines the tables of the durable tier. The default is "real".
+        capacity : int, optional
+            It's the maximum number of texts of the local tier. The default is 50000.
+
+        Raises
+        ------
+        InvalidMode
+            If the provided mode is not 'test' or 'real'.
+
+        Returns
+        -------
+        A SentimentCache object.
+        """
+        if (mode != "test" and mode != "real"):
+            raise InvalidMode("ERROR. The mode should be 'test' or 'real.")
+
+        self.postgresdb = postgresdb
+        self.model_version = model_version
+        prefix = "test_" if mode == "test" else ""
+        self.get_query = prefix+"get_cached_sentiments"
+        self.insert_query = "insert_"+prefix+"cached_sentiment"
+        self.capacity = capacity
+        self.local_tier = OrderedDict()
+        self.lock = threading.Lock()
+        self.stats = {"local_hits":0, "durable_hits":0, "misses":0}
+
+    def get_text_hash(self, text):
+        """
+        Gets the key of a preprocessed text for the current model version.
+
+        Parameters
+        ----------
+        text : str
+            It's the preprocessed text.
+
+        Returns
+        -------
+        A string with the md5 hash of the model version and the text.
+        """
+        return hashlib.md5((self.model_version+"\x00"+text).encode("utf-8")).hexdigest()
+
+    def add_to_local_tier(self, text_hash, result):
+        """
+        Adds a sentiment to the local tier and removes the least recently used
+        texts if the maximum number of texts is exceeded. The lock should be
+        acquired before calling it.
+        """
+        self.local_tier[text_hash] = result
+        self.local_tier.move_to_end(text_hash)
+        while (len(self.local_tier) > self.capacity):
+            self.local_tier.popitem(last=False)
+
+    def get_sentiments(self, texts):
+        """
+        Gets the cached sentiments of a list of preprocessed texts. The local tier
+        will be checked first and the durable tier will be checked only for the
+        texts which are not in memory.
+
+        Parameters
+        ----------
+        texts : list of str
+            It's the list of preprocessed texts.
+
+        Raises
+        ------
+        TextListNotFound
+            If the provided texts are not a list of strings.
+
+        Returns
+        -------
+        A dict whose keys are the cached texts and whose values are dicts with
+        their sentiment and degree. The texts which are not cached are not included.
+        """
+        if (type(texts) != list or not all(isinstance(text, str) for text in texts)):
+            raise TextListNotFound("ERROR. The texts should be a list of strings.")
+
+        cached_sentiments = {}
+        missing_hashes = {}
+        # 1. Local tier
+        with self.lock:
+            for text in dict.fromkeys(texts):
+                text_hash = self.get_text_hash(text)
+                if (text_hash in self.local_tier):
+                    self.local_tier.move_to_end(text_hash)
+                    cached_sentiments[text] = dict(self.local_tier[text_hash])
+                    self.stats["local_hits"] += 1
+                else:
+                    missing_hashes[text_hash] = text
+        # 2. Durable tier in a single query
+        if (len(missing_hashes) > 0):
+            durable_sentiments = self.postgresdb.get_data(self.get_query,
+                                         {"text_hashes":list(missing_hashes.keys())})
+            with self.lock:
+                for text_hash, sentiment, degree in durable_sentiments:
+                    result = {"sentiment":sentiment, "degree":degree}
+                    self.add_to_local_tier(text_hash, result)
+                    cached_sentiments[missing_hashes[text_hash]] = dict(result)
+                self.stats["durable_hits"] += len(durable_sentiments)
+                self.stats["misses"] += len(missing_hashes)-len(durable_sentiments)
+
+        return cached_sentiments
+
+    def store_sentiments(self, sentiments):
+        """
+        Stores the sentiments of a set of preprocessed texts in both tiers.
+
+        Parameters
+        ----------
+        sentiments : dict
+            It's the dict whose keys are the preprocessed texts and whose values
+            are dicts with their sentiment and degree.
+
+        Raises
+        ------
+        TextListNotFound
+            If the provided sentiments are not a dict.
+
+        Returns
+        -------
+        A list with the hashes of the texts inserted in the durable tier.
+        """
+        if (type(sentiments) != dict):
+            raise TextListNotFound("ERROR. The sentiments to store should be a dict.")
+
+        new_values = []
+        with self.lock:
+            for text, result in sentiments.items():
+                text_hash = self.get_text_hash(text)
+                self.add_to_local_tier(text_hash, {"sentiment":result["sentiment"], "degree":result["degree"]})
+                new_values.append({"degree":result["degree"], "model_version":self.model_version,
+                                   "sentiment":result["sentiment"], "text_hash":text_hash})
+
+        if (len(new_values) == 0):
+            return []
+        # The hashes which are already stored are skipped by the primary key
+        return self.postgresdb.bulk_insert_data(self.insert_query, new_values)
+
+    def get_stats(self):
+        """
+        Gets the number of hits of each tier, the number of misses and the
+        current size of the local tier.
+
+        Returns
+        -------
+        A dict with the statistics of the cache.
+        """
+        with self.lock:
+            stats = dict(self.stats)
+            stats["local_size"] = len(self.local_tier)
+        return stats
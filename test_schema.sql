@@ -257,4 +257,135 @@ CREATE TABLE public.testuserbehaviours(
 -- 
 -- Assign an owner to the table in order to operate with it.
 --
-ALTER TABLE public.testuserbehaviours OWNER TO lidia;
\ No newline at end of file
+ALTER TABLE public.testuserbehaviours OWNER TO lidia;
+
+--
+-- Table TestSentimentCache. It will store the sentiment identified for each preprocessed
+-- text by a specific version of the sentiment analysis models. The key is the md5
+-- hash of the model version along with the preprocessed text, so the same text is
+-- only analyzed once per model version.
+--
+CREATE TABLE public.testsentimentcache(
+    text_hash CHAR(32) PRIMARY KEY,
+    model_version VARCHAR(50) NOT NULL,
+    sentiment VARCHAR(20) NOT NULL,
+    degree REAL NOT NULL
+);
+-- 
+-- Assign an owner to the table in order to operate with it.
+--
+ALTER TABLE public.testsentimentcache OWNER TO lidia;
+
+--
+-- Table TestProfileRollups. It will store the daily and weekly buckets of the
+-- profile metrics of each user, which are updated incrementally when a new profile
+-- is downloaded. The daily buckets contain the values of the profile of each day,
+-- whereas the weekly buckets, which start on Monday, contain the sum of the values
+-- of their days. So the ProfilesEvolution of any period of time is computed by
+-- merging the buckets instead of the profiles.
+--
+CREATE TABLE public.testprofilerollups(
+    id_profile_rollup SERIAL PRIMARY KEY,
+    id_user VARCHAR(50) NOT NULL,
+    period VARCHAR(5) NOT NULL,
+    bucket DATE NOT NULL,
+    n_samples INTEGER NOT NULL,
+    sum_medias BIGINT NOT NULL,
+    sum_followers BIGINT NOT NULL,
+    sum_followings BIGINT NOT NULL,
+    UNIQUE (id_user, period, bucket)
+);
+-- 
+-- Assign an owner to the table in order to operate with it.
+--
+ALTER TABLE public.testprofilerollups OWNER TO lidia;
+
+--
+-- Table TestMediaRollups. It will store the daily and weekly buckets of the
+-- likes and comments of the medias of each user. The daily buckets contain the
+-- number of medias downloaded that day and the sum of their likes and comments,
+-- whereas the weekly buckets contain the number of days and the sum of the daily
+-- averages, as the MediasEvolution analysis computes them.
+--
+CREATE TABLE public.testmediarollups(
+    id_media_rollup SERIAL PRIMARY KEY,
+    id_user VARCHAR(50) NOT NULL,
+    period VARCHAR(5) NOT NULL,
+    bucket DATE NOT NULL,
+    n_samples INTEGER NOT NULL,
+    sum_likes BIGINT NOT NULL,
+    sum_comments BIGINT NOT NULL,
+    UNIQUE (id_user, period, bucket)
+);
+-- 
+-- Assign an owner to the table in order to operate with it.
+--
+ALTER TABLE public.testmediarollups OWNER TO lidia;
+
+--
+-- Unique constraints and covering indexes for the lookups of the predefined
+-- queries of the class PostgreDB. They're also added to existing databases by
+-- migrations/001_unique_constraints_and_indexes.sql.
+--
+--
+-- TestProfiles: check_profile, get_profiles and get_nmedias_profiles.
+--
+CREATE UNIQUE INDEX IF NOT EXISTS testprofiles_unique_idx ON public.testprofiles (username, social_media, date) INCLUDE (id_profile, n_medias, n_followers, n_followings);
+
+--
+-- TestProfilesEvolution: check_profile_evolution and profile_evolution.
+--
+CREATE UNIQUE INDEX IF NOT EXISTS testprofilesevolution_unique_idx ON public.testprofilesevolution (id_user, date_ini, date_fin, time) INCLUDE (mean_followers, mean_followings, mean_medias);
+
+--
+-- TestProfilesActivity: check_profile_activity and profile_activity.
+--
+CREATE UNIQUE INDEX IF NOT EXISTS testprofilesactivity_unique_idx ON public.testprofilesactivity (id_user, date_ini, date_fin, time) INCLUDE (mean_medias);
+
+--
+-- TestMedias: check_media.
+--
+CREATE UNIQUE INDEX IF NOT EXISTS testmedias_unique_idx ON public.testmedias (id_media, date) INCLUDE (id_media_aut);
+CREATE INDEX IF NOT EXISTS testmedias_profile_date_idx ON public.testmedias (id_profile, date) INCLUDE (id_media, like_count, comment_count) WHERE type = 'common';
+
+--
+-- TestMediasEvolution: check_media_evolution and media_evolution.
+--
+CREATE UNIQUE INDEX IF NOT EXISTS testmediasevolution_unique_idx ON public.testmediasevolution (id_user, date_ini, date_fin, time) INCLUDE (mean_likes, mean_comments);
+
+--
+-- TestMediasPopularity: check_media_popularity and media_popularity.
+--
+CREATE UNIQUE INDEX IF NOT EXISTS testmediaspopularity_unique_idx ON public.testmediaspopularity (id_user, date_ini, date_fin, id_media) INCLUDE (mean_likes, mean_comments);
+
+--
+-- TestTextSentiments: check_sentiment_analysis and the sentiment analysis results.
+--
+CREATE UNIQUE INDEX IF NOT EXISTS testtextsentiments_unique_idx ON public.testtextsentiments (id_user, date_ini, date_fin, type) INCLUDE (n_pos, n_neu, n_neg, pos_degree, neu_degree, neg_degree);
+
+--
+-- TestUserBehaviours: check_user_behaviour and user_behaviours.
+--
+CREATE UNIQUE INDEX IF NOT EXISTS testuserbehaviours_unique_idx ON public.testuserbehaviours (id_user, date_ini, date_fin, time) INCLUDE (n_likers, n_haters);
+
+--
+-- TestMediaComments: check_media_comment and get_media_comments. The texts could be
+-- too long for a B-tree index, so the md5 hash of the original text is indexed.
+--
+CREATE UNIQUE INDEX IF NOT EXISTS testmediacomments_unique_idx ON public.testmediacomments (id_media_aut, author, md5(original_text));
+CREATE INDEX IF NOT EXISTS testmediacomments_media_date_idx ON public.testmediacomments (id_media_aut, date) INCLUDE (id_text, author);
+
+--
+-- TestMediaTitles: check_media_title and get_media_titles. The texts could be
+-- too long for a B-tree index, so the md5 hash of the original text is indexed.
+--
+CREATE UNIQUE INDEX IF NOT EXISTS testmediatitles_unique_idx ON public.testmediatitles (id_media_aut, author, md5(original_text));
+CREATE INDEX IF NOT EXISTS testmediatitles_media_date_idx ON public.testmediatitles (id_media_aut, date) INCLUDE (id_text, author);
+
+--
+-- TestCommentSentiments: check_comment_sentiment and get_comment_sentiment. The unique
+-- index on the md5 hash avoids duplicated texts, whereas the hash index answers
+-- the equality lookups on the original text.
+--
+CREATE UNIQUE INDEX IF NOT EXISTS testcommentsentiments_unique_idx ON public.testcommentsentiments (md5(original_text));
+CREATE INDEX IF NOT EXISTS testcommentsentiments_text_hash_idx ON public.testcommentsentiments USING HASH (original_text);
\ No newline at end of file
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests to check the right behaviour of the methods included in the class
+AnalysisCache, which stores the daily results of the analyses for the periods
+of time which have been already analyzed.
+
+@author: Lidia Sánchez Mérida
+"""
+import sys
+import pytest
+from datetime import date, timedelta
+sys.path.append("src")
+from analysis_cache import AnalysisCache
+from exceptions import InvalidDates
+
+key = ("test_profile_evolution", "lidiasm_Instagram")
+days = [date(2021, 1, 1)+timedelta(days=i) for i in range(0, 31)]
+# The results of every day except the weekends
+results = {day:(i, 2*i) for i, day in enumerate(days) if day.weekday() < 5}
+
+def test1_get():
+    """
+    Test to check the method which gets the cached results without providing
+    a valid period of time. An exception will be raised.
+    """
+    cache = AnalysisCache()
+    with pytest.raises(InvalidDates):
+        cache.get(key, days[10], days[0])
+
+def test2_get():
+    """
+    Test to check the method which gets the cached results of a period of time
+    which has not been analyzed. The whole period of time will be missing.
+    """
+    cache = AnalysisCache()
+    assert cache.get(key, days[0], days[6]) == ({}, [(days[0], days[6])])
+
+def test1_put():
+    """
+    Test to check the method which adds the results of a period of time without
+    providing dates. An exception will be raised.
+    """
+    cache = AnalysisCache()
+    with pytest.raises(InvalidDates):
+        cache.put(key, "01-01-2021", "07-01-2021", results)
+
+def test2_put():
+    """
+    Test to check that a period of time contained in a cached one is answered
+    only from the cache, including the days without data.
+    """
+    cache = AnalysisCache()
+    cache.put(key, days[0], days[30], results)
+    cached_results, missing_periods = cache.get(key, days[5], days[12])
+    assert (missing_periods == [] and
+            cached_results == {day:results[day] for day in days[5:13] if day in results})
+
+def test3_put():
+    """
+    Test to check that a period of time which overlaps with two cached periods
+    is answered from both of them and only the days between them are missing.
+    """
+    cache = AnalysisCache()
+    cache.put(key, days[0], days[9], results)
+    cache.put(key, days[20], days[30], results)
+    cached_results, missing_periods = cache.get(key, days[5], days[25])
+    assert (missing_periods == [(days[10], days[19])] and
+            sorted(cached_results) == [day for day in days[5:10]+days[20:26] if day in results])
+
+def test4_put():
+    """
+    Test to check that the overlapping and contiguous periods of time are merged
+    into one period.
+    """
+    cache = AnalysisCache()
+    cache.put(key, days[0], days[9], results)
+    cache.put(key, days[20], days[30], results)
+    cache.put(key, days[10], days[19], results)
+    cache.put(key, days[5], days[25], results)
+    assert (len(cache.periods) == 1 and cache.n_days == 31 and
+            cache.get(key, days[0], days[30]) == (results, []))
+
+def test5_put():
+    """
+    Test to check that the results of other analyses or users are not shared.
+    """
+    cache = AnalysisCache()
+    cache.put(key, days[0], days[30], results)
+    other_key = ("test_profile_activity", "lidiasm_Instagram")
+    assert cache.get(other_key, days[0], days[6]) == ({}, [(days[0], days[6])])
+
+def test6_put():
+    """
+    Test to check that the least recently used periods of time are removed when
+    the maximum number of periods is exceeded.
+    """
+    cache = AnalysisCache(max_periods=2)
+    cache.put(key, days[0], days[1], results)
+    cache.put(key, days[10], days[11], results)
+    # The first period is used so the second one is the least recently used
+    cache.get(key, days[0], days[1])
+    cache.put(key, days[20], days[21], results)
+    assert (cache.get(key, days[0], days[1])[1] == [] and
+            cache.get(key, days[10], days[11])[1] == [(days[10], days[11])] and
+            cache.get(key, days[20], days[21])[1] == [])
+
+def test7_put():
+    """
+    Test to check that the least recently used periods of time are removed when
+    the maximum number of cached days is exceeded.
+    """
+    cache = AnalysisCache(max_days=10)
+    cache.put(key, days[0], days[6], results)
+    cache.put(key, days[20], days[26], results)
+    assert (cache.n_days == 7 and len(cache.periods) == 1 and
+            cache.get(key, days[20], days[26])[1] == [])
+
+def test1_put_days():
+    """
+    Test to check the method which adds the results of the days with data. The
+    days without data will be missing, so they're computed again.
+    """
+    cache = AnalysisCache()
+    cache.put_days(key, {day:values for day, values in results.items() if day <= days[13]})
+    cached_results, missing_periods = cache.get(key, days[0], days[13])
+    assert (missing_periods == [(days[1], days[2]), (days[8], days[9])] and
+            cached_results == {day:results[day] for day in days[0:14] if day in results})
+
+def test2_put_days():
+    """
+    Test to check that the days which get data after being analyzed without them
+    are computed and cached along with the contiguous periods.
+    """
+    cache = AnalysisCache()
+    cache.put_days(key, {days[0]:results[days[0]], days[3]:results[days[3]]})
+    cache.put_days(key, {days[1]:(1, 2), days[2]:(2, 4)})
+    assert (len(cache.periods) == 1 and
+            cache.get(key, days[0], days[3]) == ({days[0]:results[days[0]], days[1]:(1, 2),
+                                                  days[2]:(2, 4), days[3]:results[days[3]]}, []))
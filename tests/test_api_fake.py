@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests to check the right behaviour of the methods included in the class Api
+with a fake connection to the LevPasha Instagram API, so they don't need any
+credentials or requests to Instagram.
+
+@author: Lidia Sánchez Mérida
+"""
+
+import sys
+import pytest
+sys.path.append("src")
+sys.path.append("src/data")
+from api import Api
+from rate_limiter import RateLimiter
+from exceptions import UsernameNotFound
+
+class FakeInstagram:
+    """
+    Fake connection to the LevPasha Instagram API which answers the requests with
+    two pages of posts. The second page is rejected the first time it's requested.
+    The users are never found and the second comment of each post has no id.
+    """
+    def __init__(self):
+        self.username = "fake_account"
+        self.LastJson = {}
+        self.requests = []
+    def getUserFeed(self, user_id, max_id):
+        self.requests.append(max_id)
+        if (max_id == "page2" and self.requests.count(max_id) == 1):
+            self.LastJson = {"status":"fail", "message":"Please wait a few minutes before you try again."}
+            return False
+        self.LastJson = {"status":"ok", "more_available":max_id == "", "next_max_id":"page2",
+                         "items":[{"id":max_id+str(i), "caption":{"text":"title"}, "taken_at":0,
+                                   "like_count":i, "comment_count":i} for i in range(0, 2)]}
+        return True
+    def getMediaComments(self, id_media):
+        self.requests.append(id_media)
+        self.LastJson = {"status":"ok", "comments":[{"pk":1, "user":{"username":"follower"}, "text":"nice"},
+                                                    {"user":{"username":"follower"}, "text":"great"}]}
+        return True
+    def searchUsername(self, username):
+        self.requests.append(username)
+        self.LastJson = {"status":"fail", "message":"User not found"}
+        return False
+
+def get_fake_api():
+    """
+    Creates an API object connected to the fake Instagram API whose rate limiter
+    doesn't wait.
+    """
+    fake_api = Api(RateLimiter(1000, base_delay=0, max_delay=0))
+    fake_api.connection = FakeInstagram()
+    return fake_api
+
+def test1_get_levpasha_instagram_profile():
+    """
+    Test to check that a user which is not found by the fake Instagram API is
+    not requested again. An exception will be raised at once.
+    """
+    fake_api = get_fake_api()
+    with pytest.raises(UsernameNotFound):
+        fake_api.get_levpasha_instagram_profile("unknown_user")
+    assert fake_api.connection.requests == ["unknown_user"]
+
+def test1_get_levpasha_instagram_posts():
+    """
+    Test to check that only the rejected page of posts is requested again when
+    the posts are got from the fake Instagram API.
+    """
+    fake_api = get_fake_api()
+    posts = fake_api.get_levpasha_instagram_posts(user_id=1234)
+    assert len(posts) == 4 and fake_api.connection.requests == ["", "page2", "page2"]
+
+def test2_get_levpasha_instagram_posts():
+    """
+    Test to check that the pages of posts stop at the first one which has been
+    already downloaded.
+    """
+    fake_api = get_fake_api()
+    posts = fake_api.get_levpasha_instagram_posts(user_id=1234, known_ids={"1"})
+    assert len(posts) == 2 and fake_api.connection.requests == [""]
+
+def test1_get_levpasha_instagram_new_comments():
+    """
+    Test to check that the comments which have been already downloaded are not
+    returned again, even if they have no id.
+    """
+    fake_api = get_fake_api()
+    comments, comment_ids = fake_api.get_levpasha_instagram_new_comments("fake_user", [{"id_media":"1"}])
+    new_comments, new_comment_ids = fake_api.get_levpasha_instagram_new_comments("fake_user", [{"id_media":"1"}],
+                                                                                 comment_ids)
+    assert (len(comments[0]["texts"]) == 2 and len(comment_ids["1"]) == 2 and
+            new_comments == [{"id_media":"1", "texts":[]}] and new_comment_ids == comment_ids)
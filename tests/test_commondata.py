@@ -12,6 +12,7 @@ sys.path.append("src")
 from mongodb import MongoDB
 sys.path.append("src/data")
 import commondata 
+from translators import DictionaryTranslatorBackend, TranslationService
 from exceptions import InvalidMongoDbObject, ProfileDictNotFound, InvalidTextList \
     , MediaListNotFound, MediaDictNotFound, TextListNotFound, TextDictNotFound \
     , UserDataNotFound, CollectionNotFound, InvalidQuery, InvalidSocialMediaSource \
@@ -386,6 +387,27 @@ def test3_clean_texts():
     cleaned_texts = data.clean_texts(text_list)
     assert len(cleaned_texts) == len(text_list)
 
+def test4_clean_texts():
+    """
+    Test to check the method which cleans a list of texts by using a local
+    dictionary backend, so the texts are translated without any request to the API.
+    """
+    backend = DictionaryTranslatorBackend({"Cochazo donde los haya": "The car of the year 2020"})
+    data = commondata.CommonData(translator=TranslationService(backend))
+    cleaned_texts = data.clean_texts(["Cochazo donde los haya", "#motor @lidia06"])
+    assert cleaned_texts == ["car of year ", " motor  lidia"] and backend.n_calls == 1
+
+def test5_clean_texts():
+    """
+    Test to check that the method which cleans a list of texts only translates
+    the non-English texts and reports how many texts have been skipped.
+    """
+    backend = DictionaryTranslatorBackend({"Qué líneas!! 🤘": "What lines!! 🤘"})
+    data = commondata.CommonData(translator=TranslationService(backend))
+    cleaned_texts = data.clean_texts(["Qué líneas!! 🤘", "I love it", "🔥🙌🏼", "@motorfan670"])
+    assert (cleaned_texts[0] == "What lines!! 🤘" and backend.n_calls == 1 and
+            data.last_translation_report == {"translated":1, "english":1, "empty":2})
+
 def test1_insert_user_data():
     """
     Test to check the method which inserts user data into a specific collection
@@ -441,6 +463,27 @@ def test5_insert_user_data():
     result = data.insert_user_data(values, 'test')
     assert type(result) == str 
 
+def test1_insert_many_user_data():
+    """
+    Test to check the method which inserts the data of several users into a
+    specific collection in the Mongo database without providing a list of dicts.
+    An exception will be raised.
+    """
+    data = commondata.CommonData(test_collection)
+    with pytest.raises(UserDataNotFound):
+        assert data.insert_many_user_data([None], 'test')
+
+def test2_insert_many_user_data():
+    """
+    Test to check the method which inserts the data of several users into a
+    specific collection in the Mongo database. The same data are inserted only once.
+    """
+    data = commondata.CommonData(test_collection)
+    values = {"username":"username", "field_one":"anything", 
+              "date":datetime.strptime("01-01-2021", '%d-%m-%Y'), "social_media":"Instagram"}
+    result = data.insert_many_user_data([values, dict(values)], 'test')
+    assert result["inserted"] == 1 and result["matched"] == 1
+
 def test1_get_user_data():
     """
     Test to check the method which gets user data from a specific collection
@@ -334,7 +334,31 @@ def test4_post_popularity():
     posts = [('123', '145', '174'), ('456', '45', '78'), ('789', '485', '25'), ('012', '489', '584')]
     result = da.post_popularity("lidia.96.sm", posts)
     assert type(result) == list
-    
+
+def test5_post_popularity():
+    """
+    Test to check the method which gets the best/worst posts from an user during
+    a specific period of time. In this test, some medias are repeated so the
+    average of their likes and comments will be computed keeping the order in
+    which they appear first.
+    """
+    posts = [('456', '45', '78'), ('123', '145', '174'), ('456', '46', '81'), ('123', '150', '175')]
+    result = da.post_popularity("lidia.96.sm", posts)
+    assert result == [('456', 46, 80), ('123', 148, 174)]
+
+def test1_get_means_per_group():
+    """
+    Test to check the method which computes the rounded average of some columns
+    per group. In this test, the groups are sorted and the averages are the same
+    than the ones computed group by group.
+    """
+    groups = ['22/10/2020', '20/10/2020', '22/10/2020', '21/10/2020', '20/10/2020']
+    likes = ['10', '3', '15', '7', '4']
+    comments = [1, 2, 2, 9, 5]
+    unique_groups, means = da.get_means_per_group(groups, [likes, comments], sort=True)
+    assert unique_groups == ['20/10/2020', '21/10/2020', '22/10/2020']
+    assert means == [[4, 7, 12], [4, 9, 2]]
+
 def test1_sentiment_analysis_text():
     """
     Test to check the method which performs a sentiment analysis based on a list
@@ -379,6 +403,29 @@ def test4_sentiment_analysis_text():
     result = da.sentiment_analysis_text("lidia.96.sm", text_list)
     assert type(result) == list and len(result) == len(text_list)
 
+def test5_sentiment_analysis_text():
+    """
+    Test to check the method which performs a sentiment analysis based on a list
+    of texts. In this test, the texts are classified in mini-batches of two texts
+    and the results should be in the same order as the provided texts.
+    """
+    text_list = [('1', 'A pure road machine','Una pura máquina de carretera'),
+                 ('2', 'I love it in white and dark gray. Thanks for filling Instagram with perfection.',
+                  'Me encanta en blanco y gris oscuro. Gracias por llenar Instagram con la perfección.'),
+                 ('3', 'Awful', 'Horrible')]
+    result = da.sentiment_analysis_text("lidia.96.sm", text_list, batch_size=2)
+    assert ([item["original_text"] for item in result] == [text[2] for text in text_list] and
+            result == da.sentiment_analysis_text("lidia.96.sm", text_list, batch_size=32))
+
+def test1_vader_sentiment_analysis():
+    """
+    Test to check the method which classifies a list of texts by using the VADER
+    lexicon. Each text will have a sentiment and a degree in the same order.
+    """
+    result = da.vader_sentiment_analysis(["I love it", "I hate it", ""])
+    assert (result[0]["sentiment"] == "pos" and result[1]["sentiment"] == "neg" and
+            result[2] == {"sentiment":"none", "degree":0.0})
+
 def test1_user_behaviours():
     """
     Test to check the method which gets the evolution of the number of haters
@@ -431,7 +478,20 @@ def test4_user_behaviours():
                   {"date":"28/10/2020", "author":"user1", "sentiment":"pos"}]
     result = da.user_behaviours("lidia.96.sm", user_list)
     assert type(result) == dict
-    
+
+def test5_user_behaviours():
+    """
+    Test to check the method which gets the evolution of the number of haters
+    and friends providing the identified sentiments in an iterator, as they're
+    streamed from the database. The results will be the same as with a list.
+    """
+    user_list = [{"date":"24/10/2020", "author":"user1", "sentiment":"pos"},
+                  {"date":"24/10/2020", "author":"user2", "sentiment":"neg"},
+                  {"date":"24/10/2020", "author":"user1", "sentiment":"pos"},
+                  {"date":"25/10/2020", "author":"user3", "sentiment":"pos"}]
+    result = da.user_behaviours("lidia.96.sm", (item for item in user_list))
+    assert result == da.user_behaviours("lidia.96.sm", user_list)
+
 def test6_user_behaviours():
     """
     Test to check the method which gets the evolution of the number of haters
@@ -450,4 +510,23 @@ def test6_user_behaviours():
                   {"date":"31/10/2020", "author":"user1", "sentiment":"neg"}, {"date":"31/10/2020", "author":"user1", "sentiment":"neg"},
                   {"date":"32/10/2020", "author":"user1", "sentiment":"pos"}, {"date":"32/10/2020", "author":"user1", "sentiment":"neg"}]
     result = da.user_behaviours("lidia.96.sm", user_list)
-    assert type(result) == dict
\ No newline at end of file
+    assert type(result) == dict
+
+def test1_get_behaviours_per_date():
+    """
+    Test to check the method which counts the likers and haters of each date
+    without providing any identified sentiments. An empty list will be returned.
+    """
+    assert da.get_behaviours_per_date([]) == []
+
+def test2_get_behaviours_per_date():
+    """
+    Test to check the method which counts the likers and haters of each date.
+    Each author is counted only once per date.
+    """
+    user_list = [{"date":"24/10/2020", "author":"user1", "sentiment":"pos"},
+                  {"date":"24/10/2020", "author":"user1", "sentiment":"pos"},
+                  {"date":"24/10/2020", "author":"user2", "sentiment":"neg"},
+                  {"date":"25/10/2020", "author":"user1", "sentiment":"neg"}]
+    assert da.get_behaviours_per_date(user_list) == [("24/10/2020", 1, 1), ("25/10/2020", 0, 1)]
+    
@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests to check the right behaviour of the methods included in the class
+IngestScheduler, which downloads the data of the users of the watchlist. The
+requests are answered by a fake connection to the Instagram API.
+
+@author: Lidia Sánchez Mérida
+"""
+import sys
+import tempfile
+import pytest
+sys.path.append("src")
+sys.path.append("src/data")
+from api import Api
+from ingest_state import IngestState
+from ingest_scheduler import IngestScheduler
+from session_pool import SessionPool
+from rate_limiter import RateLimiter
+from exceptions import InvalidMode, InvalidPoolSize, MaxRequestsExceed
+
+day = "18-10-2026"
+
+class FakeConnection:
+    """
+    Connection which answers the requests of the LevPasha Instagram API with
+    three medias per user and one comment per media. The users whose name starts
+    with "unknown" are not found.
+    """
+    def __init__(self, requests, limit):
+        self.requests = requests
+        self.limit = limit
+        self.LastJson = {"status":"ok"}
+    def request(self, answer):
+        if (len(self.requests) >= self.limit["max_requests"]):
+            raise MaxRequestsExceed("Max requests exceed. Wait to send more.")
+        self.requests.append(answer)
+        self.LastJson = answer
+    def searchUsername(self, username):
+        if (username.startswith("unknown")):
+            return self.request({"status":"fail", "message":"User not found"})
+        self.request({"status":"ok", "user":{"pk":len(username), "username":username,
+            "full_name":username, "biography":"", "profile_pic_url":"", "follower_count":10,
+            "following_count":5, "media_count":3}})
+    def getUserFeed(self, user_id, max_id):
+        self.request({"status":"ok", "more_available":False, "items":[{"id":str(user_id)+"_"+str(i),
+            "caption":{"text":"title"}, "taken_at":0, "like_count":i, "comment_count":1}
+            for i in range(0, 3)]})
+    def getMediaComments(self, id_media):
+        self.request({"status":"ok", "comments":[{"pk":1, "user":{"username":"follower"}, "text":"nice"}]})
+
+class FakeMainOperations:
+    """
+    Stores the user data which would be preprocessed and stored in the databases.
+    """
+    def __init__(self):
+        self.stored = []
+    def preprocess_and_store_common_data(self, user_data, social_media, mode):
+        self.stored.append(user_data)
+
+def get_scheduler(limit, max_workers=2):
+    """
+    Creates a scheduler with a new state and fake connections which share the
+    list of answered requests and their maximum number.
+    """
+    requests = []
+    def api_factory(rate_limiter):
+        api = Api(rate_limiter)
+        api.connection = FakeConnection(requests, limit)
+        api.connect_levpasha_instagram_api = lambda: api.connection
+        return api
+    state = IngestState(tempfile.mkdtemp())
+    state.add_user("lidiasm", "Instagram")
+    state.add_user("audispain", "Instagram")
+    scheduler = IngestScheduler(FakeMainOperations(), state, "test", max_workers=max_workers, rate=1000,
+                                comments_chunk=2, api_factory=api_factory)
+    return scheduler, requests
+
+def test1_constructor():
+    """
+    Test to check the constructor of the scheduler without providing a valid mode.
+    An exception will be raised.
+    """
+    with pytest.raises(InvalidMode):
+        IngestScheduler(FakeMainOperations(), mode="other")
+
+def test2_constructor():
+    """
+    Test to check the constructor of the scheduler without providing a valid
+    number of workers. An exception will be raised.
+    """
+    with pytest.raises(InvalidPoolSize):
+        IngestScheduler(FakeMainOperations(), max_workers=0)
+
+def test1_run():
+    """
+    Test to check the method which downloads the data of the users of the watchlist.
+    Both users will be stored with their three medias and their comments.
+    """
+    scheduler, requests = get_scheduler({"max_requests":100})
+    results = scheduler.run(day)
+    assert (results == {"lidiasm":"stored", "audispain":"stored"} and len(requests) == 10 and
+            sorted(len(user_data["comments"]) for user_data in scheduler.mainops_object.stored) == [3, 3])
+
+def test2_run():
+    """
+    Test to check that the users which have been already stored during the day
+    are not downloaded again.
+    """
+    scheduler, requests = get_scheduler({"max_requests":100})
+    scheduler.run(day)
+    assert scheduler.run(day) == {"lidiasm":"stored", "audispain":"stored"} and len(requests) == 10
+
+def test3_run():
+    """
+    Test to check that the users are left pending when the maximum number of
+    requests is exceeded, and that the next run only downloads the missing data.
+    The first user's profile, medias and comments of two medias are downloaded
+    in the first run.
+    """
+    limit = {"max_requests":4}
+    scheduler, requests = get_scheduler(limit, max_workers=1)
+    first_results = scheduler.run(day)
+    limit["max_requests"] = 100
+    second_results = scheduler.run(day)
+    assert (first_results == {"lidiasm":"pending", "audispain":"pending"} and
+            second_results == {"lidiasm":"stored", "audispain":"stored"} and
+            len(requests) == 10 and len(scheduler.mainops_object.stored) == 2)
+
+def test4_run():
+    """
+    Test to check that the next day only the profile and the first page of medias
+    are requested, since the medias have been already downloaded and their number
+    of comments hasn't changed. The medias are stored without new comments.
+    """
+    scheduler, requests = get_scheduler({"max_requests":100})
+    scheduler.run(day)
+    results = scheduler.run("19-10-2026")
+    stored = scheduler.mainops_object.stored[-1]
+    assert (results == {"lidiasm":"stored", "audispain":"stored"} and len(requests) == 14 and
+            len(stored["medias"]) == 3 and all(comment["texts"] == [] for comment in stored["comments"]))
+
+def test5_run():
+    """
+    Test to check that the users are downloaded with the accounts of a pool of
+    sessions, and that the account whose requests are rejected is rotated.
+    """
+    limit = {"max_requests":100}
+    requests = []
+    def api_factory(rate_limiter):
+        api = Api(rate_limiter)
+        api.connection = FakeConnection(requests, limit)
+        def connect(username, pswd, session_file):
+            api.connection.username = username
+            # The requests of the first account are always rejected
+            if (username == "first_account"):
+                api.connection.limit = {"max_requests":0}
+            return api.connection
+        api.connect_levpasha_instagram_account = connect
+        return api
+    pool = SessionPool([("first_account", "pswd"), ("second_account", "pswd")], RateLimiter(1000),
+                       api_factory=api_factory)
+    state = IngestState(tempfile.mkdtemp())
+    state.add_user("lidiasm", "Instagram")
+    state.add_user("audispain", "Instagram")
+    scheduler = IngestScheduler(FakeMainOperations(), state, "test", max_workers=2,
+                                session_pool=pool)
+    assert (scheduler.run(day) == {"lidiasm":"stored", "audispain":"stored"} and len(requests) == 10 and
+            pool.sessions[0]["cooldown_until"] > 0)
+
+def get_pool_scheduler(usernames, rejected_accounts, cooldown=900, max_requests=200):
+    """
+    Creates a scheduler with a pool of two accounts whose provided accounts are
+    always throttled, as well as the list of answered requests.
+    """
+    requests = []
+    def api_factory(rate_limiter):
+        api = Api(rate_limiter)
+        api.connection = FakeConnection(requests, {"max_requests":100})
+        def connect(username, pswd, session_file):
+            api.connection.username = username
+            if (username in rejected_accounts):
+                api.connection.limit = {"max_requests":0}
+            return api.connection
+        api.connect_levpasha_instagram_account = connect
+        return api
+    pool = SessionPool([("first_account", "pswd"), ("second_account", "pswd")], RateLimiter(1000),
+                       max_requests=max_requests, cooldown=cooldown, api_factory=api_factory)
+    state = IngestState(tempfile.mkdtemp())
+    for username in usernames:
+        state.add_user(username, "Instagram")
+    return IngestScheduler(FakeMainOperations(), state, "test", max_workers=1, session_pool=pool), requests
+
+def test6_run():
+    """
+    Test to check that a user which is not found fails without cooling down the
+    accounts of the pool, so the other users are stored.
+    """
+    scheduler, requests = get_pool_scheduler(["unknown_user", "lidiasm"], [])
+    results = scheduler.run(day)
+    pool = scheduler.session_pool
+    assert (results["lidiasm"] == "stored" and "User not found" in results["unknown_user"] and
+            all(session["cooldown_until"] == session["window_start"] for session in pool.sessions))
+
+def test7_run():
+    """
+    Test to check that the accounts are rotated once per user at most, so the
+    user is left pending when the requests of every account are throttled, even
+    if the accounts don't cool down.
+    """
+    scheduler, requests = get_pool_scheduler(["lidiasm"], ["first_account", "second_account"], cooldown=0)
+    assert scheduler.run(day) == {"lidiasm":"pending"} and requests == []
+
+def test8_run():
+    """
+    Test to check that the budget of requests of an account is enforced during
+    its lease, so the account is rotated once it's spent and the user is
+    resumed with the other account from the chunk of comments which was pending.
+    """
+    scheduler, requests = get_pool_scheduler(["lidiasm"], [], max_requests=3)
+    pool = scheduler.session_pool
+    assert (scheduler.run(day) == {"lidiasm":"stored"} and len(requests) == 6 and
+            [session["remaining"] for session in pool.sessions] == [0, 0])
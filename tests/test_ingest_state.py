@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests to check the right behaviour of the methods included in the class
+IngestState, which stores the watchlist of users and the progress of their
+daily downloads.
+
+@author: Lidia Sánchez Mérida
+"""
+import sys
+import tempfile
+import pytest
+sys.path.append("src")
+from ingest_state import IngestState
+from exceptions import UsernameNotFound, InvalidSocialMediaSource
+
+# State stored in a temporary folder to perform the tests
+test_state = IngestState(tempfile.mkdtemp())
+
+def test1_add_user():
+    """
+    Test to check the method which adds a user to the watchlist without providing
+    a valid username. An exception will be raised.
+    """
+    with pytest.raises(UsernameNotFound):
+        test_state.add_user("../lidiasm", "Instagram")
+
+def test2_add_user():
+    """
+    Test to check the method which adds a user to the watchlist without providing
+    a valid social media. An exception will be raised.
+    """
+    with pytest.raises(InvalidSocialMediaSource):
+        test_state.add_user("lidiasm", None)
+
+def test3_add_user():
+    """
+    Test to check the method which adds two users to the watchlist. The watchlist
+    will be read again from its file.
+    """
+    test_state.add_user("lidiasm", "Instagram")
+    test_state.add_user("audispain", "Instagram")
+    assert IngestState(test_state.state_folder).get_watchlist() == {"lidiasm":"Instagram",
+                                                                   "audispain":"Instagram"}
+
+def test4_add_user():
+    """
+    Test to check the method which adds a user to the watchlist providing a
+    username which is not a valid Instagram username. An exception will be raised.
+    """
+    with pytest.raises(UsernameNotFound):
+        test_state.add_user("lidia sm", "Instagram")
+
+def test5_add_user():
+    """
+    Test to check that the users added by two states of the same folder, as
+    the web platform and the task server, are all kept.
+    """
+    folder = tempfile.mkdtemp()
+    first_state, second_state = IngestState(folder), IngestState(folder)
+    first_state.add_user("lidiasm", "Instagram")
+    second_state.add_user("audispain", "Instagram")
+    assert first_state.get_watchlist() == {"lidiasm":"Instagram", "audispain":"Instagram"}
+
+def test1_update_progress():
+    """
+    Test to check the method which stores the progress of a user during a day.
+    It will be read again from its file.
+    """
+    test_state.update_progress("lidiasm", {"profile":{"userid":1}}, "18-10-2026")
+    assert (IngestState(test_state.state_folder).get_progress("lidiasm", "18-10-2026") ==
+            {"profile":{"userid":1}})
+
+def test1_get_progress():
+    """
+    Test to check that the progress of the previous days is discarded.
+    """
+    assert (test_state.get_progress("lidiasm", "19-10-2026") == {} and
+            test_state.get_progress("audispain", "18-10-2026") == {})
+
+def test1_update_cursor():
+    """
+    Test to check the method which stores the cursor of a user. Only the comment
+    ids of the provided medias are kept.
+    """
+    medias = [{"id_media":"2", "comment_count":1}, {"id_media":"1", "comment_count":0}]
+    test_state.update_cursor("lidiasm", medias, {"2":["20"], "0":["1"]})
+    assert test_state.get_cursor("lidiasm") == {"medias":medias, "comments":{"2":["20"]}}
+
+def test1_remove_user():
+    """
+    Test to check the method which removes a user from the watchlist as well as
+    their progress and cursor.
+    """
+    assert (test_state.remove_user("lidiasm") == {"audispain":"Instagram"} and
+            test_state.get_progress("lidiasm", "18-10-2026") == {} and
+            test_state.get_cursor("lidiasm") == {"medias":[], "comments":{}})
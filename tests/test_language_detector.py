@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests to check the right behaviour of the methods included in the class
+LanguageDetector, which identifies the texts that should be translated.
+
+@author: Lidia Sánchez Mérida
+"""
+import sys
+import pytest
+sys.path.append("src")
+sys.path.append("src/data")
+from language_detector import LanguageDetector
+from exceptions import TextListNotFound, InvalidTextList
+
+detector = LanguageDetector()
+
+def test1_detect():
+    """
+    Test to check that the texts without any words, such as emojis, mentions
+    or numbers, are labelled as empty.
+    """
+    assert [detector.detect(text) for text in ["", "🔥🙌🏼", "@motorfan670 @lidia06", "2020!! 🤘"]] == \
+        ["empty", "empty", "empty", "empty"]
+
+def test2_detect():
+    """
+    Test to check that the texts which are mostly composed by common English
+    words are labelled as English.
+    """
+    assert [detector.detect(text) for text in ["What a beautiful car 🔥", "@motorfan670 I love it!!"]] == \
+        ["english", "english"]
+
+def test3_detect():
+    """
+    Test to check that the texts in other languages are labelled as foreign.
+    """
+    assert [detector.detect(text) for text in ["Cochazo donde los haya dentro de los SUV",
+                                               "Qué líneas!! 🤘"]] == ["foreign", "foreign"]
+
+def test1_detect_many():
+    """
+    Test to check the method which labels a list of texts without providing
+    a list. An exception will be raised.
+    """
+    with pytest.raises(TextListNotFound):
+        detector.detect_many("text")
+
+def test2_detect_many():
+    """
+    Test to check the method which labels a list of texts providing some values
+    which are not strings. An exception will be raised.
+    """
+    with pytest.raises(InvalidTextList):
+        detector.detect_many(["text", None])
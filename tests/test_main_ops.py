@@ -12,7 +12,7 @@ sys.path.append('src')
 import main_ops 
 from exceptions import UsernameNotFound, MaxRequestsExceed, UserDataNotFound \
     , InvalidMongoDbObject, InvalidSocialMediaSource, InvalidMode, InvalidAnalysis \
-    , InvalidDates, CollectionNotFound, InvalidQuery
+    , InvalidDates, CollectionNotFound, InvalidQuery, UserActivityNotFound
     
 # MainOperations object to perform the tests
 main_ops_object = main_ops.MainOperations()
@@ -35,6 +35,15 @@ def test2_set_user_to_study():
     """
     set_user = main_ops_object.set_user_to_study(username)
     assert set_user == username
+
+def test1_remove_user_to_study():
+    """
+    Test to check the method which removes a user from the watchlist, so their
+    data won't be downloaded anymore.
+    """
+    mo = main_ops.MainOperations()
+    mo.set_user_to_study(username)
+    assert username not in mo.remove_user_to_study(username) and mo.user_to_study == None
         
 def test1_get_user_instagram_common_data():
     """
@@ -130,6 +139,15 @@ def test6_preprocess_and_store_common_data():
     result = mo.preprocess_and_store_common_data(user_data, 'Instagram', 'test')
     assert type(result) == dict
 
+def test1_preprocess_and_store_many_common_data():
+    """
+    Test to check the method which preprocesses and stores the data of several
+    users without providing a valid day. An exception will be raised.
+    """
+    with pytest.raises(InvalidDates):
+        assert main_ops_object.preprocess_and_store_many_common_data([{'id':'first id'}], 'Instagram',
+                                                                     'test', "01-01-2021")
+
 def test1_get_data_from_mongodb():
     """
     Test to check the method which gets user data from the Mongo database depending on
@@ -913,3 +931,24 @@ def test26_perform_analysis():
     result = main_ops_object.perform_analysis("audispain", "test_user_behaviours",
                 "Instagram", "31-10-2020", "01-11-2020")
     assert type(result) == dict and len(result["date"]) == 2
+
+def test1_get_analysis_per_period():
+    """
+    Test to check that the days without data are not cached, so the data stored
+    after analyzing a period of time without them are analyzed the next time.
+    """
+    username = "lidia.late.sm"
+    mo = main_ops.MainOperations()
+    mo.mongodb_object.delete_records("delete_item", {"username":username, "date":datetime(2021, 2, 2)
+                                                    , "social_media":"Instagram"}, "test")
+    mo.postgresdb_object.empty_table("testprofilerollups")
+    with pytest.raises(UserActivityNotFound):
+        mo.get_analysis_per_period(username, "test_profile_activity", "Instagram", "01-02-2021", "05-02-2021")
+    profile = {"userid" : 987654321, "username" : username, "name" : "Lidia Sánchez",
+                "biography" : "None", "gender" : "None", "profile_pic" : "https://instagram_example",
+                "location" : "None", "birthday" : "None", "date_joined" : "None",
+                "n_followers" : 61, "n_followings":45, "n_medias" : 6}
+    user_data = {'profile':profile, 'medias':[], 'comments':[]}
+    mo.preprocess_and_store_many_common_data([user_data], 'Instagram', 'test', datetime(2021, 2, 2))
+    result = mo.get_analysis_per_period(username, "test_profile_activity", "Instagram", "01-02-2021", "05-02-2021")
+    assert result == {"date":["02-02-2021"], "n_medias":[6]}
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests to check the right behaviour of the methods included in the class
+MetricRollups, which stores the daily and weekly buckets of the profile and
+media metrics of each user.
+
+@author: Lidia Sánchez Mérida
+"""
+import sys
+import pytest
+from datetime import date, datetime, timedelta
+sys.path.append("src")
+sys.path.append("src/data")
+from postgredb import PostgreDB
+from metric_rollups import MetricRollups
+from exceptions import InvalidMode, ProfilesNotFound, PostInteractionsNotFound
+
+# Connection to the database and rollups to perform the tests
+test_connection = PostgreDB()
+test_connection.empty_table("testprofilerollups")
+test_connection.empty_table("testmediarollups")
+rollups = MetricRollups(test_connection, "test")
+# Fourteen days of profiles and medias which start on Monday 04-01-2021
+days = [datetime(2021, 1, 4)+timedelta(days=i) for i in range(0, 14)]
+profiles = [{"username":"lidiasm", "social_media":"Instagram", "date":day, "n_medias":str(10+i),
+             "n_followers":str(100+3*i), "n_followings":str(50-i)} for i, day in enumerate(days)]
+media_lists = [{"username":"lidiasm", "social_media":"Instagram", "date":day,
+                "medias":[{"like_count":str(i*j), "comment_count":str(i+j)} for j in range(1, 4)]}
+               for i, day in enumerate(days)]
+
+def test1_constructor():
+    """
+    Test to check the constructor of the rollups without providing a valid mode.
+    An exception will be raised.
+    """
+    with pytest.raises(InvalidMode):
+        MetricRollups(test_connection, "other")
+
+def test1_update_profiles():
+    """
+    Test to check the method which updates the rollups with the downloaded profiles
+    without providing a list of dicts. An exception will be raised.
+    """
+    with pytest.raises(ProfilesNotFound):
+        rollups.update_profiles(None)
+
+def test2_update_profiles():
+    """
+    Test to check the method which updates the rollups with fourteen profiles.
+    There will be fourteen daily buckets and two weekly buckets.
+    """
+    assert len(rollups.update_profiles(profiles)) == 16
+
+def test3_update_profiles():
+    """
+    Test to check that the days which already have a bucket are not updated
+    if only the missing days are required.
+    """
+    assert rollups.update_profiles(profiles, only_missing=True) == []
+
+def test1_update_medias():
+    """
+    Test to check the method which updates the rollups with the downloaded medias
+    without providing a list of dicts. An exception will be raised.
+    """
+    with pytest.raises(PostInteractionsNotFound):
+        rollups.update_medias(None)
+
+def test2_update_medias():
+    """
+    Test to check the method which updates the rollups with the medias of fourteen
+    days. There will be fourteen daily buckets and two weekly buckets.
+    """
+    assert len(rollups.update_medias(media_lists)) == 16
+
+def test1_get_buckets():
+    """
+    Test to check the method which gets the daily buckets of a period of time.
+    The sums of the metrics of each day will be returned.
+    """
+    buckets = rollups.get_buckets("media", rollups.get_id_user("lidiasm", "Instagram"), "day",
+                                  date(2021, 1, 6), date(2021, 1, 12))
+    assert (sorted(buckets) == [date(2021, 1, 6)+timedelta(days=i) for i in range(0, 7)] and
+            buckets[date(2021, 1, 6)] == (3, 12, 12))
+
+def test2_get_buckets():
+    """
+    Test to check the method which gets the daily buckets of a period of time
+    without data. An empty dict will be returned.
+    """
+    assert rollups.get_buckets("profile", rollups.get_id_user("lidiasm", "Instagram"), "day",
+                               date(2020, 1, 4), date(2020, 1, 17)) == {}
+
+def test1_get_complete_weeks():
+    """
+    Test to check the method which gets the weekly buckets of the complete weeks
+    of a period of time. Only the weeks which are completely inside the period
+    are returned with the sums of their seven days.
+    """
+    weeks = rollups.get_complete_weeks("profile", rollups.get_id_user("lidiasm", "Instagram"),
+                                       date(2021, 1, 5), date(2021, 1, 17))
+    assert weeks == {date(2021, 1, 11):(7, sum(range(17, 24)), sum([100+3*i for i in range(7, 14)]),
+                                        sum([50-i for i in range(7, 14)]))}
+
+def test2_get_complete_weeks():
+    """
+    Test to check that the weekly buckets of the medias contain the sums of the
+    daily averages of likes and comments.
+    """
+    weeks = rollups.get_complete_weeks("media", rollups.get_id_user("lidiasm", "Instagram"),
+                                       date(2021, 1, 4), date(2021, 1, 10))
+    assert weeks == {date(2021, 1, 4):(7, sum([round(6*i/3) for i in range(0, 7)]),
+                                       sum([round((3*i+6)/3) for i in range(0, 7)]))}
+
+def test3_get_complete_weeks():
+    """
+    Test to check that the weeks without data in some of their days are not
+    returned, so their days are got from the daily buckets.
+    """
+    rollups.update_profiles([dict(profile, username="lidiasm_gaps") for profile in profiles if profile["date"].day != 6])
+    weeks = rollups.get_complete_weeks("profile", rollups.get_id_user("lidiasm_gaps", "Instagram"),
+                                       date(2021, 1, 4), date(2021, 1, 17))
+    assert sorted(weeks) == [date(2021, 1, 11)]
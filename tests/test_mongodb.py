@@ -7,10 +7,12 @@ of Truth which has the operations with the MongoDB database.
 @author: Lidia Sánchez Mérida.
 """
 from datetime import datetime
+import importlib.util
 import os 
 import sys
 sys.path.append("src")
 import pytest
+from pymongo.errors import OperationFailure
 from exceptions import ConnectionNotFound, CollectionNotFound \
     , InvalidDatabaseCredentials, InvalidQuery, InvalidQueryValues, NewItemNotFound
 from mongodb import MongoDB
@@ -101,6 +103,28 @@ def test4_insert_item():
               "social_media" : "Instagram"}
     result = test_connection.insert_item(values)
     assert result == None
+
+def test1_insert_items():
+    """
+    Test to check the method which inserts a list of new items into a specific
+    collection contained in the Mongo database. In this test, one of the items
+    does not have the date so an exception will be raised.
+    """
+    with pytest.raises(NewItemNotFound):
+        test_connection.insert_items([{"username" : "first user", "social_media" : "Instagram"}])
+
+def test2_insert_items():
+    """
+    Test to check the method which inserts a list of new items into a specific
+    collection contained in the Mongo database. In this test, one of the items
+    already exists so only the other one will be inserted.
+    """
+    values = [{"username" : "first user", "field_one" : "anything", 
+               "date" : datetime.strptime("25-10-2020", "%d-%m-%Y"), "social_media" : "Instagram"},
+              {"username" : "first user", "field_one" : "anything", 
+               "date" : datetime.strptime("29-10-2020", "%d-%m-%Y"), "social_media" : "Instagram"}]
+    result = test_connection.insert_items(values)
+    assert result["inserted"] == 1 and result["matched"] == 1 and len(result["ids"]) == 1
     
 def test1_get_records():
     """
@@ -179,6 +203,155 @@ def test7_get_records():
     records = test_connection.get_records("get_test", values)
     assert type(records) == list and len(records) == 1
 
+def test8_get_records():
+    """
+    Test to check the method which gets data from a specific collection in the
+    Mongo database without providing a valid list of fields to get. An exception
+    will be raised.
+    """
+    values = {"username":"first user", "date_ini":"25-10-2020", 
+              "date_fin":"27-10-2020", "social_media":"Instagram"}
+    with pytest.raises(InvalidQueryValues):
+        test_connection.get_records("get_test", values, "field_one")
+
+def test9_get_records():
+    """
+    Test to check the method which gets only the provided fields of the records
+    from a specific collection in the Mongo database. The Mongo id is not returned.
+    """
+    values = {"username":"first user", "date_ini":"25-10-2020", 
+              "date_fin":"27-10-2020", "social_media":"Instagram"}
+    records = test_connection.get_records("get_test", values, ["username", "date"])
+    assert records == [{"username":"first user", "date":datetime.strptime("25-10-2020", "%d-%m-%Y")}]
+
+def test10_get_records():
+    """
+    Test to check the method which gets data from a specific collection in the
+    Mongo database lazily. A cursor will be returned with the same records.
+    """
+    values = {"username":"first user", "date_ini":"25-10-2020", 
+              "date_fin":"27-10-2020", "social_media":"Instagram"}
+    records = test_connection.get_records("get_test", values, lazy=True)
+    assert type(records) != list and list(records) == test_connection.get_records("get_test", values)
+
+def test11_get_records():
+    """
+    Test to check that the query templates are not modified by the method which
+    gets data from a specific collection, since a new filter is built for each
+    call. The templates are read-only so an exception will be raised if they're
+    modified.
+    """
+    values = {"username":"first user", "date_ini":"25-10-2020", 
+              "date_fin":"27-10-2020", "social_media":"Instagram"}
+    test_connection.get_records("get_test", values)
+    assert test_connection.get_queries["get_test"]["query"]["username"] == None
+    with pytest.raises(TypeError):
+        test_connection.get_queries["get_test"]["query"]["username"] = "first user"
+
+def test12_get_records():
+    """
+    Test to check the method which gets data from the provided collection in the
+    Mongo database. The connected collection will not be changed.
+    """
+    values = {"username":"first user", "date_ini":"25-10-2020", 
+              "date_fin":"27-10-2020", "social_media":"Instagram"}
+    test_connection.set_collection("test_medias")
+    records = test_connection.get_records("get_test", values, collection="test")
+    assert len(records) == 1 and test_connection.connection.name == "test_medias"
+    test_connection.set_collection("test")
+
+def test1_get_dates():
+    """
+    Test to check the method which gets the dates of a user from a specific
+    collection without providing a valid username. An exception will be raised.
+    """
+    with pytest.raises(InvalidQueryValues):
+        test_connection.get_dates("", "Instagram")
+
+def test2_get_dates():
+    """
+    Test to check the method which gets the different dates of a user from a
+    specific collection. Each date will be returned once and sorted, even if
+    there are data of several social media sources on the same date.
+    """
+    values = [{"username" : "dates user", "date" : datetime(2020, 10, 29), "social_media" : "Instagram"},
+              {"username" : "dates user", "date" : datetime(2020, 10, 25), "social_media" : "Instagram"},
+              {"username" : "dates user", "date" : datetime(2020, 10, 27), "social_media" : "Twitter"},
+              {"username" : "dates user", "date" : datetime(2020, 10, 25), "social_media" : "Twitter"}]
+    test_connection.insert_items(values, "test")
+    assert (test_connection.get_dates("dates user", "Instagram", "test") ==
+            [datetime(2020, 10, 25), datetime(2020, 10, 29)] and
+            test_connection.get_dates("dates user", None, "test") ==
+            [datetime(2020, 10, 25), datetime(2020, 10, 27), datetime(2020, 10, 29)])
+
+def test3_get_dates():
+    """
+    Test to check the method which gets the dates of a user who has no data
+    in a specific collection. An empty list will be returned.
+    """
+    assert test_connection.get_dates("other user", "Instagram", "test") == []
+
+def test1_get_snapshot():
+    """
+    Test to check that the snapshot version of a collection is only increased
+    when a new record is inserted into it.
+    """
+    version = test_connection.get_snapshot("test")
+    values = {"username" : "first user", "field_one" : "anything", 
+              "date" : datetime.strptime("30-10-2020", "%d-%m-%Y"), "social_media" : "Instagram"}
+    test_connection.insert_item(values, "test")
+    new_version = test_connection.get_snapshot("test")
+    test_connection.insert_item(values, "test")
+    assert new_version == version+1 and test_connection.get_snapshot("test") == new_version
+
+def test1_create_indexes():
+    """
+    Test to check that the compound index on the username, the social media and
+    the date is created in the connected collection.
+    """
+    test_connection.create_indexes()
+    assert "username_1_social_media_1_date_1" in test_connection.connection.index_information()
+
+def test2_create_indexes():
+    """
+    Test to check that the unique index is not created in a collection written
+    before it, which has duplicated documents and a non-unique index, so an
+    exception will be raised until the collection is migrated.
+    """
+    collection = test_connection.client[test_connection.db]["test_duplicates"]
+    collection.drop()
+    collection.create_index([("username", 1), ("social_media", 1), ("date", 1)])
+    item = {"username":"first user", "social_media":"Instagram", "date":datetime(2020, 10, 30)}
+    collection.insert_many([dict(item, field_one="first"), dict(item, field_one="second")])
+    with pytest.raises(OperationFailure):
+        MongoDB('test').get_connection("test_duplicates")
+    collection.drop()
+
+def test3_create_indexes():
+    """
+    Test to check that the migration of a collection written before the unique
+    index deletes its duplicated documents keeping the oldest one, so the unique
+    index replaces the non-unique one. The migrated collection is skipped the
+    next time and the unique index is already created for the MongoDB object.
+    """
+    spec = importlib.util.spec_from_file_location("mongo_unique_indexes", "migrations/003_mongo_unique_indexes.py")
+    migration = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(migration)
+    collection = test_connection.client[test_connection.db]["test_duplicates"]
+    collection.drop()
+    collection.create_index([("username", 1), ("social_media", 1), ("date", 1)])
+    item = {"username":"first user", "social_media":"Instagram", "date":datetime(2020, 10, 30)}
+    collection.insert_many([dict(item, field_one="first"), dict(item, field_one="second"),
+                            dict(item, date=datetime(2020, 10, 31))])
+    n_deleted = migration.migrate(collection)
+    MongoDB('test').get_connection("test_duplicates")
+    index = collection.index_information()["username_1_social_media_1_date_1"]
+    documents = list(collection.find({"date":datetime(2020, 10, 30)}))
+    skipped = migration.migrate(collection)
+    collection.drop()
+    assert (n_deleted == 1 and skipped == None and index.get("unique", False) and
+            len(documents) == 1 and documents[0]["field_one"] == "first")
+
 def test1_collection_size():
     """
     Test to check the method which returns the number of documents which are
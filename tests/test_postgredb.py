@@ -12,7 +12,7 @@ import sys
 sys.path.append("src")
 from postgredb import PostgreDB
 from exceptions import InvalidDatabaseCredentials, InvalidTableName, InvalidQuery \
-    , InvalidQueryValues
+    , InvalidQueryValues, InvalidPoolSize, ConnectionTimeout
 
 def test1_connect_to_database():
     """
@@ -47,6 +47,42 @@ def test3_connect_to_database():
     global test_connection
     test_connection = PostgreDB()
     
+def test4_connect_to_database():
+    """
+    Test to check the constructor providing a pool whose minimum number of
+    connections is greater than the maximum one. An exception will be raised.
+    """
+    with pytest.raises(InvalidPoolSize):
+        PostgreDB(min_connections=3, max_connections=2)
+
+def test1_get_connection():
+    """
+    Test to check the method which takes a connection from the pool when all
+    of them are being used. An exception will be raised after waiting.
+    """
+    small_pool = PostgreDB(max_connections=1, wait_timeout=0.1)
+    with small_pool.get_connection():
+        with pytest.raises(ConnectionTimeout):
+            with small_pool.get_connection():
+                pass
+    small_pool.close()
+
+def test1_get_pool_stats():
+    """
+    Test to check the statistics of the pool after taking and giving back some
+    connections from different threads.
+    """
+    import threading
+    pool = PostgreDB(max_connections=2)
+    threads = [threading.Thread(target=pool.get_table_size, args=("testparent",)) for i in range(0, 4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    stats = pool.get_pool_stats()
+    pool.close()
+    assert stats["checkouts"] >= 5 and stats["in_use"] == 0 and stats["timeouts"] == 0
+
 def test1_empty_table():
     """
     Test to check the method which deletes all the records from a specific table
@@ -257,6 +293,82 @@ def test14_insert_data():
     with pytest.raises(InvalidQueryValues):
         test_connection.insert_data('insert_test_fk', new_values, check_values)
         
+def test1_bulk_insert_data():
+    """
+    Test to check the method which inserts many new records at once without
+    providing a valid query. An exception will be raised.
+    """
+    with pytest.raises(InvalidQuery):
+        test_connection.bulk_insert_data('non_existing_query', None)
+
+def test2_bulk_insert_data():
+    """
+    Test to check the method which inserts many new records at once without
+    providing all the required keys. An exception will be raised.
+    """
+    with pytest.raises(InvalidQueryValues):
+        test_connection.bulk_insert_data('insert_test_parent', [{"id":"7", "name":"Seventh parent"}])
+
+def test3_bulk_insert_data():
+    """
+    Test to check the method which inserts many new records at once. The items
+    which are already in the 'TestParent' table are skipped and only the ids
+    of the new ones are returned.
+    """
+    new_values = [{"id":"8", "is_parent":True, "name":"Eighth parent"},
+                  {"id":"1", "is_parent":True, "name":"First parent"},
+                  {"id":"7", "is_parent":True, "name":"Seventh parent"},
+                  {"id":"8", "is_parent":True, "name":"Eighth parent"}]
+    ids = test_connection.bulk_insert_data('insert_test_parent', new_values)
+    assert sorted(ids) == ["7", "8"]
+
+def test4_bulk_insert_data():
+    """
+    Test to check the method which inserts many new records at once providing
+    some values which violate the foreign keys. An exception will be raised and
+    none of the records will be inserted.
+    """
+    size = test_connection.get_table_size("testfk")
+    new_values = [{"id":"1", "field_one":"Bulk field"}, {"id":"700", "field_one":"Invalid field"}]
+    with pytest.raises(InvalidQueryValues):
+        test_connection.bulk_insert_data('insert_test_fk', new_values)
+    assert test_connection.get_table_size("testfk") == size
+
+def test5_bulk_insert_data():
+    """
+    Test to check the method which inserts many new records at once providing
+    invalid keys. An exception will be raised.
+    """
+    new_values = [{"id":"1", "field_one":"Bulk field"}]
+    with pytest.raises(InvalidQueryValues):
+        test_connection.bulk_insert_data('insert_test_fk', new_values, keys=["non_existing_field"])
+
+def test6_bulk_insert_data():
+    """
+    Test to check the method which inserts many new records at once returning
+    the ids of the new records by their key columns.
+    """
+    new_values = [{"id":"1", "field_one":"First bulk field"}, {"id":"2", "field_one":"Second bulk field"}]
+    ids = test_connection.bulk_insert_data('insert_test_fk', new_values, keys=["field_one"])
+    assert (sorted(ids.keys()) == [("First bulk field",), ("Second bulk field",)] and
+            ids[("First bulk field",)] != ids[("Second bulk field",)])
+
+def test1_stream_data():
+    """
+    Test to check the method which streams the matched records without providing
+    a valid itersize. An exception will be raised before making the query.
+    """
+    with pytest.raises(InvalidQueryValues):
+        test_connection.stream_data('check_test_parent', {"id":"1"}, itersize=0)
+
+def test2_stream_data():
+    """
+    Test to check the method which streams the matched records in chunks from
+    a server-side cursor. The connection is given back to the pool at the end.
+    """
+    chunks = list(test_connection.stream_data('check_test_parent', {"id":"1"}, itersize=1, chunk_size=1))
+    assert chunks == [[("1",)]] and test_connection.get_pool_stats()["in_use"] == 0
+
 def test1_get_data():
     """
     Test to check the method which gets data from a specific table. In this test,
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests to check the right behaviour of the methods included in the classes
+TokenBucket and RateLimiter, which limit the rate of the requests to an external
+service.
+
+@author: Lidia Sánchez Mérida
+"""
+import sys
+import pytest
+sys.path.append("src")
+sys.path.append("src/data")
+from rate_limiter import TokenBucket, RateLimiter
+from exceptions import InvalidLimit, MaxRequestsExceed
+
+class FakeClock:
+    """
+    Clock whose time only goes forward when the bucket waits.
+    """
+    def __init__(self):
+        self.now = 0.0
+    def time(self):
+        return self.now
+    def sleep(self, seconds):
+        self.now += seconds
+
+def test1_constructor():
+    """
+    Test to check the constructor of the bucket without providing a valid rate.
+    An exception will be raised.
+    """
+    with pytest.raises(InvalidLimit):
+        TokenBucket(0)
+
+def test2_constructor():
+    """
+    Test to check the constructor of the bucket without providing a valid capacity.
+    An exception will be raised.
+    """
+    with pytest.raises(InvalidLimit):
+        TokenBucket(1, capacity=0)
+
+def test1_try_acquire():
+    """
+    Test to check that the bucket allows a burst up to its capacity without waiting.
+    """
+    clock = FakeClock()
+    bucket = TokenBucket(1, capacity=3, clock=clock.time, sleep=clock.sleep)
+    assert [bucket.try_acquire() for i in range(0, 4)] == [True, True, True, False]
+
+def test1_acquire():
+    """
+    Test to check the method which takes some tokens providing more tokens than
+    the capacity of the bucket. An exception will be raised.
+    """
+    bucket = TokenBucket(1, capacity=2)
+    with pytest.raises(InvalidLimit):
+        bucket.acquire(3)
+
+def test2_acquire():
+    """
+    Test to check that the bucket waits until the tokens are refilled when it's empty.
+    """
+    clock = FakeClock()
+    bucket = TokenBucket(2, capacity=1, clock=clock.time, sleep=clock.sleep)
+    waited = [bucket.acquire() for i in range(0, 3)]
+    assert waited == [0.0, 0.5, 0.5] and clock.now == 1.0
+
+
+class FakeService:
+    """
+    Service which rejects the first requests.
+    """
+    def __init__(self, n_rejected):
+        self.n_rejected = n_rejected
+        self.n_requests = 0
+    def request(self):
+        self.n_requests += 1
+        return self.n_requests
+    def is_accepted(self):
+        return self.n_requests > self.n_rejected
+
+def test3_constructor():
+    """
+    Test to check the constructor of the rate limiter without providing a valid
+    maximum delay. An exception will be raised.
+    """
+    with pytest.raises(InvalidLimit):
+        RateLimiter(1, base_delay=10, max_delay=5)
+
+def test1_send():
+    """
+    Test to check that a rejected request is sent again after an exponential
+    backoff, whose jitter is 0 in this test.
+    """
+    clock = FakeClock()
+    limiter = RateLimiter(1000, base_delay=2, max_delay=5, clock=clock.time,
+                          sleep=clock.sleep, jitter=lambda: 0)
+    service = FakeService(3)
+    assert limiter.send("account", service.request, service.is_accepted) == 4 and clock.now == 1+2+2.5
+
+def test2_send():
+    """
+    Test to check that an exception is raised when the request is still rejected
+    after the maximum number of retries.
+    """
+    clock = FakeClock()
+    limiter = RateLimiter(1000, max_retries=2, clock=clock.time, sleep=clock.sleep)
+    service = FakeService(5)
+    with pytest.raises(MaxRequestsExceed):
+        limiter.send("account", service.request, service.is_accepted)
+    assert service.n_requests == 3
+
+def test3_send():
+    """
+    Test to check that each account has its own token bucket, so the requests
+    of two accounts don't wait for each other.
+    """
+    clock = FakeClock()
+    limiter = RateLimiter(1, clock=clock.time, sleep=clock.sleep)
+    service = FakeService(0)
+    limiter.send("first", service.request, service.is_accepted)
+    limiter.send("second", service.request, service.is_accepted)
+    assert clock.now == 0.0 and len(limiter.buckets) == 2
+
+def test4_send():
+    """
+    Test to check that a request which is not rejected because of the limit of
+    requests is not sent again.
+    """
+    clock = FakeClock()
+    limiter = RateLimiter(1000, clock=clock.time, sleep=clock.sleep)
+    service = FakeService(5)
+    assert limiter.send("account", service.request, service.is_accepted, lambda: False) == 1
+    assert service.n_requests == 1 and clock.now == 0.0
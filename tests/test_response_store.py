@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests to check the right behaviour of the methods included in the classes
+ResponseStore, RecordingConnection and ReplayConnection, which record the raw
+responses of the Instagram API and replay them offline.
+
+@author: Lidia Sánchez Mérida
+"""
+import sys
+import tempfile
+from datetime import datetime
+import pytest
+sys.path.append("src")
+sys.path.append("src/data")
+from api import Api
+from rate_limiter import RateLimiter
+from response_store import ResponseStore, ReplayConnection
+from exceptions import UsernameNotFound
+
+# Store of the responses in a temporary folder to perform the tests
+test_store = ResponseStore(tempfile.mkdtemp())
+today = datetime.now().strftime("%d-%m-%Y")
+
+class FakeInstagram:
+    """
+    Fake connection to the LevPasha Instagram API of a user with two posts and
+    a comment per post.
+    """
+    def __init__(self):
+        self.username = "fake_account"
+        self.LastJson = {}
+    def searchUsername(self, username):
+        self.LastJson = {"status":"ok", "user":{"pk":1234, "username":username, "full_name":username,
+            "biography":"", "profile_pic_url":"", "follower_count":10, "following_count":5,
+            "media_count":2}}
+    def getUserFeed(self, user_id, max_id):
+        self.LastJson = {"status":"ok", "more_available":False, "items":[{"id":str(i)+"_"+str(user_id),
+            "caption":{"text":"title"}, "taken_at":0, "like_count":i, "comment_count":1} for i in range(0, 2)]}
+    def getMediaComments(self, id_media):
+        self.LastJson = {"status":"ok", "comments":[{"pk":1, "user":{"username":"follower"}, "text":"nice"}]}
+
+def test1_record():
+    """
+    Test to check the method which records a response without providing a valid
+    username. An exception will be raised.
+    """
+    with pytest.raises(UsernameNotFound):
+        test_store.record("../lidiasm", "searchUsername", ["lidiasm"], {"status":"ok"})
+
+def test2_record():
+    """
+    Test to check that the responses of the download of a user are recorded in
+    the file of the user and the current day.
+    """
+    global recorded_data
+    api = Api(RateLimiter(1000), backend=FakeInstagram(), recorder=test_store)
+    recorded_data = api.get_levpasha_instagram_data("lidiasm")
+    records = test_store.load("lidiasm", today)
+    assert (test_store.get_users(today) == ["lidiasm"] and
+            [item["request"] for item in records] == ["searchUsername", "getUserFeed",
+                                                       "getMediaComments", "getMediaComments"])
+
+def test1_replay():
+    """
+    Test to check that the download of a recorded user is replayed with the same
+    results.
+    """
+    global recorded_data
+    replay = ReplayConnection(test_store)
+    api = Api(backend=replay)
+    assert api.get_levpasha_instagram_data("lidiasm") == recorded_data and replay.n_requests == 4
+
+def test2_replay():
+    """
+    Test to check that the requests which have not been recorded are rejected.
+    An exception will be raised.
+    """
+    api = Api(backend=ReplayConnection(test_store, today))
+    with pytest.raises(UsernameNotFound):
+        api.get_levpasha_instagram_profile("audispain")
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests to check the right behaviour of the methods included in the class
+SentimentCache, which stores the identified sentiments of the preprocessed texts.
+
+@author: Lidia Sánchez Mérida
+"""
+import sys
+import pytest
+sys.path.append("src")
+from postgredb import PostgreDB
+from sentiment_cache import SentimentCache
+from exceptions import TextListNotFound, InvalidMode
+
+# Connection to the database and cache to perform the tests
+test_connection = PostgreDB()
+test_connection.empty_table("testsentimentcache")
+cache = SentimentCache(test_connection, "test-model", "test", capacity=2)
+
+def test1_constructor():
+    """
+    Test to check the constructor of the cache without providing a valid mode.
+    An exception will be raised.
+    """
+    with pytest.raises(InvalidMode):
+        SentimentCache(test_connection, "test-model", "other")
+
+def test1_get_text_hash():
+    """
+    Test to check that the key of a text depends on the model version.
+    """
+    other_cache = SentimentCache(test_connection, "other-model", "test")
+    assert (cache.get_text_hash("great car") == cache.get_text_hash("great car") and
+            cache.get_text_hash("great car") != other_cache.get_text_hash("great car"))
+
+def test1_get_sentiments():
+    """
+    Test to check the method which gets the cached sentiments without providing
+    a list of texts. An exception will be raised.
+    """
+    with pytest.raises(TextListNotFound):
+        cache.get_sentiments(None)
+
+def test2_get_sentiments():
+    """
+    Test to check the method which gets the cached sentiments of texts which
+    have never been analyzed. They will be misses.
+    """
+    assert (cache.get_sentiments(["great car", "awful colour"]) == {} and
+            cache.get_stats()["misses"] == 2)
+
+def test1_store_sentiments():
+    """
+    Test to check the method which stores the sentiments of some texts without
+    providing a dict. An exception will be raised.
+    """
+    with pytest.raises(TextListNotFound):
+        cache.store_sentiments(None)
+
+def test2_store_sentiments():
+    """
+    Test to check the method which stores the sentiments of some texts in both tiers.
+    """
+    result = cache.store_sentiments({"great car":{"sentiment":"pos", "degree":0.9},
+                                     "awful colour":{"sentiment":"neg", "degree":0.8}})
+    assert len(result) == 2 and cache.get_stats()["local_size"] == 2
+
+def test3_get_sentiments():
+    """
+    Test to check that the stored sentiments are got from the local tier.
+    """
+    result = cache.get_sentiments(["great car"])
+    assert result["great car"]["sentiment"] == "pos" and cache.get_stats()["local_hits"] == 1
+
+def test4_get_sentiments():
+    """
+    Test to check that the stored sentiments are got from the durable tier by
+    a new cache whose local tier is empty.
+    """
+    new_cache = SentimentCache(test_connection, "test-model", "test")
+    result = new_cache.get_sentiments(["great car", "awful colour", "new text"])
+    stats = new_cache.get_stats()
+    assert (len(result) == 2 and result["awful colour"]["sentiment"] == "neg" and
+            stats["durable_hits"] == 2 and stats["misses"] == 1)
+
+def test5_get_sentiments():
+    """
+    Test to check that the least recently used texts are removed from the local
+    tier when its capacity is exceeded.
+    """
+    cache.store_sentiments({"brand new text":{"sentiment":"neu", "degree":0.5}})
+    assert cache.get_stats()["local_size"] == 2 and cache.get_text_hash("awful colour") not in cache.local_tier
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests to check the right behaviour of the methods included in the class
+SentimentModels, which loads the sentiment analysis models only once per process.
+
+@author: Lidia Sánchez Mérida
+"""
+import sys
+sys.path.append("src")
+sys.path.append("src/data")
+from sentiment_models import SentimentModels, sentiment_models
+import data_analyzer
+
+# Registry to perform the tests
+models = SentimentModels()
+
+def test1_get_flair_model():
+    """
+    Test to check that the Flair pre-trained model is not loaded until it's required.
+    """
+    assert models.flair_model == None and "flair" not in models.load_stats
+
+def test2_get_flair_model():
+    """
+    Test to check that the Flair pre-trained model is loaded the first time and
+    then the same object is reused.
+    """
+    first_model = models.get_flair_model()
+    assert models.get_flair_model() is first_model
+
+def test1_get_vader_model():
+    """
+    Test to check that the VADER analyzer is loaded the first time and then
+    the same object is reused.
+    """
+    first_model = models.get_vader_model()
+    assert models.get_vader_model() is first_model
+
+def test1_warm_up():
+    """
+    Test to check the method which loads every model in advance. It will return
+    the load time and the resident memory of each model.
+    """
+    stats = models.warm_up()
+    assert ("flair" in stats and "vader" in stats and "rss" in stats and
+            stats["flair"]["load_time"] >= 0 and stats["flair"]["rss_after"] > 0)
+
+def test1_shared_registry():
+    """
+    Test to check that the DataAnalyzer objects share the registry of the process
+    by default.
+    """
+    assert (data_analyzer.DataAnalyzer().sentiment_models is sentiment_models and
+            data_analyzer.DataAnalyzer(models).sentiment_models is models)
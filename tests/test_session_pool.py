@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests to check the right behaviour of the methods included in the class
+SessionPool, which leases the sessions of several Instagram accounts to the
+workers which download the user data. The accounts are connected to a fake API.
+
+@author: Lidia Sánchez Mérida
+"""
+import sys
+import pytest
+sys.path.append("src")
+sys.path.append("src/data")
+from session_pool import SessionPool
+from exceptions import InvalidCredentials, InvalidPoolSize, MaxRequestsExceed
+
+credentials = [("first_account", "pswd"), ("second_account", "pswd")]
+
+class FakeClock:
+    """
+    Clock whose time only goes forward when it's told.
+    """
+    def __init__(self):
+        self.now = 0.0
+    def time(self):
+        return self.now
+
+class FakeApi:
+    """
+    API object which doesn't connect to Instagram.
+    """
+    def __init__(self, rate_limiter):
+        self.rate_limiter = rate_limiter
+        self.n_requests = 0
+        self.username = None
+    def connect_levpasha_instagram_account(self, username, pswd, session_file):
+        self.username = username
+
+def get_pool(clock, max_requests=10):
+    """
+    Creates a pool of two accounts with a fake clock and fake API objects.
+    """
+    return SessionPool(credentials, max_requests=max_requests, window=3600, cooldown=900,
+                       clock=clock.time, api_factory=FakeApi)
+
+def test1_constructor():
+    """
+    Test to check the constructor of the pool without providing valid credentials.
+    An exception will be raised.
+    """
+    with pytest.raises(InvalidCredentials):
+        SessionPool([("first_account", "")])
+
+def test2_constructor():
+    """
+    Test to check the constructor of the pool without providing a valid budget
+    of requests. An exception will be raised.
+    """
+    with pytest.raises(InvalidPoolSize):
+        SessionPool(credentials, max_requests=0)
+
+def test1_lease():
+    """
+    Test to check that two workers lease different accounts at the same time.
+    """
+    pool = get_pool(FakeClock())
+    assert set([pool.lease().username, pool.lease().username]) == set(["first_account", "second_account"])
+
+def test2_lease():
+    """
+    Test to check that an account whose requests have been rejected is not
+    leased until its cooldown has finished, so the other account is leased.
+    """
+    clock = FakeClock()
+    pool = get_pool(clock)
+    api = pool.lease()
+    pool.release(api, rejected=True)
+    other_api = pool.lease()
+    pool.release(other_api, rejected=True)
+    with pytest.raises(MaxRequestsExceed):
+        pool.lease()
+    clock.now = 900
+    assert other_api.username != api.username and pool.lease() in [api, other_api]
+
+def test3_lease():
+    """
+    Test to check that the account with the greatest remaining budget is leased,
+    and that the budget is renewed when its window finishes.
+    """
+    clock = FakeClock()
+    pool = get_pool(clock)
+    api = pool.lease()
+    api.n_requests = 10
+    pool.release(api)
+    other_api = pool.lease()
+    pool.release(other_api)
+    # The first account has no remaining requests
+    budget_exceeded = pool.lease() is other_api
+    pool.release(other_api)
+    clock.now = 3600
+    assert (budget_exceeded and other_api is not api and
+            pool.get_session(api)["remaining"] == 0 and pool.lease() is api)
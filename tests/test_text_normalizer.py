@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests to check the right behaviour of the methods included in the class
+TextNormalizer, which removes the stopwords, numbers and special characters.
+
+@author: Lidia Sánchez Mérida
+"""
+import sys
+import pytest
+sys.path.append("src")
+sys.path.append("src/data")
+from text_normalizer import TextNormalizer
+from exceptions import InvalidTextList
+
+normalizer = TextNormalizer(['a', 'the', 'i', 'it'])
+
+def test1_normalize():
+    """
+    Test to check that the stopwords are removed regardless of their case.
+    """
+    assert normalizer.normalize("The car   I love IT") == "car love"
+
+def test2_normalize():
+    """
+    Test to check that the numbers are removed and the special characters are
+    replaced by a blank space.
+    """
+    assert normalizer.normalize("#motor 2020 top-class R&D ٣") == " motor  top class R D "
+
+def test1_normalize_many():
+    """
+    Test to check the method which normalizes many texts providing some values
+    which are not strings. An exception will be raised.
+    """
+    with pytest.raises(InvalidTextList):
+        list(normalizer.normalize_many(["the car", 5]))
+
+def test2_normalize_many():
+    """
+    Test to check that the method which normalizes many texts is lazy and keeps
+    the order of the texts.
+    """
+    normalized_texts = normalizer.normalize_many(text for text in ["a car", "🔥 it"])
+    assert next(normalized_texts) == "car" and list(normalized_texts) == ["🔥"]
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests to check the right behaviour of the classes which translate the texts:
+the local dictionary backend, the translation cache and the translation service.
+
+@author: Lidia Sánchez Mérida
+"""
+import sys
+import pytest
+sys.path.append("src")
+sys.path.append("src/data")
+from translators import DictionaryTranslatorBackend, TranslationCache, TranslationService
+from exceptions import TextListNotFound, InvalidTextList
+
+dictionary = {"Qué coche": "What a car", "Me encanta": "I love it"}
+
+def test1_translate_batch():
+    """
+    Test to check the dictionary backend, which returns the texts which are not
+    in the dictionary as they are.
+    """
+    backend = DictionaryTranslatorBackend(dictionary)
+    assert backend.translate_batch(["Qué coche", "🔥🙌🏼"]) == ["What a car", "🔥🙌🏼"]
+
+def test1_store_translations(tmp_path):
+    """
+    Test to check that the stored translations are kept in the disk, so a new
+    cache over the same file gets them.
+    """
+    path = str(tmp_path / "translations.db")
+    TranslationCache(path).store_translations("dictionary", {"Me encanta":"I love it"})
+    new_cache = TranslationCache(path)
+    assert (new_cache.get_translations("dictionary", ["Me encanta", "Otro"]) == {"Me encanta":"I love it"} and
+            new_cache.get_translations("google", ["Me encanta"]) == {})
+
+def test1_translate():
+    """
+    Test to check the method which translates the texts without providing a list.
+    An exception will be raised.
+    """
+    service = TranslationService(DictionaryTranslatorBackend(dictionary))
+    with pytest.raises(TextListNotFound):
+        service.translate("Qué coche")
+
+def test2_translate():
+    """
+    Test to check the method which translates the texts providing a list which
+    contains some values that are not strings. An exception will be raised.
+    """
+    service = TranslationService(DictionaryTranslatorBackend(dictionary))
+    with pytest.raises(InvalidTextList):
+        service.translate(["Qué coche", 5])
+
+def test3_translate():
+    """
+    Test to check that the texts are translated in batches keeping their order
+    and the repeated texts are only translated once.
+    """
+    backend = DictionaryTranslatorBackend(dictionary)
+    service = TranslationService(backend, batch_size=2)
+    result = service.translate(["Qué coche", "Me encanta", "Qué coche", "Otro"])
+    assert (result == ["What a car", "I love it", "What a car", "Otro"] and
+            backend.n_calls == 2 and service.stats["translated"] == 3)
+
+def test4_translate():
+    """
+    Test to check that the cached texts are not sent to the backend again.
+    """
+    backend = DictionaryTranslatorBackend(dictionary)
+    service = TranslationService(backend)
+    service.translate(["Qué coche"])
+    result = service.translate(["Qué coche", "Me encanta"])
+    assert (result == ["What a car", "I love it"] and backend.n_calls == 2 and
+            service.stats["cached"] == 1)